@@ -1,15 +1,16 @@
+import hashlib
 import time
-import requests
-from jose import jwk, jwt
+from jose import jwt
 from jose.utils import base64url_decode
 from fastapi import Request, HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from functools import lru_cache
+from typing import Optional
 
 # Configuration
 from backend.config import settings
-
-import boto3
+from backend.services.aws_clients import aws
+from backend.services.query_cache import TTLCache
+from backend.services.jwks import JWKSManager, JWKSUnavailable
 
 # Configuration
 REGION = settings.AWS_REGION
@@ -19,96 +20,129 @@ KEYS_URL = f'https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}/.well-kno
 
 security = HTTPBearer()
 
-@lru_cache()
+# Verified access tokens (keyed on the token's hash, never past its exp) and Cognito group lookups
+token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+group_cache = TTLCache(settings.AUTH_GROUP_CACHE_MAX_ENTRIES, settings.AUTH_GROUP_CACHE_TTL_SECONDS)
+
 def get_cognito_client():
-    return boto3.client('cognito-idp', region_name=REGION)
+    return aws.client('cognito-idp')
 
-@lru_cache()
-def get_jwks():
-    return requests.get(KEYS_URL).json()
+# Signing keys by kid (prefetched at startup, refreshed on TTL or unknown kid)
+jwks_manager = JWKSManager(
+    KEYS_URL,
+    local_path=settings.COGNITO_JWKS_PATH,
+    ttl_seconds=settings.JWKS_TTL_SECONDS,
+    min_refresh_seconds=settings.JWKS_MIN_REFRESH_SECONDS
+)
+
+def _token_key(token: str) -> str:
+    # Never keep raw bearer tokens in memory as dict keys
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def verify_token(token: str) -> dict:
+    """Verified claims for an access token. Signature checks are cached per token until it expires."""
+    key = _token_key(token)
+    claims = token_cache.get(key)
+    if claims is not None and claims['exp'] > time.time():
+        return claims
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)):
-    token = credentials.credentials
-    keys = get_jwks()['keys']
-    
     # Get the kid from the headers
     headers = jwt.get_unverified_headers(token)
     kid = headers['kid']
     
-    # Find the public key
-    key_index = -1
-    for i in range(len(keys)):
-        if kid == keys[i]['kid']:
-            key_index = i
-            break
-            
-    if key_index == -1:
+    # Find the public key (already constructed)
+    hmac_key = jwks_manager.get_key(kid)
+    if hmac_key is None:
         raise HTTPException(status_code=401, detail='Public key not found in JWK set')
-        
-    public_key = keys[key_index]
     
-    # Construct the public key object
-    hmac_key = jwk.construct(public_key)
+    # Verify signature and expiration
+    claims = jwt.decode(
+        token,
+        hmac_key,
+        algorithms=['RS256'],
+        options={"verify_aud": False} 
+    )
     
-    try:
-        # Verify signature and expiration
-        claims = jwt.decode(
-            token,
-            hmac_key,
-            algorithms=['RS256'],
-            options={"verify_aud": False} 
-        )
-        
-        # Additional checks
-        expected_iss = f'https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}'
-        if claims['iss'] != expected_iss:
-             raise HTTPException(status_code=401, detail='Token issuer mismatch')
+    # Additional checks
+    expected_iss = f'https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}'
+    if claims['iss'] != expected_iss:
+         raise HTTPException(status_code=401, detail='Token issuer mismatch')
 
-        if claims['token_use'] != 'access':
-             raise HTTPException(status_code=401, detail='Invalid token use')
+    if claims['token_use'] != 'access':
+         raise HTTPException(status_code=401, detail='Invalid token use')
 
-        # --- REAL TIME GROUP CHECK ---
-        # Don't trust the token groups (stale). Check Cognito directly.
-        raw_username = claims.get('cognito:username') or claims.get('username')
-        real_groups = []
-        
+    token_cache.put(key, claims, ttl_seconds=claims['exp'] - time.time())
+    return claims
+
+def get_user_groups(raw_username: str, claims: dict):
+    """(username, groups) from Cognito, cached for AUTH_GROUP_CACHE_TTL_SECONDS. Falls back to the token's groups."""
+    cached = group_cache.get(raw_username)
+    if cached is not None:
+        return cached
+
+    try:
+        # 1. Try direct lookup
         try:
-            # 1. Try direct lookup
-            try:
+            g_resp = get_cognito_client().admin_list_groups_for_user(
+                UserPoolId=USER_POOL_ID,
+                Username=raw_username
+            )
+            username = raw_username
+        except get_cognito_client().exceptions.UserNotFoundException:
+            # 2. UUID Fallback
+            print(f"AuthMiddleware: UserNotFound for {raw_username}, trying UUID resolution...")
+            u_resp = get_cognito_client().list_users(
+                UserPoolId=USER_POOL_ID,
+                Filter=f'sub = "{raw_username}"'
+            )
+            if u_resp['Users']:
+                username = u_resp['Users'][0]['Username']
+                print(f"AuthMiddleware: Resolved {raw_username} -> {username}")
                 g_resp = get_cognito_client().admin_list_groups_for_user(
                     UserPoolId=USER_POOL_ID,
-                    Username=raw_username
-                )
-            except get_cognito_client().exceptions.UserNotFoundException:
-                # 2. UUID Fallback
-                print(f"AuthMiddleware: UserNotFound for {raw_username}, trying UUID resolution...")
-                u_resp = get_cognito_client().list_users(
-                    UserPoolId=USER_POOL_ID,
-                    Filter=f'sub = "{raw_username}"'
+                    Username=username
                 )
-                if u_resp['Users']:
-                    resolved_username = u_resp['Users'][0]['Username']
-                    print(f"AuthMiddleware: Resolved {raw_username} -> {resolved_username}")
-                    g_resp = get_cognito_client().admin_list_groups_for_user(
-                        UserPoolId=USER_POOL_ID,
-                        Username=resolved_username
-                    )
-                    raw_username = resolved_username # Update for return
-                else:
-                    raise Exception("User not found by UUID")
-            
-            real_groups = [g['GroupName'] for g in g_resp.get('Groups', [])]
-            
-        except Exception as aws_err:
-             print(f"AuthMiddleware: Failed to fetch real-time groups. Using token backup. Error: {aws_err}")
-             # Fallback to token
-             real_groups = claims.get('cognito:groups', [])
+            else:
+                raise Exception("User not found by UUID")
+        
+        result = (username, [g['GroupName'] for g in g_resp.get('Groups', [])])
+        group_cache.put(raw_username, result)
+        return result
+        
+    except Exception as aws_err:
+         print(f"AuthMiddleware: Failed to fetch real-time groups. Using token backup. Error: {aws_err}")
+         # Fallback to token (not cached, so the next request retries Cognito)
+         return raw_username, claims.get('cognito:groups', [])
+
+def invalidate_user_groups(username: Optional[str] = None) -> int:
+    """
+    Drops cached group memberships for `username` (by login name or sub), or for everyone if None.
+    Call after changing a user's groups so the change applies immediately instead of after the TTL.
+    """
+    if username is None:
+        return group_cache.discard(lambda key, value: True)
+    return group_cache.discard(lambda key, value: key == username or value[0] == username)
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)):
+    token = credentials.credentials
+    
+    try:
+        claims = verify_token(token)
+
+        # --- REAL TIME GROUP CHECK ---
+        # Don't trust the token groups (stale). Check Cognito (short-TTL cache).
+        raw_username = claims.get('cognito:username') or claims.get('username')
+        username, real_groups = get_user_groups(raw_username, claims)
 
         return {
-            "username": raw_username,
+            "username": username,
             "groups": real_groups
         }
         
+    except JWKSUnavailable as e:
+        # Not the token's fault: ask the client to retry instead of treating it as logged out
+        print(f"Token validation unavailable: {e}")
+        raise HTTPException(status_code=503, detail='Signing keys unavailable, try again shortly')
     except Exception as e:
         print(f"Token validation failed: {e}")
         raise HTTPException(status_code=401, detail=f'Invalid token: {str(e)}')
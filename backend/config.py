@@ -7,10 +7,91 @@ class Settings(BaseSettings):
     COGNITO_USER_POOL_ID: str = "us-east-1_VT82bTVEX"
     COGNITO_CLIENT_ID: str = "2mhovll3csgcqmg8uj6le5ffhd"
 
+    # Cognito signing keys (JWKS): refreshed after the TTL, or on an unknown kid at most every N seconds
+    COGNITO_JWKS_PATH: str = ""  # Optional local JWKS file instead of the Cognito URL (offline dev/tests)
+    JWKS_TTL_SECONDS: int = 3600
+    JWKS_MIN_REFRESH_SECONDS: int = 30
+
+    # Auth caches: verified tokens (also capped by each token's expiry) and Cognito group memberships
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 3600
+    AUTH_GROUP_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_GROUP_CACHE_TTL_SECONDS: int = 60
+
+    # Admin user directory (all users + groups); reloaded sooner when scripts/manage_users.py changes users
+    USER_DIRECTORY_TTL_SECONDS: int = 300
+
     # Main AWS Credentials (Optional, picked up by Boto3 via Env)
     AWS_ACCESS_KEY_ID: str = ""
     AWS_SECRET_ACCESS_KEY: str = ""
 
+    # Shared boto3 clients (one per service per process) and the thread pool async endpoints use
+    AWS_MAX_POOL_CONNECTIONS: int = 50
+    AWS_ENDPOINT_URL: str = ""  # Optional local stand-in (e.g. moto/LocalStack) for development and benchmarks
+
+    # Activity log: events are buffered in memory and batch-written in the background
+    ACTIVITY_LOG_MAX_QUEUE: int = 10000  # Events beyond this are dropped (counted), never block requests
+    ACTIVITY_LOG_BATCH_SIZE: int = 100
+    ACTIVITY_LOG_FLUSH_SECONDS: float = 2.0
+    ACTIVITY_TABLE: str = "rnd-hub-activity-log"  # Hour-bucketed layout (backend/create_activity_table.py)
+    ACTIVITY_LATEST_LOOKBACK_HOURS: int = 168  # "Latest N events" stops looking further back than this
+    ACTIVITY_LATEST_PARALLEL_QUERIES: int = 24  # Hour buckets queried at once by "latest N events" (per process)
+
+    # Admin dashboard: users seen within the window count as online (last seen written at most every N s)
+    ONLINE_WINDOW_SECONDS: int = 900
+    ONLINE_WRITE_INTERVAL_SECONDS: int = 60
+
+    # Embedding throughput (Bedrock calls across all in-flight documents)
+    EMBEDDING_MAX_WORKERS: int = 8
+    EMBEDDING_REQUESTS_PER_SECOND: float = 10.0
+    EMBEDDING_MAX_RETRIES: int = 5
+
+    # Local embedding cache (content-addressed, LRU-bounded)
+    EMBEDDING_CACHE_PATH: str = "embedding_cache.db"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200000
+
+    # Extracted text by content hash (duplicate uploads skip extraction/OCR)
+    CONTENT_CACHE_PATH: str = "content_cache.db"
+    CONTENT_CACHE_MAX_ENTRIES: int = 20000
+
+    # In-process /search caches (query vectors + ranked results)
+    QUERY_CACHE_MAX_ENTRIES: int = 1024
+    QUERY_CACHE_TTL_SECONDS: int = 300
+    RESULT_CACHE_ENABLED: bool = True
+
+    # FAISS index type: flat | ivf_flat | ivf_pq | hnsw (see scripts/migrate_index.py)
+    VECTOR_INDEX_TYPE: str = "flat"
+    VECTOR_INDEX_NLIST: int = 1024
+    VECTOR_INDEX_PQ_M: int = 64
+    VECTOR_INDEX_HNSW_M: int = 32
+    VECTOR_INDEX_NPROBE: int = 16
+    VECTOR_INDEX_EF_SEARCH: int = 64
+    VECTOR_INDEX_MMAP: bool = True  # Map the base index read-only so workers share pages
+
+    # Vector store persistence: delta segments, compacted into a base snapshot every N segments
+    VECTOR_STORE_COMPACT_EVERY: int = 50
+    VECTOR_STORE_LOCAL_DIR: str = ""  # If set, use a local directory instead of S3 (offline dev/tests)
+    VECTOR_STORE_DATA_DIR: str = "vector_store_data"  # Local snapshot files (mapped index etc.), one subdirectory per process
+
+    # Downloads for text extraction spill from memory to a temp file above this size
+    EXTRACTION_SPOOL_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # OCR (Tesseract) process pool: 0 = one worker per CPU core
+    OCR_MAX_WORKERS: int = 0
+    OCR_DPI: int = 200
+    OCR_GRAYSCALE: bool = True
+
+    # Ingestion job queue (SQLite, shared by the API and backend/worker.py on the same host)
+    INGEST_QUEUE_PATH: str = "ingest_queue.db"
+    INGEST_WORKER_CONCURRENCY: int = 2
+    INGEST_MAX_ATTEMPTS: int = 5
+    INGEST_RETRY_BASE_SECONDS: float = 30.0
+    INGEST_LEASE_SECONDS: float = 1800.0  # A job held longer than this is assumed lost and re-run
+    INGEST_POLL_SECONDS: float = 2.0
+
+    # How often API processes check for index changes committed by the worker
+    VECTOR_STORE_REFRESH_SECONDS: float = 10.0
+
     class Config:
         env_file = ".env"
 
@@ -3,18 +3,20 @@ from backend.config import settings
 
 def create_activity_table():
     dynamodb = boto3.client('dynamodb', region_name=settings.AWS_REGION)
-    table_name = "rnd-hub-activity"
+    table_name = settings.ACTIVITY_TABLE
     
     try:
+        # Partitioned by hour so audit reads are Queries over the hours they cover
+        # (see backend/services/activity_store.py; scripts/migrate_activity.py copies the old table)
         dynamodb.create_table(
             TableName=table_name,
             KeySchema=[
-                {'AttributeName': 'event_id', 'KeyType': 'HASH'},  # Partition Key
-                {'AttributeName': 'timestamp', 'KeyType': 'RANGE'} # Sort Key
+                {'AttributeName': 'bucket', 'KeyType': 'HASH'},  # Partition Key: "YYYY-MM-DDTHH"
+                {'AttributeName': 'sk', 'KeyType': 'RANGE'}      # Sort Key: "<timestamp>#<event_id>"
             ],
             AttributeDefinitions=[
-                {'AttributeName': 'event_id', 'AttributeType': 'S'},
-                {'AttributeName': 'timestamp', 'AttributeType': 'S'}
+                {'AttributeName': 'bucket', 'AttributeType': 'S'},
+                {'AttributeName': 'sk', 'AttributeType': 'S'}
             ],
             ProvisionedThroughput={
                 'ReadCapacityUnits': 5,
@@ -1,20 +1,21 @@
 from dotenv import load_dotenv
 load_dotenv() # Load Environment Variables FIRST
 
-from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-import boto3
 import os
-from backend.services.file_processor import extract_text_from_s3
+from backend.services.aws_clients import aws
+from backend.services.job_queue import job_queue
+from backend.services.content_cache import content_cache
+from backend.services import file_catalog, stats
 from backend.services.vector_store import vector_store
 from backend.middleware.logging import ActivityLoggingMiddleware
+from backend.services.activity_log import activity_logger
 from backend.routers import admin, tags
-from backend.auth import require_contributor, get_current_user
+from backend.auth import require_contributor, get_current_user, jwks_manager
 from pydantic import BaseModel
 from backend.config import settings
 
-cognito = boto3.client('cognito-idp', region_name=settings.AWS_REGION)
-
 load_dotenv()
 
 app = FastAPI()
@@ -22,6 +23,23 @@ app = FastAPI()
 # Middleware
 app.add_middleware(ActivityLoggingMiddleware)
 
+@app.on_event("startup")
+async def start_activity_logger():
+    activity_logger.start()
+
+@app.on_event("startup")
+async def prefetch_jwks():
+    # So the first authenticated request does not pay for the JWKS download
+    try:
+        await aws.run(jwks_manager.refresh)
+    except Exception as e:
+        print(f"JWKS prefetch failed (will retry on first request): {e}")
+
+@app.on_event("shutdown")
+async def flush_activity_logger():
+    # Write out events still buffered in memory
+    await activity_logger.stop()
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,11 +53,10 @@ app.add_middleware(
 app.include_router(admin.router)
 app.include_router(tags.router)
 
-# AWS Clients
-s3 = boto3.client('s3', region_name='us-east-1')
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-table = dynamodb.Table('rnd-hub-metadata')
-BUCKET_NAME = "rnd-hub-files-0202"
+# AWS Clients (shared per process, see backend/services/aws_clients.py)
+s3 = aws.client('s3')
+table = aws.table(settings.DYNAMODB_TABLE)
+BUCKET_NAME = settings.S3_BUCKET_NAME
 
 class FileMetadata(BaseModel):
     filename: str
@@ -57,25 +74,42 @@ ALLOWED_TYPES = {
 ALLOWED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.docx', '.doc', '.pptx', '.ppt'}
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "RnD Knowledge Hub API is running"}
 
 @app.get("/auth/me")
-def read_current_user(user: dict = Depends(get_current_user)):
+async def read_current_user(user: dict = Depends(get_current_user)):
     # The middleware (get_current_user) now does a real-time fetch from Cognito.
     # So we can just return the user object directly.
     return user
 
 @app.get("/files")
-def list_files():
+async def list_files(
+    limit: int = Query(50, ge=1, le=file_catalog.MAX_PAGE_SIZE),
+    cursor: str = None,
+    prefix: str = "",
+    status: str = None,
+    tag: str = None,
+    fields: str = None  # Comma-separated, e.g. "filename,size,status"
+):
     try:
-        response = table.scan()
-        return response.get('Items', [])
+        # One index Query per page (see backend/services/file_catalog.py), never a full scan
+        return await aws.run(
+            file_catalog.list_files,
+            limit=limit,
+            cursor=cursor,
+            prefix=prefix,
+            status=status,
+            tag=tag,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        )
+    except file_catalog.InvalidListRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/files/upload-url")
-def generate_upload_url(
+async def generate_upload_url(
     filename: str, 
     content_type: str,
     user: dict = Depends(require_contributor) # Protect
@@ -91,6 +125,7 @@ def generate_upload_url(
 
     try:
         key = filename
+        # Presigning is local signing (no network call), so it is fine on the event loop
         presigned_url = s3.generate_presigned_url(
             'put_object',
             Params={'Bucket': BUCKET_NAME, 'Key': key, 'ContentType': content_type},
@@ -100,90 +135,53 @@ def generate_upload_url(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-from fastapi import BackgroundTasks
-
-def process_file_background(metadata: FileMetadata):
-    """Background task to extract text and update vector index."""
-    try:
-        print(f"Background Processing Started: {metadata.filename}")
-        
-        # 1. Update Status -> 'processing'
-        table.update_item(
-            Key={'file_id': metadata.filename},
-            UpdateExpression="set #s = :s",
-            ExpressionAttributeNames={'#s': 'status'},
-            ExpressionAttributeValues={':s': 'processing'}
-        )
-
-        # 2. Extract Text
-        text = extract_text_from_s3(metadata.filename)
-        
-        # 3. Index Vector
-        vector_store.add_document(text, metadata.filename)
-        
-        # 4. Update Status -> 'indexed'
-        table.update_item(
-            Key={'file_id': metadata.filename},
-            UpdateExpression="set #s = :s",
-            ExpressionAttributeNames={'#s': 'status'},
-            ExpressionAttributeValues={':s': 'indexed'}
-        )
-        print(f"Background Processing Complete: {metadata.filename}")
-
-    except Exception as e:
-        print(f"Background Processing Failed for {metadata.filename}: {e}")
-        # Update Status -> 'failed'
-        try:
-             table.update_item(
-                Key={'file_id': metadata.filename},
-                UpdateExpression="set #s = :s, #err = :err",
-                ExpressionAttributeNames={'#s': 'status', '#err': 'error_message'},
-                ExpressionAttributeValues={':s': 'failed', ':err': str(e)}
-            )
-        except:
-            pass
-
 @app.post("/files/ingest")
-def ingest_file(
+async def ingest_file(
     metadata: FileMetadata,
-    background_tasks: BackgroundTasks,
     user: dict = Depends(require_contributor)
 ):
     try:
         # Initial Save (Status: uploading/queued)
-        table.put_item(
-            Item={
-                'file_id': metadata.filename,
-                'filename': metadata.filename,
-                'content_type': metadata.content_type,
-                'size': metadata.size,
-                'status': 'queued',
-                'uploaded_by': user.get('username', 'unknown'),
-                'timestamp': str(os.getenv('timestamp', '')) # Optional
-            }
-        )
+        item = {
+            'file_id': metadata.filename,
+            'filename': metadata.filename,
+            'content_type': metadata.content_type,
+            'size': metadata.size,
+            'status': 'queued',
+            'uploaded_by': user.get('username', 'unknown'),
+            'timestamp': str(os.getenv('timestamp', '')), # Optional
+            **file_catalog.index_attributes(metadata.filename)
+        }
+        replaced = await aws.run(table.put_item, Item=item, ReturnValues='ALL_OLD')
+        await aws.run(stats.record_file_change, replaced.get('Attributes'), item)
+        # A re-upload replaces the item (and its tags): drop it from the tag index too
+        old_tags = replaced.get('Attributes', {}).get('tags', [])
+        if old_tags:
+            await aws.run(file_catalog.set_file_tags, metadata.filename, [], previous=old_tags)
         
-        # Trigger Background Task
-        background_tasks.add_task(process_file_background, metadata)
+        # Hand off to the ingestion worker (backend/worker.py) via the durable queue
+        job_id = await aws.run(job_queue.enqueue, "ingest", {"filename": metadata.filename})
         
-        return {"status": "queued", "message": "File accepted for background processing", "file_id": metadata.filename}
+        return {"status": "queued", "message": "File accepted for background processing", "file_id": metadata.filename, "job_id": job_id}
 
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/search")
-def search_files(q: str):
+async def search_files(q: str, k: int = Query(5, ge=1, le=50)):
     try:
-        results = vector_store.search(q)
+        # CPU (FAISS) + Bedrock for uncached queries: keep it off the event loop.
+        # Concurrent searches are safe: the store reads its index under a shared lock.
+        results = await aws.run(vector_store.search, q, k=k)
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/files/{filename}/versions")
-def get_file_versions(filename: str):
+async def get_file_versions(filename: str):
     try:
-        response = s3.list_object_versions(Bucket=BUCKET_NAME, Prefix=filename)
+        response = await aws.run(s3.list_object_versions, Bucket=BUCKET_NAME, Prefix=filename)
         versions = response.get('Versions', [])
         return [
             {
@@ -197,7 +195,7 @@ def get_file_versions(filename: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 @app.get("/files/{filename}/view")
-def view_file(filename: str, user: dict = Depends(require_contributor)):
+async def view_file(filename: str, user: dict = Depends(require_contributor)):
     try:
         # Generate presigned URL for inline viewing
         url = s3.generate_presigned_url(
@@ -214,7 +212,7 @@ def view_file(filename: str, user: dict = Depends(require_contributor)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/files/{filename}/download")
-def download_file(filename: str, user: dict = Depends(require_contributor)):
+async def download_file(filename: str, user: dict = Depends(require_contributor)):
     try:
         # Generate presigned URL for downloading (attachment)
         url = s3.generate_presigned_url(
@@ -231,18 +229,26 @@ def download_file(filename: str, user: dict = Depends(require_contributor)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/files/{filename}")
-def delete_file(filename: str, user: dict = Depends(require_contributor)):
+async def delete_file(filename: str, user: dict = Depends(require_contributor)):
     try:
         # 1. Delete from S3
-        s3.delete_object(Bucket=BUCKET_NAME, Key=filename)
+        await aws.run(s3.delete_object, Bucket=BUCKET_NAME, Key=filename)
         
-        # 2. Delete from DynamoDB
-        table.delete_item(Key={'file_id': filename})
+        # 2. Delete from DynamoDB (and from the tag index)
+        deleted = await aws.run(table.delete_item, Key={'file_id': filename}, ReturnValues='ALL_OLD')
+        if 'Attributes' in deleted:
+            await aws.run(stats.record_file_change, deleted['Attributes'], None)
+        old_tags = deleted.get('Attributes', {}).get('tags', [])
+        if old_tags:
+            await aws.run(file_catalog.set_file_tags, filename, [], previous=old_tags)
         
-        # 3. Note: Vector Store deletion is skipped for stability/simplicity
-        # The file will "disappear" from UI (DB) and Storage (S3).
-        # Search results might linger until next re-index, but will fail to load, which is acceptable.
+        # 3. Delete from Vector Store (only this file's chunks)
+        removed_chunks = await aws.run(vector_store.delete_document, filename)
+
+        # 4. Uploads of the same bytes were searchable through this file only: index them now
+        for duplicate in await aws.run(content_cache.forget, filename):
+            await aws.run(job_queue.enqueue, "ingest", {"filename": duplicate})
         
-        return {"status": "deleted", "filename": filename}
+        return {"status": "deleted", "filename": filename, "chunks_removed": removed_chunks}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
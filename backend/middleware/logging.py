@@ -2,17 +2,14 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi import Request
 import time
 import uuid
-import boto3
 from datetime import datetime
-from backend.config import settings
+from backend.services.activity_log import activity_logger
 
 from jose import jwt
 
 class ActivityLoggingMiddleware(BaseHTTPMiddleware):
     def __init__(self, app):
         super().__init__(app)
-        self.dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
-        self.table = self.dynamodb.Table('rnd-hub-activity')
 
     async def dispatch(self, request: Request, call_next):
         start_time = time.time()
@@ -64,8 +61,8 @@ class ActivityLoggingMiddleware(BaseHTTPMiddleware):
                     'ip': request.client.host if request.client else "unknown"
                 }
 
-                # Save to DynamoDB (Async ideally, but sync for now is fine for MVP)
-                self.table.put_item(Item=item)
+                # Queue for the background batch writer (never waits on DynamoDB)
+                activity_logger.log(item)
             except Exception as e:
                 print(f"Failed to log activity: {e}")
 
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query
 from fastapi.responses import StreamingResponse
-import boto3
 from backend.config import settings
-from boto3.dynamodb.conditions import Key
+from backend.services.aws_clients import aws
+from backend.services import stats, activity_store
+from backend.services.user_directory import user_directory, bump_generation
+from backend.services.vector_store import vector_store
+from backend.services.activity_log import activity_logger
+from backend.services.job_queue import job_queue
+import asyncio
 import datetime
-from backend.auth import require_admin
+import itertools
+from typing import Optional
+from backend.auth import require_admin, invalidate_user_groups
 import uuid
 import csv
 import io
@@ -15,77 +22,43 @@ router = APIRouter(
     dependencies=[Depends(require_admin)]
 )
 
-# Helper for Lazy Loading
+# Shared per-process clients (created on first use, never per request)
 def get_aws_resources():
-    dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
     return {
-        'files': dynamodb.Table('rnd-hub-metadata'),
-        'activity': dynamodb.Table('rnd-hub-activity'),
-        's3': boto3.client('s3', region_name=settings.AWS_REGION),
-        'cognito': boto3.client('cognito-idp', region_name=settings.AWS_REGION)
+        'cognito': aws.client('cognito-idp')
     }
 
 @router.get("/stats")
-def get_dashboard_stats():
+async def get_dashboard_stats():
     try:
-        aws = get_aws_resources()
-        files_table = aws['files']
-        activity_table = aws['activity']
-        cognito = aws['cognito']
-
-        # File Counts
-        files_response = files_table.scan(Select='COUNT')
-        total_files = files_response['Count']
-        
-        # Storage Calculation
-        storage_bytes = 0
-        scan_kwargs = {'ProjectionExpression': 'file_size'} # Note: attribute is 'size' in our DB
-        done = False
-        start_key = None
-        
-        # Scan for full storage sum (optimized scan)
-        # Note: If 'size' attribute exists. Let's check our schema. 
-        # Previous Upload saves 'size'.
-        files = files_table.scan()
-        for item in files.get('Items', []):
-            storage_bytes += int(item.get('size', 0))
-            
+        resources = get_aws_resources()
+        cognito = resources['cognito']
+
+        # Running totals, the online-user window and the pool size: three O(1) reads, in parallel
+        totals, online, pool = await asyncio.gather(
+            aws.run(stats.file_totals),
+            aws.run(stats.online_users.active),
+            aws.run(cognito.describe_user_pool, UserPoolId=settings.COGNITO_USER_POOL_ID)
+        )
+
+        storage_bytes = totals['total_bytes']
         storage_display = "0 MB"
         if storage_bytes < 1024 * 1024:
              storage_display = f"{round(storage_bytes / 1024, 2)} KB"
         else:
              storage_display = f"{round(storage_bytes / (1024 * 1024), 2)} MB"
-        
-        # User Count (Cognito - Total Registered)
-        users = cognito.list_users(UserPoolId=settings.COGNITO_USER_POOL_ID)
-        total_registered = len(users.get('Users', []))
-
-        # Online Users (Activity in last 15 mins)
-        now = datetime.datetime.utcnow()
-        threshold = (now - datetime.timedelta(minutes=15)).isoformat() + 'Z'
-        
-        # Scan Activity Table for recent logs
-        # Note: In prod, use a GSI on timestamp. For MVP, Scan is fine.
-        activity_response = activity_table.scan(
-            FilterExpression=Key('timestamp').gt(threshold),
-            ProjectionExpression='#u',
-            ExpressionAttributeNames={'#u': 'user'}
-        )
-        
-        recent_users = set()
-        for item in activity_response.get('Items', []):
-            u = item.get('user')
-            if u and u not in ['unknown', 'anonymous', 'unknown_user']:
-                recent_users.add(u)
-                
-        online_count = len(recent_users)
+
+        # User Count (Cognito - Total Registered; estimated, without listing every user)
+        total_registered = pool['UserPool'].get('EstimatedNumberOfUsers', 0)
 
         return {
-            "total_files": total_files,
+            "total_files": totals['file_count'],
+            "files_by_status": totals['by_status'],
             "active_users": total_registered, # Kept for backward compat if needed, or use online_count
-            "online_users_count": online_count,
-            "online_users_list": list(recent_users),
+            "online_users_count": len(online),
+            "online_users_list": online,
             "storage_used": storage_display,
+            "storage_bytes": storage_bytes,
             "system_health": "Healthy"
         }
     except Exception as e:
@@ -93,46 +66,58 @@ def get_dashboard_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/users")
-def get_users():
+async def get_users():
     try:
-        aws = get_aws_resources()
-        cognito = aws['cognito']
-
-        # Fetch Users
-        response = cognito.list_users(UserPoolId=settings.COGNITO_USER_POOL_ID)
-        users = []
-        for u in response.get('Users', []):
-            # Extract attributes
-            attrs = {a['Name']: a['Value'] for a in u['Attributes']}
-            
-            # Fetch Groups for user
-            groups_resp = cognito.admin_list_groups_for_user(
-                UserPoolId=settings.COGNITO_USER_POOL_ID,
-                Username=u['Username']
-            )
-            model = {
-                "username": u['Username'],
-                "email": attrs.get('email', ''),
-                "status": u['UserStatus'],
-                "created_at": u['UserCreateDate'],
-                "last_modified": u['UserLastModifiedDate'],
-                "enabled": u['Enabled'],
-                "groups": [g['GroupName'] for g in groups_resp.get('Groups', [])]
-            }
-            users.append(model)
-        return users
+        # Cached directory: all pages of users, groups resolved per group (not per user)
+        return await aws.run(user_directory.users)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/users/refresh")
+async def refresh_users():
+    # After changing users or groups outside the app: reload the directory (all API processes)
+    # and drop cached group memberships used for authorization
+    try:
+        await aws.run(bump_generation)
+    except Exception as e:
+        print(f"User directory generation bump failed (refreshing this process only): {e}")
+    user_directory.invalidate()
+    removed = invalidate_user_groups()
+    return {"status": "refreshed", "group_cache_entries_removed": removed}
+
+@router.get("/embedding-cache")
+def get_embedding_cache_stats():
+    # Counters are kept in the cache file, so this includes the ingestion worker's hits (Bedrock calls saved)
+    return vector_store.embedding_cache.stats()
+
+@router.post("/auth-cache/invalidate")
+def invalidate_auth_cache(username: Optional[str] = None):
+    # After changing a user's groups: apply now instead of after AUTH_GROUP_CACHE_TTL_SECONDS
+    removed = invalidate_user_groups(username)
+    return {"status": "invalidated", "username": username or "*", "entries_removed": removed}
+
+@router.get("/activity-log")
+def get_activity_log_stats():
+    # Dropped > 0 means DynamoDB could not keep up and the buffer overflowed
+    return activity_logger.stats()
+
+@router.get("/ingest-queue")
+def get_ingest_queue():
+    # Job counts by state plus the most recent dead-lettered jobs
+    return {"counts": job_queue.stats(), "dead_letters": job_queue.dead_letters(limit=20)}
+
+@router.post("/ingest-queue/{job_id}/retry")
+def retry_ingest_job(job_id: int):
+    if not job_queue.requeue(job_id):
+        raise HTTPException(status_code=404, detail=f"No dead-lettered job {job_id}")
+    return {"status": "queued", "job_id": job_id}
+
 @router.post("/log-login")
-def log_login(user_details: dict = Body(...)):
+async def log_login(user_details: dict = Body(...)):
     try:
-        aws = get_aws_resources()
-        activity_table = aws['activity']
-        
         item = {
             'event_id': str(uuid.uuid4()),
-            'timestamp': datetime.datetime.utcnow().isoformat(),
+            'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
             'method': 'LOGIN', # Special method for login events
             'path': '/auth/login',
             'status_code': 200,
@@ -140,51 +125,95 @@ def log_login(user_details: dict = Body(...)):
             'user': user_details.get('username', 'unknown'),
             'details': f"Login from {user_details.get('source', 'web')}"
         }
-        activity_table.put_item(Item=item)
+        # Same buffered writer as the request log (keys added there, see activity_store.with_keys)
+        activity_logger.log(item)
         return {"status": "logged"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _parse_time(value: Optional[str], name: str) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    try:
+        return activity_store.parse_timestamp(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected an ISO date or timestamp")
+
 @router.get("/audit-logs")
-def get_audit_logs():
+async def get_audit_logs(
+    limit: int = Query(100, ge=1, le=1000),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    minutes: Optional[float] = None
+):
+    start_time = _parse_time(start, "start")
+    end_time = _parse_time(end, "end")
     try:
-        aws = get_aws_resources()
-        activity_table = aws['activity']
-
-        # Scan logs
-        response = activity_table.scan(Limit=100) # Cap at 100 for now
-        items = response.get('Items', [])
-        # Sort by timestamp desc
-        items.sort(key=lambda x: x['timestamp'], reverse=True)
-        return items
+        # Newest first; only the hour partitions covering the window are queried
+        if minutes:
+            start_time = datetime.datetime.utcnow() - datetime.timedelta(minutes=minutes)
+        if start_time:
+            events = activity_store.query_range(start_time, end_time)
+            return await aws.run(lambda: list(itertools.islice(events, limit)))
+        return await aws.run(activity_store.latest, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+AUDIT_CSV_FIELDS = ['timestamp', 'user', 'method', 'path', 'status_code', 'details', 'ip']
+CSV_ROWS_PER_CHUNK = 500
+
+def _csv_chunks(events):
+    """CSV text in chunks of CSV_ROWS_PER_CHUNK rows; the header comes first, before any read."""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=AUDIT_CSV_FIELDS, extrasaction='ignore')
+
+    def drain():
+        chunk = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        return chunk
+
+    writer.writeheader()
+    yield drain()
+    for i, row in enumerate(events, 1):
+        writer.writerow(row)
+        if i % CSV_ROWS_PER_CHUNK == 0:
+            yield drain()
+    yield drain()
+
+async def _stream(chunks):
+    # Each DynamoDB page is fetched on the AWS pool as the client reads, never all at once
+    try:
+        while True:
+            chunk = await aws.run(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    except Exception as e:
+        # Headers are already sent: re-raise so the server aborts the transfer and the
+        # client sees a failed download instead of a silently truncated CSV
+        print(f"Audit export failed mid-stream: {e}")
+        raise
+
 @router.get("/export-audit")
-def export_audit_logs():
+async def export_audit_logs(start: Optional[str] = None, end: Optional[str] = None):
+    start_time = _parse_time(start, "start")
+    end_time = _parse_time(end, "end")
     try:
-        aws = get_aws_resources()
-        activity_table = aws['activity']
-
-        response = activity_table.scan()
-        items = response.get('Items', [])
-        
-        # Define CSV Columns
-        fieldnames = ['timestamp', 'user', 'method', 'path', 'status_code', 'details', 'ip']
-        
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
-        writer.writeheader()
-        
-        for row in items:
-            writer.writerow(row)
-            
-        output.seek(0)
-        
+        # Date range: newest first from the hour partitions. No range: the whole table, page by page.
+        if start_time:
+            events = activity_store.query_range(start_time, end_time)
+        elif end_time:
+            raise HTTPException(status_code=400, detail="end requires start")
+        else:
+            events = activity_store.scan_all()
+
         return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
+            _stream(_csv_chunks(events)),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename=audit_logs_{datetime.datetime.now().strftime('%Y%m%d')}.csv"}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
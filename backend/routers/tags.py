@@ -1,47 +1,42 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-import boto3
 from backend.config import settings
+from backend.services.aws_clients import aws
+from backend.services import file_catalog
 from backend.auth import require_admin, require_contributor
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
-dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
-table = dynamodb.Table('rnd-hub-tags')
-files_table = dynamodb.Table('rnd-hub-metadata')
+table = aws.table('rnd-hub-tags')
+files_table = aws.table(settings.DYNAMODB_TABLE)
 
 class TagCreate(BaseModel):
     name: str
     color: str
 
 @router.get("/")
-def get_tags():
+async def get_tags():
     try:
-        response = table.scan()
+        # Usage counts are kept on the tag items (file_count), so this is one read of a small table
+        response = await aws.run(table.scan)
         tags = response.get('Items', [])
-        
-        # Calculate usage count for each tag (Slow Scan for MVP)
-        # In prod, increment a counter on the tag item when assigning
-        files = files_table.scan().get('Items', [])
-        
         for tag in tags:
-            count = 0
-            for f in files:
-                if tag['name'] in f.get('tags', []):
-                    count += 1
-            tag['count'] = count
-            
+            tag['count'] = tag.pop('file_count', 0)
         return tags
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/")
-def create_tag(tag: TagCreate, user: dict = Depends(require_admin)):
+async def create_tag(tag: TagCreate, user: dict = Depends(require_admin)):
     try:
-        table.put_item(
+        # Files may still carry the name from before a delete: start the counter from the tag index
+        file_count = await aws.run(file_catalog.count_tagged_files, tag.name)
+        await aws.run(
+            table.put_item,
             Item={
                 'name': tag.name,
-                'color': tag.color
+                'color': tag.color,
+                'file_count': file_count
             }
         )
         return {"status": "success", "tag": tag.dict()}
@@ -49,9 +44,10 @@ def create_tag(tag: TagCreate, user: dict = Depends(require_admin)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/{name}")
-def delete_tag(name: str, user: dict = Depends(require_admin)):
+async def delete_tag(name: str, user: dict = Depends(require_admin)):
     try:
-        table.delete_item(Key={'name': name})
+        # Removes the counter with it; files keep the name and the tag index keeps their entries
+        await aws.run(table.delete_item, Key={'name': name})
         return {"status": "deleted", "name": name}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -61,13 +57,18 @@ class AssignTagRequest(BaseModel):
     tags: list[str]
 
 @router.post("/assign")
-def assign_tags(req: AssignTagRequest, user: dict = Depends(require_contributor)):
+async def assign_tags(req: AssignTagRequest, user: dict = Depends(require_contributor)):
     try:
-        files_table.update_item(
+        response = await aws.run(
+            files_table.update_item,
             Key={'file_id': req.file_id},
             UpdateExpression="set tags = :t",
-            ExpressionAttributeValues={':t': req.tags}
+            ExpressionAttributeValues={':t': req.tags},
+            ReturnValues='UPDATED_OLD'
         )
+        # Keep the tag -> file index (used by GET /files?tag=) in step
+        previous = response.get('Attributes', {}).get('tags', [])
+        await aws.run(file_catalog.set_file_tags, req.file_id, req.tags, previous=previous)
         return {"status": "success", "tags": req.tags}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Dict, List
+from backend.config import settings
+from backend.services.aws_clients import aws
+from backend.services.stats import online_users
+from backend.services.activity_store import with_keys
+
+
+class ActivityLogger:
+    """
+    Buffers activity events in a bounded in-memory queue and writes them to DynamoDB in the background
+    with batch_writer, flushing every `batch_size` events or `flush_seconds`, whichever comes first.
+
+    Logging a request is a put_nowait (microseconds). If DynamoDB falls behind and the queue fills up,
+    new events are dropped and counted rather than slowing requests down.
+    """
+
+    def __init__(self, table_name: str, max_queue: int = 10000, batch_size: int = 100, flush_seconds: float = 2.0):
+        self.table_name = table_name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue = None
+        self.task = None
+        self.stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        if self.task is None:
+            self.queue = self.queue or asyncio.Queue(maxsize=self.max_queue)
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def log(self, item: Dict):
+        """Enqueues an event without waiting. Must be called from the event loop."""
+        self.start()
+        try:
+            self.queue.put_nowait(item)
+            self.enqueued += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _run(self):
+        while not self.stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict]):
+        try:
+            await aws.run(self._write, batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Failed to log activity ({len(batch)} events): {e}")
+        try:
+            # Feeds the dashboard's online-user window (throttled per user, see services/stats.py)
+            await aws.run(online_users.record, [item.get('user') for item in batch])
+        except Exception as e:
+            print(f"Failed to record online users: {e}")
+
+    def _write(self, batch: List[Dict]):
+        # batch_writer groups puts into BatchWriteItem calls (25 per call) and retries unprocessed items
+        with aws.table(self.table_name).batch_writer() as writer:
+            for item in batch:
+                writer.put_item(Item=with_keys(item))
+
+    async def stop(self):
+        """Stops the background writer and flushes whatever is still queued (app shutdown)."""
+        if self.task is not None:
+            # No cancel(): the writer finishes its current batch and exits within flush_seconds
+            self.stopping = True
+            await self.task
+            self.task = None
+            self.stopping = False
+        if self.queue is not None:
+            remaining = []
+            while not self.queue.empty():
+                remaining.append(self.queue.get_nowait())
+            for i in range(0, len(remaining), self.batch_size):
+                await self._flush(remaining[i:i + self.batch_size])
+
+    def stats(self) -> Dict:
+        return {
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue": self.max_queue
+        }
+
+
+activity_logger = ActivityLogger(
+    settings.ACTIVITY_TABLE,
+    max_queue=settings.ACTIVITY_LOG_MAX_QUEUE,
+    batch_size=settings.ACTIVITY_LOG_BATCH_SIZE,
+    flush_seconds=settings.ACTIVITY_LOG_FLUSH_SECONDS
+)
@@ -0,0 +1,120 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from boto3.dynamodb.conditions import Key
+from backend.config import settings
+from backend.services.aws_clients import aws
+
+# Activity events partitioned by hour (see backend/create_activity_table.py):
+#   bucket (HASH) = "2024-05-01T13"   sk (RANGE) = "<ISO timestamp>Z#<event_id>"
+# so "latest N", "last 15 minutes" and date ranges read only the hours they cover, newest first.
+BUCKET_FORMAT = "%Y-%m-%dT%H"
+
+table = aws.table(settings.ACTIVITY_TABLE)
+
+# Hour queries for latest() (not the shared AWS pool: latest() already runs on it)
+latest_executor = ThreadPoolExecutor(max_workers=settings.ACTIVITY_LATEST_PARALLEL_QUERIES, thread_name_prefix="activity-latest")
+
+
+def _utc(ts: datetime.datetime) -> datetime.datetime:
+    # Naive datetimes are UTC throughout this codebase (utcnow)
+    return ts.astimezone(datetime.timezone.utc).replace(tzinfo=None) if ts.tzinfo else ts
+
+
+def normalize_timestamp(timestamp: str) -> str:
+    """ISO timestamp in UTC with the Z suffix (older events were logged without it)."""
+    return timestamp if timestamp.endswith('Z') else timestamp + 'Z'
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    return _utc(datetime.datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+
+def with_keys(item: Dict) -> Dict:
+    """The event plus its table keys (bucket, sk)."""
+    timestamp = normalize_timestamp(item['timestamp'])
+    return {**item, 'timestamp': timestamp, 'bucket': timestamp[:13], 'sk': f"{timestamp}#{item['event_id']}"}
+
+
+def _strip_keys(item: Dict) -> Dict:
+    item.pop('bucket', None)
+    item.pop('sk', None)
+    return item
+
+
+def _query_bucket(bucket: str, lower: Optional[str], upper: str, limit: Optional[int] = None) -> Iterator[Dict]:
+    """Events in one hour with sort keys between `lower` (None: unbounded) and `upper`, newest first."""
+    sort_key = Key('sk').between(lower, upper) if lower else Key('sk').lte(upper)
+    kwargs = {
+        'KeyConditionExpression': Key('bucket').eq(bucket) & sort_key,
+        'ScanIndexForward': False
+    }
+    if limit:
+        kwargs['Limit'] = limit
+    returned = 0
+    while True:
+        response = table.query(**kwargs)
+        for item in response.get('Items', []):
+            yield _strip_keys(item)
+            returned += 1
+        if 'LastEvaluatedKey' not in response or (limit and returned >= limit):
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def query_range(start: datetime.datetime, end: Optional[datetime.datetime] = None) -> Iterator[Dict]:
+    """
+    Events with start <= timestamp <= end (default: now), newest first. A generator: pages are
+    fetched hour by hour as the caller consumes them, so memory stays flat for any range.
+    """
+    start = _utc(start)
+    end = _utc(end) if end else datetime.datetime.utcnow()
+    lower = start.isoformat()
+    upper = end.isoformat() + 'Z~'  # '~' sorts after the '#<event_id>' suffix
+    hour = end.replace(minute=0, second=0, microsecond=0)
+    first_hour = start.replace(minute=0, second=0, microsecond=0)
+    while hour >= first_hour:
+        yield from _query_bucket(hour.strftime(BUCKET_FORMAT), lower, upper)
+        hour -= datetime.timedelta(hours=1)
+
+
+def latest(limit: int = 100, lookback_hours: Optional[int] = None) -> List[Dict]:
+    """
+    The `limit` most recent events, looking back at most `lookback_hours` (one Query per hour).
+    Hours are queried in parallel batches that double in size (1, 2, 4, ... up to
+    ACTIVITY_LATEST_PARALLEL_QUERIES): a busy hour costs one Query, a quiet week a few round trips.
+    """
+    lookback_hours = lookback_hours or settings.ACTIVITY_LATEST_LOOKBACK_HOURS
+    now = datetime.datetime.utcnow()
+    newest_hour = now.replace(minute=0, second=0, microsecond=0)
+    upper = now.isoformat() + 'Z~'
+    events = []
+    offset, batch = 0, 1
+    while offset < lookback_hours and len(events) < limit:
+        hours = range(offset, min(offset + batch, lookback_hours))
+        remaining = limit - len(events)
+        buckets = [(newest_hour - datetime.timedelta(hours=h)).strftime(BUCKET_FORMAT) for h in hours]
+        # Results come back in bucket order (newest first), whichever Query finishes first
+        for items in latest_executor.map(lambda b: list(_query_bucket(b, None, upper, limit=remaining)), buckets):
+            events.extend(items)
+        offset += len(hours)
+        batch = min(batch * 2, settings.ACTIVITY_LATEST_PARALLEL_QUERIES)
+    return events[:limit]
+
+
+def since(minutes: float) -> Iterator[Dict]:
+    """Events from the last `minutes` minutes, newest first."""
+    return query_range(datetime.datetime.utcnow() - datetime.timedelta(minutes=minutes))
+
+
+def scan_all() -> Iterator[Dict]:
+    """Every event, page by page (unordered). For exports without a date range."""
+    kwargs = {}
+    while True:
+        response = table.scan(**kwargs)
+        for item in response.get('Items', []):
+            yield _strip_keys(item)
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import boto3
+from botocore.config import Config
+from backend.config import settings
+
+
+class AWSClientManager:
+    """
+    One boto3 session, and one client/resource per service, per process.
+
+    Clients share a connection pool sized by AWS_MAX_POOL_CONNECTIONS instead of each request
+    building new clients (and new TLS connections). Async endpoints call `run`, which offloads the
+    blocking boto3 call to a thread pool of the same size, so the event loop never blocks and
+    concurrency is bounded by the available connections, not by FastAPI's default threadpool.
+    """
+
+    def __init__(self, region: str, max_pool_connections: int = 50, endpoint_url: str = ""):
+        self.region = region
+        self.endpoint_url = endpoint_url or None  # e.g. a local stand-in for benchmarks
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            retries={"max_attempts": 3, "mode": "standard"}
+        )
+        self.session = boto3.session.Session(region_name=region)
+        self.executor = ThreadPoolExecutor(max_workers=max_pool_connections, thread_name_prefix="aws")
+        self._clients = {}
+        self._resources = {}
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def client(self, service: str):
+        with self._lock:
+            if service not in self._clients:
+                self._clients[service] = self.session.client(service, config=self.config, endpoint_url=self.endpoint_url)
+            return self._clients[service]
+
+    def resource(self, service: str):
+        with self._lock:
+            if service not in self._resources:
+                self._resources[service] = self.session.resource(service, config=self.config, endpoint_url=self.endpoint_url)
+            return self._resources[service]
+
+    def table(self, name: str):
+        resource = self.resource('dynamodb')
+        with self._lock:
+            if name not in self._tables:
+                self._tables[name] = resource.Table(name)
+            return self._tables[name]
+
+    async def run(self, fn, *args, **kwargs):
+        """Awaits a blocking (boto3) call on the AWS thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+
+aws = AWSClientManager(
+    settings.AWS_REGION,
+    max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+    endpoint_url=settings.AWS_ENDPOINT_URL
+)
@@ -0,0 +1,236 @@
+import json
+import mmap
+import os
+import pickle
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# File layout (little-endian), sections 8-byte aligned:
+#   header      magic, format version, reserved, chunk count, text byte length
+#   ids         int64[count]      sorted ascending
+#   offsets     int64[count + 1]  byte offsets of each chunk's text
+#   source_ids  uint32[count]     index into the source table (v2+, padded to 8 bytes)
+#   text        UTF-8 bytes, all chunks concatenated
+#   sources     JSON list: v2 = table of distinct sources, v1 = one source per chunk (until EOF)
+MAGIC = b"RNDCHUNK"
+FORMAT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct("<8sIIQQ")
+
+
+def _pad8(n: int) -> int:
+    return n + (-n % 8)
+
+
+class ChunkStore:
+    """
+    Compact chunk id -> (text, source) store backed by a memory-mapped file.
+
+    Texts are one contiguous UTF-8 buffer addressed by offsets, and each chunk's source is an
+    interned uint32 id, so there is no per-chunk Python object until a chunk is actually read.
+    `text_view` returns a zero-copy memoryview; `get` builds the {"text", "source"} dict
+    that older callers expect.
+
+    Chunks added after the file was written live in a small in-memory overlay, and deleted
+    file chunks are masked; `write` folds both into a new file (done at compaction).
+    """
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.source_ids = np.zeros(0, dtype=np.uint32)
+        self.text = memoryview(b"")
+        self.source_table: List[str] = []
+        self.source_lookup: Dict[str, int] = {}
+        self.removed = set()
+        self.overlay: Dict[int, Tuple[str, int]] = {}
+        self._mmap = None
+
+    # --- Loading ---
+
+    @classmethod
+    def open(cls, path: str) -> "ChunkStore":
+        store = cls()
+        if os.path.getsize(path) == 0:
+            return store
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, text_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a chunk store file")
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported chunk store format version {version}")
+
+        pos = HEADER.size
+        store.ids = np.frombuffer(mm, dtype=np.int64, count=count, offset=pos)
+        pos += 8 * count
+        store.offsets = np.frombuffer(mm, dtype=np.int64, count=count + 1, offset=pos)
+        pos += 8 * (count + 1)
+        if version >= 2:
+            store.source_ids = np.frombuffer(mm, dtype=np.uint32, count=count, offset=pos)
+            pos += _pad8(4 * count)
+        store.text = memoryview(mm)[pos:pos + text_len]
+        pos += text_len
+        sources = json.loads(mm[pos:].decode("utf-8"))
+
+        if version >= 2:
+            store.source_table = sources
+        else:
+            # v1 stored one source string per chunk: intern on load
+            store.source_ids = np.array([store._intern(s) for s in sources], dtype=np.uint32)
+        store.source_lookup = {s: i for i, s in enumerate(store.source_table)}
+        store._mmap = mm
+        return store
+
+    @classmethod
+    def convert_pickle(cls, pickle_path: str, path: str) -> "ChunkStore":
+        """One-time conversion of the legacy metadata.pkl dict."""
+        with open(pickle_path, "rb") as f:
+            metadata = pickle.load(f)
+        store = cls()
+        for chunk_id, meta in metadata.items():
+            source = meta.get("source")
+            if isinstance(source, dict):
+                # Some early uploads stored {"filename": ...}: keep the file key, like every other chunk
+                source = source.get("filename")
+            store[int(chunk_id)] = {"text": meta.get("text", ""), "source": source}
+        store.write(path)
+        return cls.open(path)
+
+    def _intern(self, source: Optional[str]) -> int:
+        sid = self.source_lookup.get(source)
+        if sid is None:
+            sid = len(self.source_table)
+            self.source_table.append(source)
+            self.source_lookup[source] = sid
+        return sid
+
+    # --- Accessors ---
+
+    def _base_position(self, chunk_id) -> Optional[int]:
+        i = int(np.searchsorted(self.ids, chunk_id))
+        if i < len(self.ids) and self.ids[i] == chunk_id and int(chunk_id) not in self.removed:
+            return i
+        return None
+
+    def text_view(self, chunk_id) -> Optional[memoryview]:
+        """Zero-copy view of a chunk's UTF-8 text (None if absent)."""
+        entry = self.overlay.get(chunk_id)
+        if entry is not None:
+            return memoryview(entry[0].encode("utf-8"))
+        i = self._base_position(chunk_id)
+        if i is None:
+            return None
+        return self.text[int(self.offsets[i]):int(self.offsets[i + 1])]
+
+    def source_of(self, chunk_id) -> Optional[str]:
+        entry = self.overlay.get(chunk_id)
+        if entry is not None:
+            return self.source_table[entry[1]]
+        i = self._base_position(chunk_id)
+        return self.source_table[self.source_ids[i]] if i is not None else None
+
+    def _base_entry(self, i: int) -> dict:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return {"text": str(self.text[start:end], "utf-8"), "source": self.source_table[self.source_ids[i]]}
+
+    def ids_by_source(self) -> Dict[str, List[int]]:
+        """Source -> chunk ids, grouped with NumPy instead of decoding every chunk."""
+        grouped: Dict[str, List[int]] = {}
+        if len(self.ids):
+            order = np.argsort(self.source_ids, kind="stable")
+            sorted_sids = self.source_ids[order]
+            bounds = np.flatnonzero(np.diff(sorted_sids)) + 1
+            for group in np.split(order, bounds):
+                ids = [i for i in self.ids[group].tolist() if i not in self.removed]
+                if ids:
+                    grouped.setdefault(self.source_table[self.source_ids[group[0]]], []).extend(ids)
+        for chunk_id, (_, sid) in self.overlay.items():
+            grouped.setdefault(self.source_table[sid], []).append(chunk_id)
+        return grouped
+
+    # --- Mapping interface ---
+
+    def get(self, chunk_id, default=None):
+        entry = self.overlay.get(chunk_id)
+        if entry is not None:
+            return {"text": entry[0], "source": self.source_table[entry[1]]}
+        i = self._base_position(chunk_id)
+        return self._base_entry(i) if i is not None else default
+
+    def __getitem__(self, chunk_id) -> dict:
+        entry = self.get(chunk_id)
+        if entry is None:
+            raise KeyError(chunk_id)
+        return entry
+
+    def __contains__(self, chunk_id) -> bool:
+        return chunk_id in self.overlay or self._base_position(chunk_id) is not None
+
+    def __setitem__(self, chunk_id, entry: dict):
+        self.overlay[int(chunk_id)] = (entry.get("text", ""), self._intern(entry.get("source")))
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self.removed) + len(self.overlay)
+
+    def pop(self, chunk_id, default=None):
+        if chunk_id in self.overlay:
+            text, sid = self.overlay.pop(chunk_id)
+            return {"text": text, "source": self.source_table[sid]}
+        i = self._base_position(chunk_id)
+        if i is None:
+            return default
+        self.removed.add(int(chunk_id))
+        return self._base_entry(i)
+
+    def items(self) -> Iterator[Tuple[int, dict]]:
+        for i, chunk_id in enumerate(self.ids.tolist()):
+            if chunk_id not in self.removed:
+                yield chunk_id, self._base_entry(i)
+        for chunk_id, (text, sid) in list(self.overlay.items()):
+            yield chunk_id, {"text": text, "source": self.source_table[sid]}
+
+    def keys(self) -> Iterator[int]:
+        for chunk_id in self.ids.tolist():
+            if chunk_id not in self.removed:
+                yield chunk_id
+        yield from list(self.overlay.keys())
+
+    # --- Writing ---
+
+    def write(self, path: str):
+        """Writes all live chunks to `path` (format v2) atomically; readers mapping the old file are unaffected."""
+        # Live base chunks are copied as raw byte ranges (no decode/re-encode)
+        live = [i for i, chunk_id in enumerate(self.ids.tolist()) if chunk_id not in self.removed]
+        entries = [(int(self.ids[i]), bytes(self.text[int(self.offsets[i]):int(self.offsets[i + 1])]), self.source_table[self.source_ids[i]]) for i in live]
+        entries += [(chunk_id, text.encode("utf-8"), self.source_table[sid]) for chunk_id, (text, sid) in self.overlay.items()]
+        entries.sort(key=lambda e: e[0])
+
+        # Re-intern so the table only holds sources that still have chunks
+        table, lookup = [], {}
+        source_ids = np.zeros(len(entries), dtype=np.uint32)
+        for n, (_, _, source) in enumerate(entries):
+            if source not in lookup:
+                lookup[source] = len(table)
+                table.append(source)
+            source_ids[n] = lookup[source]
+
+        offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+        if entries:
+            offsets[1:] = np.cumsum([len(e[1]) for e in entries])
+        text = b"".join(e[1] for e in entries)
+        text += b"\0" * (-len(text) % 8)
+        source_bytes = source_ids.tobytes()
+        source_bytes += b"\0" * (-len(source_bytes) % 8)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(entries), len(text)))
+            f.write(np.array([e[0] for e in entries], dtype=np.int64).tobytes())
+            f.write(offsets.tobytes())
+            f.write(source_bytes)
+            f.write(text)
+            f.write(json.dumps(table).encode("utf-8"))
+        os.replace(tmp_path, path)
@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+from backend.config import settings
+
+
+class ContentCache:
+    """
+    Content hash -> extracted text (SQLite on local disk), plus the hash each file key was last indexed with.
+
+    Re-uploading identical bytes (same or different name) skips parsing and OCR; the chunks'
+    embeddings then come from the EmbeddingCache, so no Bedrock calls are made either.
+    A file whose bytes are already indexed under another name is recorded as an alias instead of
+    being indexed twice; if the indexed file is deleted, forget() returns the aliases to re-index.
+    Text is zlib-compressed; size is bounded by `max_entries` with least-recently-used eviction.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS contents ("
+            " hash TEXT PRIMARY KEY, text BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_contents_last_access ON contents(last_access)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS indexed (file_key TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_indexed_hash ON indexed(hash)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS aliases (file_key TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_aliases_hash ON aliases(hash)")
+        self.conn.commit()
+        self.entries = self.conn.execute("SELECT COUNT(*) FROM contents").fetchone()[0]
+
+    def get(self, content_hash: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT text FROM contents WHERE hash = ?", (content_hash,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE contents SET last_access = ? WHERE hash = ?", (time.time(), content_hash))
+            self.conn.commit()
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, content_hash: str, text: str):
+        blob = zlib.compress(text.encode("utf-8"))
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO contents (hash, text, last_access) VALUES (?, ?, ?)",
+                (content_hash, blob, time.time())
+            )
+            self.entries += cur.rowcount
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        overflow = self.entries - self.max_entries
+        if overflow > 0:
+            cur = self.conn.execute(
+                "DELETE FROM contents WHERE hash IN "
+                "(SELECT hash FROM contents ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.entries -= cur.rowcount
+
+    def indexed_hash(self, file_key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT hash FROM indexed WHERE file_key = ?", (file_key,)).fetchone()
+        return row[0] if row else None
+
+    def indexed_files(self, content_hash: str) -> List[str]:
+        """File keys indexed with exactly these bytes."""
+        with self.lock:
+            rows = self.conn.execute("SELECT file_key FROM indexed WHERE hash = ?", (content_hash,)).fetchall()
+        return [r[0] for r in rows]
+
+    def mark_indexed(self, file_key: str, content_hash: str) -> bool:
+        """Records the file as indexed with `content_hash`. Returns True if it was an alias until now."""
+        with self.lock:
+            was_alias = self.conn.execute("DELETE FROM aliases WHERE file_key = ?", (file_key,)).rowcount > 0
+            self.conn.execute("INSERT OR REPLACE INTO indexed (file_key, hash) VALUES (?, ?)", (file_key, content_hash))
+            self.conn.commit()
+        return was_alias
+
+    def mark_alias(self, file_key: str, content_hash: str):
+        """Records the file as a duplicate of bytes indexed under another name (not indexed itself)."""
+        with self.lock:
+            self.conn.execute("DELETE FROM indexed WHERE file_key = ?", (file_key,))
+            self.conn.execute("INSERT OR REPLACE INTO aliases (file_key, hash) VALUES (?, ?)", (file_key, content_hash))
+            self.conn.commit()
+
+    def forget(self, file_key: str) -> List[str]:
+        """
+        Drops a deleted file. If it was the last indexed copy of its bytes, returns the aliases that
+        were relying on it (removed here too): they must be re-indexed to stay searchable.
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM aliases WHERE file_key = ?", (file_key,))
+            row = self.conn.execute("SELECT hash FROM indexed WHERE file_key = ?", (file_key,)).fetchone()
+            orphans = []
+            if row is not None:
+                self.conn.execute("DELETE FROM indexed WHERE file_key = ?", (file_key,))
+                if self.conn.execute("SELECT 1 FROM indexed WHERE hash = ? LIMIT 1", (row[0],)).fetchone() is None:
+                    orphans = [r[0] for r in self.conn.execute("SELECT file_key FROM aliases WHERE hash = ?", (row[0],))]
+                    self.conn.execute("DELETE FROM aliases WHERE hash = ?", (row[0],))
+            self.conn.commit()
+        return orphans
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": self.entries,
+            "max_entries": self.max_entries
+        }
+
+
+content_cache = ContentCache(settings.CONTENT_CACHE_PATH, max_entries=settings.CONTENT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,129 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Hits update last_access and the shared counters in batches, not one write transaction per hit
+FLUSH_EVERY = 256
+FLUSH_INTERVAL_SECONDS = 5.0
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache (SQLite on local disk, WAL).
+
+    Key = sha256(model id + whitespace-normalized text), so re-indexing or
+    re-uploading a lightly edited file only pays Bedrock for chunks that changed.
+    Size is bounded by `max_entries` with (approximately) least-recently-used eviction.
+
+    The API and the ingestion worker share the file, so the entry count and the
+    hit/miss counters live in it too: stats() reports every process's savings.
+    """
+
+    def __init__(self, path: str, model_id: str, max_entries: int = 200_000):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.execute("INSERT OR IGNORE INTO counters VALUES ('entries', (SELECT COUNT(*) FROM embeddings))")
+        self.conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+        self.conn.commit()
+
+        # Not yet written: key -> last access time, and counter deltas
+        self._touched: Dict[str, float] = {}
+        self._hits = 0
+        self._misses = 0
+        self._last_flush = time.monotonic()
+
+    def key_for(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_id}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key_for(text)
+        with self.lock:
+            row = self.conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._touched[key] = time.time()
+            if len(self._touched) >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+                self._flush()
+                self.conn.commit()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def put(self, text: str, vector: List[float]):
+        self.put_many([(text, vector)])
+
+    def put_many(self, items: List[Tuple[str, List[float]]]):
+        """Stores (text, vector) pairs in one transaction."""
+        rows = [(self.key_for(text), np.asarray(vector, dtype=np.float32).tobytes(), time.time()) for text, vector in items]
+        if not rows:
+            return
+        with self.lock:
+            inserted = 0
+            for row in rows:
+                cur = self.conn.execute("INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", row)
+                inserted += cur.rowcount
+            if inserted:
+                self._add_counter('entries', inserted)
+            # Recent hits first, so eviction does not drop entries that were just used
+            self._flush()
+            self._evict()
+            self.conn.commit()
+
+    def _add_counter(self, name: str, delta: int):
+        self.conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (delta, name))
+
+    def _flush(self):
+        """Writes pending last_access times and counter deltas (caller commits)."""
+        if self._touched:
+            self.conn.executemany("UPDATE embeddings SET last_access = ? WHERE key = ?",
+                                  [(t, k) for k, t in self._touched.items()])
+            self._touched = {}
+        if self._hits:
+            self._add_counter('hits', self._hits)
+            self._hits = 0
+        if self._misses:
+            self._add_counter('misses', self._misses)
+            self._misses = 0
+        self._last_flush = time.monotonic()
+
+    def _evict(self):
+        # Runs inside the write transaction, so the shared count cannot change underneath
+        entries = self.conn.execute("SELECT value FROM counters WHERE name = 'entries'").fetchone()[0]
+        overflow = entries - self.max_entries
+        if overflow > 0:
+            cur = self.conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self._add_counter('entries', -cur.rowcount)
+
+    def stats(self) -> Dict:
+        """Counters across every process using this cache file (since the file was created)."""
+        with self.lock:
+            self._flush()
+            self.conn.commit()
+            counters = dict(self.conn.execute("SELECT name, value FROM counters").fetchall())
+        hits, misses = counters['hits'], counters['misses']
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "entries": counters['entries'],
+            "max_entries": self.max_entries
+        }
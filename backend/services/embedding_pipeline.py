@@ -0,0 +1,88 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every in-flight document.
+    When Bedrock throttles, `backoff` pauses ALL callers instead of just the one that got throttled.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: Optional[int] = None):
+        self.rate = max(rate_per_sec, 0.001)
+        self.capacity = burst or max(1, int(self.rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    # Refill
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, seconds: float):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class EmbeddingPipeline:
+    """
+    Runs embedding calls on a bounded worker pool, gated by a shared RateLimiter.
+    `embed_fn` does a single raw call (text -> vector), so a local stub can be plugged in for testing.
+    """
+
+    def __init__(self, embed_fn: Callable[[str], List[float]], max_workers: int = 8,
+                 rate_per_sec: float = 10.0, max_retries: int = 5):
+        self.embed_fn = embed_fn
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate_per_sec)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed")
+
+    def embed_one(self, text: str) -> List[float]:
+        retries = 0
+        while retries < self.max_retries:
+            self.limiter.acquire()
+            try:
+                return self.embed_fn(text)
+            except Exception as e:
+                # Handle Throttling specifically
+                if "ThrottlingException" in str(e):
+                    wait_time = (2 ** retries) # Exponential Backoff: 1, 2, 4, 8, 16 sec
+                    print(f"Bedrock Throttled. Pausing all embedding calls for {wait_time}s...")
+                    self.limiter.backoff(wait_time)
+                    retries += 1
+                else:
+                    # Other errors (e.g. Validation) -> Fail immediately
+                    print(f"Embedding Error: {e}")
+                    raise e
+
+        raise Exception("Max Retries Exceeded for Bedrock Embedding")
+
+    def embed_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embeds texts concurrently. Output is in input order; failed texts are None.
+        """
+        futures = [self.executor.submit(self.embed_one, t) for t in texts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Error embedding chunk: {e}")
+                results.append(None)
+        return results
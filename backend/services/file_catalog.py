@@ -0,0 +1,194 @@
+import base64
+import json
+from typing import Dict, List, Optional
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from backend.config import settings
+from backend.services.aws_clients import aws
+
+# Secondary indexes on rnd-hub-metadata (created by scripts/create_file_indexes.py).
+# Every file item carries `list_pk` (a constant) and `filename_lower`, so listing is a Query
+# ordered by filename instead of a Scan over the whole catalog.
+LIST_PARTITION = "file"
+FILENAME_INDEX = "filename-index"            # list_pk (HASH) + filename_lower (RANGE)
+STATUS_INDEX = "status-filename-index"       # status (HASH) + filename_lower (RANGE)
+
+# Tag -> file index (one item per file per tag), so "files with tag X" is a Query as well
+FILE_TAGS_TABLE = "rnd-hub-file-tags"        # tag (HASH) + file_id (RANGE)
+TAG_FILENAME_INDEX = "tag-filename-index"    # LSI: tag (HASH) + filename_lower (RANGE)
+
+# Tag definitions; each item also carries `file_count`, maintained with atomic ADDs
+TAGS_TABLE = "rnd-hub-tags"
+
+LISTABLE_FIELDS = {
+    'file_id', 'filename', 'content_type', 'size', 'status', 'uploaded_by',
+    'timestamp', 'tags', 'content_hash', 'duplicate_of', 'error_message'
+}
+MAX_PAGE_SIZE = 200
+
+table = aws.table(settings.DYNAMODB_TABLE)
+tags_index = aws.table(FILE_TAGS_TABLE)
+tags_table = aws.table(TAGS_TABLE)
+
+
+class InvalidListRequest(ValueError):
+    """Bad cursor or field name (the API turns this into a 400)."""
+
+
+def index_attributes(filename: str) -> Dict:
+    """Key attributes for the listing indexes; include them whenever a file item is written."""
+    return {'list_pk': LIST_PARTITION, 'filename_lower': filename.lower()}
+
+
+def encode_cursor(last_key: Optional[Dict]) -> Optional[str]:
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, default=str).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict]:
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise InvalidListRequest("Invalid cursor")
+
+
+def _projection(fields: Optional[List[str]]) -> Dict:
+    if not fields:
+        return {}
+    unknown = set(fields) - LISTABLE_FIELDS
+    if unknown:
+        raise InvalidListRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+    # file_id is always returned: the UI keys rows on it
+    names = {f'#p{i}': name for i, name in enumerate(dict.fromkeys(['file_id'] + list(fields)))}
+    return {'ProjectionExpression': ", ".join(names), 'ExpressionAttributeNames': names}
+
+
+def _batch_get(file_ids: List[str], projection: Dict) -> Dict[str, Dict]:
+    """Files by id (BatchGetItem, retrying unprocessed keys)."""
+    found = {}
+    dynamodb = aws.resource('dynamodb')
+    for i in range(0, len(file_ids), 100):
+        request = {table.name: {'Keys': [{'file_id': f} for f in file_ids[i:i + 100]], **projection}}
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(table.name, []):
+                found[item['file_id']] = item
+            request = response.get('UnprocessedKeys') or None
+    return found
+
+
+def list_files(limit: int = 50, cursor: Optional[str] = None, prefix: str = "",
+               status: Optional[str] = None, tag: Optional[str] = None,
+               fields: Optional[List[str]] = None) -> Dict:
+    """
+    One page of files ordered by filename (case-insensitive), optionally filtered by filename prefix,
+    status and tag. Reads only the page: pass the returned `next_cursor` back to continue.
+
+    With both `tag` and `status`, the status is checked after the tag lookup, so a page can hold
+    fewer than `limit` items while `next_cursor` is still set (like a DynamoDB FilterExpression).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    projection = _projection(fields)
+    query = {'Limit': limit}
+    start_key = decode_cursor(cursor)
+    if start_key:
+        query['ExclusiveStartKey'] = start_key
+
+    def key_condition(partition):
+        if prefix:
+            return partition & Key('filename_lower').begins_with(prefix.lower())
+        return partition
+
+    # 1. Tag: page through the tag index, then fetch those files
+    if tag:
+        response = tags_index.query(
+            IndexName=TAG_FILENAME_INDEX,
+            KeyConditionExpression=key_condition(Key('tag').eq(tag)),
+            ProjectionExpression='file_id',
+            **query
+        )
+        file_ids = [i['file_id'] for i in response.get('Items', [])]
+        if status and projection:
+            # Need the status to filter on, even if the caller did not ask for it
+            projection = _projection(list(fields) + ['status'])
+        found = _batch_get(file_ids, projection)
+        items = [found[f] for f in file_ids if f in found]
+        if status:
+            items = [i for i in items if i.get('status') == status]
+            if fields and 'status' not in fields:
+                for item in items:
+                    item.pop('status', None)
+
+    # 2. Status: query the status index
+    elif status:
+        response = table.query(
+            IndexName=STATUS_INDEX,
+            KeyConditionExpression=key_condition(Key('status').eq(status)),
+            **query, **projection
+        )
+        items = response.get('Items', [])
+
+    # 3. Everything (or a filename prefix): query the filename index
+    else:
+        response = table.query(
+            IndexName=FILENAME_INDEX,
+            KeyConditionExpression=key_condition(Key('list_pk').eq(LIST_PARTITION)),
+            **query, **projection
+        )
+        items = response.get('Items', [])
+
+    for item in items:
+        item.pop('list_pk', None)
+        item.pop('filename_lower', None)
+    return {"items": items, "next_cursor": encode_cursor(response.get('LastEvaluatedKey'))}
+
+
+def set_file_tags(file_id: str, tags: List[str], previous: Optional[List[str]] = None, update_counts: bool = True):
+    """
+    Brings the tag index and the tags' file counts in line with a file's tag list.
+    `previous` must be the tags the file had before the write (e.g. from ReturnValues), so the
+    counters only move for tags that were actually added or removed.
+    """
+    previous = set(previous or [])
+    current = set(tags)
+    with tags_index.batch_writer() as writer:
+        for tag in previous - current:
+            writer.delete_item(Key={'tag': tag, 'file_id': file_id})
+        for tag in current - previous:
+            writer.put_item(Item={'tag': tag, 'file_id': file_id, 'filename_lower': file_id.lower()})
+    if update_counts:
+        for tag in previous - current:
+            adjust_tag_count(tag, -1)
+        for tag in current - previous:
+            adjust_tag_count(tag, 1)
+
+
+def adjust_tag_count(tag: str, delta: int):
+    """Atomic ADD on the tag's file_count. Tags without a definition (deleted tags) are skipped."""
+    try:
+        tags_table.update_item(
+            Key={'name': tag},
+            UpdateExpression="add file_count :d",
+            ConditionExpression="attribute_exists(#n)",
+            ExpressionAttributeNames={'#n': 'name'},
+            ExpressionAttributeValues={':d': delta}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def count_tagged_files(tag: str) -> int:
+    """Files carrying `tag`, counted from the tag index (reads only that tag's partition)."""
+    total = 0
+    kwargs = {'KeyConditionExpression': Key('tag').eq(tag), 'Select': 'COUNT'}
+    while True:
+        response = tags_index.query(**kwargs)
+        total += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return total
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
@@ -1,95 +1,149 @@
-import boto3
+import contextlib
+import hashlib
 import pypdf
-import io
 import os
+import tempfile
+import time
+from typing import Optional
 from docx import Document
 from pptx import Presentation
 from backend.config import settings
-import pytesseract
-from pdf2image import convert_from_bytes
+from backend.services.aws_clients import aws
+from backend.services.ocr_engine import ocr_engine
 
-s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
+s3_client = aws.client('s3')
 
 # NOTE: Textract Client removed in favor of Tesseract (Local OCR)
 
+# Extensions extract_text_from_s3 can handle
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.doc', '.pptx', '.ppt', '.txt', '.md', '.jpg', '.jpeg', '.png'}
+STREAM_CHUNK_SIZE = 1024 * 1024
+
 def extract_text_from_s3(file_key: str) -> str:
     """
     Downloads a file from S3 and extracts its text based on extension.
     Supports: .pdf (with Tesseract fallback), .docx, .pptx, .txt
     """
+    if os.path.splitext(file_key)[1].lower() not in SUPPORTED_EXTENSIONS:
+        return extract_text(file_key, None)
+    with download_from_s3(file_key) as (file_stream, _):
+        return extract_text(file_key, file_stream)
+
+@contextlib.contextmanager
+def download_from_s3(file_key: str):
+    """
+    Yields (file stream, "sha256:<digest>") for the object. The body is streamed once: small files stay
+    in memory, large ones spill to disk (bounded RSS), and the digest is computed on the way.
+    """
+    response = s3_client.get_object(Bucket=settings.S3_BUCKET_NAME, Key=file_key)
+    digest = hashlib.sha256()
+    with tempfile.SpooledTemporaryFile(max_size=settings.EXTRACTION_SPOOL_MAX_BYTES) as file_stream:
+        for chunk in response['Body'].iter_chunks(chunk_size=STREAM_CHUNK_SIZE):
+            digest.update(chunk)
+            file_stream.write(chunk)
+        file_stream.seek(0)
+        yield file_stream, f"sha256:{digest.hexdigest()}"
+
+def extract_text(file_key: str, file_stream) -> str:
+    """Text of a downloaded file (see download_from_s3), by the key's extension."""
     try:
         ext = os.path.splitext(file_key)[1].lower()
         print(f"Extraction started for {file_key} ({ext})")
         
-        response = s3_client.get_object(Bucket=settings.S3_BUCKET_NAME, Key=file_key)
-        file_content = response['Body'].read()
-        file_stream = io.BytesIO(file_content)
-        
+        if ext not in SUPPORTED_EXTENSIONS:
+            print(f"Unsupported file type for extraction: {ext}")
+            return ""
+
         if ext == '.pdf':
             print(f"PDF detected: {file_key}. Attempting pypdf first...")
-            return _extract_from_pdf(file_stream, file_content)
+            return _extract_from_pdf(file_stream)
         elif ext in ['.docx', '.doc']:
             return _extract_from_docx(file_stream)
         elif ext in ['.pptx', '.ppt']:
             return _extract_from_pptx(file_stream)
         elif ext in ['.txt', '.md']:
-            return file_content.decode('utf-8', errors='ignore')
-        elif ext in ['.jpg', '.jpeg', '.png']:
-            print("Image file detected. Using Tesseract for OCR.")
-            return _extract_with_tesseract(file_content)
+            return file_stream.read().decode('utf-8', errors='ignore')
         else:
-            print(f"Unsupported file type for extraction: {ext}")
-            return ""
+            print("Image file detected. Using Tesseract for OCR.")
+            return _extract_with_tesseract(file_stream, is_image=True)
             
     except Exception as e:
         print(f"Error extracting text from {file_key}: {e}")
         raise e
 
-def _extract_from_pdf(file_stream, file_bytes) -> str:
+def etag_content_hash(file_key: str) -> Optional[str]:
+    """
+    "md5:<etag>" when the object's ETag is the MD5 of its bytes (single-part upload; free, no download).
+    None for multipart and KMS-encrypted ETags, which are not: hash the download instead (download_from_s3).
+    """
+    head = s3_client.head_object(Bucket=settings.S3_BUCKET_NAME, Key=file_key)
+    etag = head['ETag'].strip('"')
+    if '-' not in etag and head.get('ServerSideEncryption') != 'aws:kms' and not head.get('SSECustomerAlgorithm'):
+        return f"md5:{etag}"
+    return None
+
+# A page keeps its pypdf text if it has at least this many characters, mostly alphanumeric
+PAGE_MIN_CHARS = 100
+PAGE_MIN_DENSITY = 0.5
+
+def _has_text_layer(text: str) -> bool:
+    text = text.strip()
+    if len(text) < PAGE_MIN_CHARS:
+        return False
+    # Density (Garbage/Symbols?)
+    alphanumeric_count = sum(c.isalnum() for c in text)
+    return alphanumeric_count / len(text) >= PAGE_MIN_DENSITY
+
+def _extract_from_pdf(file_stream) -> str:
     """
-    Hybrid extraction: pypdf first, Tesseract fallback if empty.
+    Hybrid extraction, decided per page: pypdf text is kept for pages with a usable text layer,
+    and only the remaining (scanned) pages are OCRed with Tesseract.
     """
-    text = ""
+    page_texts = []
+    page_times = []
     try:
         reader = pypdf.PdfReader(file_stream)
         for page in reader.pages:
-            extract = page.extract_text()
-            if extract:
-                text += extract + "\n"
+            started = time.time()
+            page_texts.append(page.extract_text() or "")
+            page_times.append(time.time() - started)
     except Exception as e:
         print(f"pypdf failed: {e}")
-    
-    # Check if scanned (empty or very short text)
-    print(f"pypdf extracted {len(text)} chars. Preview: {text[:200]!r}")
+        print("Falling back to Tesseract for the whole document...")
+        return _extract_with_tesseract(file_stream)
 
-    # Check 1: Length (Too short?)
-    # Increased to 500 because "Naac_appLetter.pdf" had ~250 chars of metadata/header text.
-    if not text or len(text.strip()) < 500:
-        print(f"PDF text length ({len(text.strip())}) < 500. Marking as scanned. Falling back to Tesseract...")
-        return _extract_with_tesseract(file_bytes)
+    # A scan with a thin header/metadata layer ("Naac_appLetter.pdf": ~250 chars) fails the check page by page
+    scanned = [i + 1 for i, text in enumerate(page_texts) if not _has_text_layer(text)]
 
-    # Check 2: Density (Garbage/Symbols?)
-    alphanumeric_count = sum(c.isalnum() for c in text)
-    density = alphanumeric_count / len(text) if len(text) > 0 else 0
-    
-    if density < 0.5:
-        print(f"PDF text density ({density:.2f}) < 0.5. likely garbage OCR or symbols. Falling back to Tesseract...")
-        return _extract_with_tesseract(file_bytes)
-        
-    return text
+    methods = ["text layer"] * len(page_texts)
+    if scanned:
+        print(f"OCR needed for {len(scanned)}/{len(page_texts)} pages: {scanned}")
+        try:
+            for page_number, text, seconds in ocr_engine.ocr_pdf_pages(file_stream, scanned):
+                page_texts[page_number - 1] = text
+                page_times[page_number - 1] += seconds
+                methods[page_number - 1] = "ocr"
+        except Exception as e:
+            print(f"Tesseract failed: {e}. Keeping pypdf text for those pages.")
 
-def _extract_with_tesseract(file_bytes) -> str:
+    ocr_time = sum(t for m, t in zip(methods, page_times) if m == "ocr")
+    print(f"PDF extraction: {methods.count('text layer')} pages from text layer, "
+          f"{methods.count('ocr')} pages OCRed ({ocr_time:.2f}s OCR, {sum(page_times):.2f}s total)")
+
+    return "".join(text + "\n" for text in page_texts if text)
+
+def _extract_with_tesseract(file_stream, is_image: bool = False) -> str:
     """
-    Uses Tesseract (Local OCR) to detect text in a document using raw bytes.
+    Uses Tesseract (Local OCR) to detect text in a document (file object).
+    Pages are rasterized and OCRed in parallel by the OCR engine's process pool.
     Requires: 'tesseract' installed on system, 'poppler' installed on system.
     """
     try:
         print("Starting Tesseract OCR...")
-        images = convert_from_bytes(file_bytes)
-        text = ""
-        for i, image in enumerate(images):
-            print(f"OCR Processing Page {i+1}...")
-            text += pytesseract.image_to_string(image) + "\n"
+        if is_image:
+            text = ocr_engine.ocr_image(file_stream)
+        else:
+            text = ocr_engine.ocr_pdf(file_stream)
         
         print(f"Tesseract successfully extracted {len(text)} chars.")
         return text
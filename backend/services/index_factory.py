@@ -0,0 +1,175 @@
+import faiss
+import numpy as np
+
+# Supported FAISS index types (all use L2 on unit-normalized vectors)
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# FAISS wants ~39 training points per centroid (IVF lists, and the 256 codes of each PQ sub-quantizer)
+MIN_POINTS_PER_LIST = 39
+PQ_MIN_TRAINING_POINTS = 256 * MIN_POINTS_PER_LIST
+
+# Memory-map flat codes (IFC) or IVF inverted lists instead of copying them into RAM.
+# FAISS cannot combine the two, so they are tried in order. Mapped indexes are read-only.
+MMAP_FLAG_OPTIONS = [
+    getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY,
+    faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY,
+]
+
+
+def create_index(index_type: str, dimension: int, nlist: int = 1024, pq_m: int = 64, hnsw_m: int = 32) -> faiss.Index:
+    """Creates an empty (possibly untrained) index of the requested type."""
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dimension)
+    if index_type == "ivf_flat":
+        quantizer = faiss.IndexFlatL2(dimension)
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
+    if index_type == "ivf_pq":
+        if dimension % pq_m != 0:
+            raise ValueError(f"PQ sub-quantizers ({pq_m}) must divide the dimension ({dimension})")
+        quantizer = faiss.IndexFlatL2(dimension)
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, 8)
+    if index_type == "hnsw":
+        return faiss.IndexHNSWFlat(dimension, hnsw_m)
+    raise ValueError(f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES}")
+
+
+def min_training_points(index_type: str, nlist: int) -> int:
+    if index_type == "ivf_flat":
+        return nlist * MIN_POINTS_PER_LIST
+    if index_type == "ivf_pq":
+        return max(nlist * MIN_POINTS_PER_LIST, PQ_MIN_TRAINING_POINTS)
+    return 0
+
+
+def is_id_mapped(index: faiss.Index) -> bool:
+    """True if vectors are addressed by chunk id rather than by insertion position."""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return True
+    return isinstance(index, faiss.IndexIVF) and index.direct_map.type == faiss.DirectMap.Hashtable
+
+
+def to_id_mapped(index: faiss.Index) -> faiss.Index:
+    """
+    Makes `index` addressable by stable 64-bit chunk ids, keeping existing positional ids (0..n-1).
+    IVF indexes store ids natively, so they only get a hashtable direct map (O(1) removal per id).
+    Everything else is wrapped in an IndexIDMap2.
+    """
+    if is_id_mapped(index):
+        return index
+    if isinstance(index, faiss.IndexIVF):
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+
+    n = index.ntotal
+    vectors = index.reconstruct_n(0, n) if n else None
+    index.reset()
+    mapped = faiss.IndexIDMap2(index)
+    if n:
+        mapped.add_with_ids(vectors, np.arange(n, dtype='int64'))
+    return mapped
+
+
+def build_index(vectors: np.ndarray, ids: np.ndarray, index_type: str, dimension: int, nlist: int = 1024,
+                pq_m: int = 64, hnsw_m: int = 32) -> faiss.Index:
+    """
+    Builds an id-mapped index of `index_type` from existing vectors, training it first if needed.
+    If there are too few vectors to train the configured nlist, nlist is scaled down;
+    if even that is not enough, falls back to a Flat index.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    ids = np.ascontiguousarray(ids, dtype='int64')
+    n = len(vectors)
+
+    if index_type in ("ivf_flat", "ivf_pq") and n < min_training_points(index_type, nlist):
+        nlist = max(1, n // MIN_POINTS_PER_LIST)
+        if n < min_training_points(index_type, nlist) or nlist < 2:
+            print(f"Only {n} vectors: not enough to train '{index_type}'. Using flat index instead.")
+            index_type = "flat"
+        else:
+            print(f"Only {n} vectors: training '{index_type}' with nlist={nlist}.")
+
+    index = create_index(index_type, dimension, nlist=nlist, pq_m=pq_m, hnsw_m=hnsw_m)
+    if not index.is_trained:
+        print(f"Training {index_type} index on {n} vectors...")
+        index.train(vectors)
+    index = to_id_mapped(index)
+    if n:
+        index.add_with_ids(vectors, ids)
+    return index
+
+
+def extract_vectors(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    """Returns the stored vectors for `ids` (used to rebuild into another index type)."""
+    ids = np.ascontiguousarray(ids, dtype='int64')
+    if len(ids) == 0:
+        return np.zeros((0, index.d), dtype='float32')
+    if isinstance(index, faiss.IndexIVF) and index.direct_map.type == faiss.DirectMap.NoMap:
+        # IVF indexes need a direct map to reconstruct by id (lossy for PQ)
+        index.make_direct_map()
+    return index.reconstruct_batch(ids)
+
+
+def remove_ids(index: faiss.Index, ids: np.ndarray) -> bool:
+    """
+    Physically removes vectors by chunk id. Returns False if the index type cannot
+    remove (HNSW): callers then drop the metadata only and the vectors go away on the next rebuild.
+    """
+    ids = np.ascontiguousarray(ids, dtype='int64')
+    # IDSelectorArray is required for the IVF hashtable path (cost proportional to len(ids))
+    selector = faiss.IDSelectorArray(len(ids), faiss.swig_ptr(ids))
+    try:
+        index.remove_ids(selector)
+        return True
+    except RuntimeError as e:
+        print(f"Index does not support removal ({e}). Vectors will be dropped on next rebuild.")
+        return False
+
+
+def mapped_ids(index: faiss.Index) -> np.ndarray:
+    """All chunk ids physically present in an IndexIDMap2 (empty for native IVF)."""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.vector_to_array(index.id_map)
+    return np.zeros(0, dtype='int64')
+
+
+def read_index_mmap(path: str) -> faiss.Index:
+    """Reads an index memory-mapped (read-only). Raises RuntimeError if the type cannot be mapped."""
+    error = None
+    for flags in MMAP_FLAG_OPTIONS:
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError as e:
+            error = e
+    raise error
+
+
+def apply_search_params(index: faiss.Index, nprobe: int = 16, ef_search: int = 64):
+    """Sets query-time knobs (nprobe for IVF, efSearch for HNSW) where they apply."""
+    params = faiss.ParameterSpace()
+    if faiss.try_extract_index_ivf(index) is not None:
+        params.set_index_parameter(index, "nprobe", nprobe)
+    try:
+        params.set_index_parameter(index, "efSearch", ef_search)
+    except RuntimeError:
+        pass # Not an HNSW index
+
+
+def excluding_params(index: faiss.Index, excluded_ids: np.ndarray, nprobe: int = 16, ef_search: int = 64):
+    """
+    Search parameters that skip `excluded_ids` (deleted chunks still stored in a read-only index),
+    so they do not crowd live hits out of the candidate window.
+    """
+    ids = np.ascontiguousarray(excluded_ids, dtype='int64')
+    batch = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+    selector = faiss.IDSelectorNot(batch)
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)) else index
+    if isinstance(inner, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    elif isinstance(inner, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    # Keep the selector chain alive as long as the params
+    params.referenced_objects = [ids, batch, selector]
+    return params
@@ -0,0 +1,89 @@
+from typing import Optional
+from backend.config import settings
+from backend.services.aws_clients import aws
+from backend.services.file_processor import extract_text, extract_text_from_s3, download_from_s3, etag_content_hash
+from backend.services.vector_store import vector_store
+from backend.services.content_cache import content_cache
+from backend.services import stats
+
+table = aws.table(settings.DYNAMODB_TABLE)
+
+
+def update_status(file_id: str, status: str, error_message: Optional[str] = None, **attributes):
+    """Sets the file's ingest status in rnd-hub-metadata (plus the last error / extra attributes, if any)."""
+    attributes['status'] = status
+    if error_message is not None:
+        attributes['error_message'] = error_message
+    names = {f'#a{i}': name for i, name in enumerate(attributes)}
+    values = {f':a{i}': value for i, value in enumerate(attributes.values())}
+    response = table.update_item(
+        Key={'file_id': file_id},
+        UpdateExpression="set " + ", ".join(f"#a{i} = :a{i}" for i in range(len(attributes))),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        ReturnValues='UPDATED_OLD'
+    )
+    stats.record_status_change(response.get('Attributes', {}).get('status'), status)
+
+
+def process_file(filename: str):
+    """Extracts text and updates the vector index for one uploaded file. Raises on failure (the queue retries)."""
+    print(f"Background Processing Started: {filename}")
+
+    # 1. Update Status -> 'processing'
+    update_status(filename, 'processing')
+
+    # 2. Content hash: the ETag if it is the MD5 (no download), else hashed from the download extraction reads
+    content_hash = etag_content_hash(filename)
+    if content_hash is None:
+        with download_from_s3(filename) as (file_stream, content_hash):
+            _index_content(filename, content_hash, file_stream)
+    else:
+        _index_content(filename, content_hash)
+
+
+def _index_content(filename: str, content_hash: str, file_stream=None):
+    with vector_store.write_lock:
+        vector_store.refresh()
+        already_indexed = filename in vector_store.sources
+        twin = next((f for f in content_cache.indexed_files(content_hash)
+                     if f != filename and f in vector_store.sources), None)
+
+    # Duplicate check: same bytes already indexed under this name -> metadata-only update
+    if already_indexed and content_cache.indexed_hash(filename) == content_hash:
+        update_status(filename, 'indexed', content_hash=content_hash)
+        print(f"Unchanged re-upload of {filename} ({content_hash}). Skipped re-indexing.")
+        return
+
+    # Same bytes indexed under another name: already searchable, so don't index the chunks twice.
+    # If that file is deleted, this one is re-queued (ContentCache.forget).
+    if twin is not None:
+        if already_indexed:
+            vector_store.delete_document(filename)  # Different content previously uploaded under this name
+        content_cache.mark_alias(filename, content_hash)
+        update_status(filename, 'indexed', content_hash=content_hash, duplicate_of=twin)
+        print(f"{filename} has the same content as {twin} ({content_hash}). Recorded as a duplicate, not re-indexed.")
+        return
+
+    # 3. Extract Text (reused if the same bytes were extracted before, under any name)
+    text = content_cache.get(content_hash)
+    if text is not None:
+        print(f"Duplicate content {content_hash}: reusing extracted text (embeddings come from the cache).")
+    else:
+        text = extract_text(filename, file_stream) if file_stream is not None else extract_text_from_s3(filename)
+        if text.strip():
+            content_cache.put(content_hash, text)
+
+    # 4. Index Vector
+    vector_store.add_document(text, filename)
+    was_duplicate = content_cache.mark_indexed(filename, content_hash)
+
+    # 5. Update Status -> 'indexed'
+    update_status(filename, 'indexed', content_hash=content_hash, **({'duplicate_of': None} if was_duplicate else {}))
+    print(f"Background Processing Complete: {filename}")
+
+
+# Job kind -> handler(payload)
+HANDLERS = {
+    "ingest": lambda payload: process_file(payload["filename"]),
+}
@@ -0,0 +1,148 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from backend.config import settings
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+
+class JobQueue:
+    """
+    Durable job queue in a local SQLite file (WAL), shared by the API (producer) and
+    backend/worker.py (consumers) on the same host.
+
+    A claimed job is leased for `lease_seconds`; if the worker dies, the lease expires and the job
+    is handed out again. Failed jobs are retried with exponential backoff until `max_attempts`,
+    then moved to the dead-letter state (kept for inspection and manual requeue).
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, retry_base_seconds: float = 30.0,
+                 lease_seconds: float = 1800.0):
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,"
+            " available_at REAL NOT NULL, last_error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, available_at)")
+
+    def enqueue(self, kind: str, payload: Dict, max_attempts: Optional[int] = None) -> int:
+        now = time.time()
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO jobs (kind, payload, status, max_attempts, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), QUEUED, max_attempts or self.max_attempts, now, now, now)
+            )
+        return cur.lastrowid
+
+    def claim(self, on_dead: Optional[Callable[[Dict, str], None]] = None) -> Optional[Dict]:
+        """
+        Atomically takes the oldest ready job (or one whose lease expired). None if the queue is idle.
+
+        An expired lease on the job's last attempt (e.g. it keeps crashing its worker) is
+        dead-lettered instead of run again; `on_dead(job, error)` is called for each such job.
+        """
+        now = time.time()
+        dead = []
+        with self.lock:
+            # IMMEDIATE takes the write lock up front, so two workers can never claim the same row
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self.conn.execute(
+                        "SELECT id, kind, payload, attempts, max_attempts, status FROM jobs"
+                        " WHERE status IN (?, ?) AND available_at <= ? ORDER BY available_at, id LIMIT 1",
+                        (QUEUED, RUNNING, now)
+                    ).fetchone()
+                    if row is None or row[5] == QUEUED or row[3] < row[4]:
+                        break
+                    error = f"Lease expired on attempt {row[3]}/{row[4]}"
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, available_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                        (DEAD, now, error, now, row[0])
+                    )
+                    dead.append(({"id": row[0], "kind": row[1], "payload": json.loads(row[2]),
+                                  "attempt": row[3], "max_attempts": row[4]}, error))
+                if row is not None:
+                    # While running, available_at is the lease expiry
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, available_at = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, now + self.lease_seconds, now, row[0])
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if on_dead:
+            for job, error in dead:
+                on_dead(job, error)
+        if row is None:
+            return None
+        return {"id": row[0], "kind": row[1], "payload": json.loads(row[2]),
+                "attempt": row[3] + 1, "max_attempts": row[4]}
+
+    def complete(self, job_id: int):
+        with self.lock:
+            self.conn.execute("UPDATE jobs SET status = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                              (DONE, time.time(), job_id))
+
+    def fail(self, job: Dict, error: str) -> str:
+        """Schedules a retry with exponential backoff, or dead-letters the job. Returns the new status."""
+        now = time.time()
+        if job["attempt"] >= job["max_attempts"]:
+            status, available_at = DEAD, now
+        else:
+            status, available_at = QUEUED, now + self.retry_base_seconds * (2 ** (job["attempt"] - 1))
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (status, available_at, error, now, job["id"])
+            )
+        return status
+
+    def requeue(self, job_id: int) -> bool:
+        """Gives a dead-lettered job a fresh set of attempts. False if there is no such dead-lettered job."""
+        now = time.time()
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, now, now, job_id, DEAD)
+            )
+        return cur.rowcount > 0
+
+    def dead_letters(self, limit: int = 100) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, kind, payload, attempts, last_error, updated_at FROM jobs"
+                " WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (DEAD, limit)
+            ).fetchall()
+        return [{"id": r[0], "kind": r[1], "payload": json.loads(r[2]), "attempts": r[3],
+                 "last_error": r[4], "failed_at": r[5]} for r in rows]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, DEAD: 0}
+        counts.update(dict(rows))
+        return counts
+
+
+job_queue = JobQueue(
+    settings.INGEST_QUEUE_PATH,
+    max_attempts=settings.INGEST_MAX_ATTEMPTS,
+    retry_base_seconds=settings.INGEST_RETRY_BASE_SECONDS,
+    lease_seconds=settings.INGEST_LEASE_SECONDS
+)
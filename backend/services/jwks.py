@@ -0,0 +1,94 @@
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from jose import jwk
+
+
+class JWKSUnavailable(Exception):
+    """No signing keys could be loaded yet (JWKS endpoint unreachable): tokens cannot be checked."""
+
+
+class JWKSManager:
+    """
+    Cognito signing keys, indexed by `kid` as ready-to-use key objects.
+
+    Fetched once at startup, then refreshed in the background when older than `ttl_seconds`,
+    or immediately when a token names a kid we don't know (key rotation). Concurrent refreshes are
+    collapsed into one fetch (single-flight), and unknown-kid refreshes are limited to one per
+    `min_refresh_seconds` so tokens with bogus kids cannot hammer the endpoint. The limit also
+    holds while no keys are loaded at all: during an outage requests fail fast (JWKSUnavailable).
+    Reads `local_path` instead of `url` when set (offline development and tests).
+    """
+
+    def __init__(self, url: str, local_path: str = "", ttl_seconds: float = 3600, min_refresh_seconds: float = 30):
+        self.url = url
+        self.local_path = local_path
+        self.ttl_seconds = ttl_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.keys: Dict[str, object] = {}
+        self.fetched_at = 0.0
+        self.attempted_at = float("-inf")
+        self.generation = 0
+        self._refresh_lock = threading.Lock()
+        self._background = None
+
+    def _fetch(self) -> Dict:
+        if self.local_path:
+            with open(self.local_path) as f:
+                return json.load(f)
+        response = requests.get(self.url, timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self, seen_generation: Optional[int] = None, seen_attempt: Optional[float] = None):
+        """Fetches the key set. If another thread is already fetching, waits for its result instead."""
+        generation = self.generation if seen_generation is None else seen_generation
+        attempt = self.attempted_at if seen_attempt is None else seen_attempt
+        with self._refresh_lock:
+            if self.generation != generation or self.attempted_at != attempt:
+                return  # Someone refreshed (or tried and failed) since the caller looked
+            try:
+                keys = {k['kid']: jwk.construct(k) for k in self._fetch()['keys']}
+            finally:
+                # Stamped when the fetch ends, so callers that looked while it was in flight skip theirs
+                self.attempted_at = time.monotonic()
+            # Swap the whole dict: readers never see a half-built key set
+            self.keys = keys
+            self.fetched_at = time.monotonic()
+            self.generation += 1
+            print(f"JWKS loaded: {len(keys)} keys ({', '.join(keys)})")
+
+    def _refresh_quietly(self, seen_generation: Optional[int] = None, seen_attempt: Optional[float] = None):
+        try:
+            self.refresh(seen_generation, seen_attempt)
+        except Exception as e:
+            print(f"JWKS refresh failed (keeping {len(self.keys)} cached keys): {e}")
+
+    def _refresh_in_background(self):
+        if self._background is None or not self._background.is_alive():
+            self._background = threading.Thread(target=self._refresh_quietly, daemon=True)
+            self._background.start()
+
+    def get_key(self, kid: str) -> Optional[object]:
+        """
+        Public key object for `kid`, or None if the key set (even after a refresh) has no such key.
+        Raises JWKSUnavailable if no key set has been loaded.
+        """
+        now = time.monotonic()
+        generation, attempt = self.generation, self.attempted_at
+        key = self.keys.get(kid)
+        if key is not None:
+            if now - self.fetched_at > self.ttl_seconds:
+                self._refresh_in_background()  # Stale but still valid: keep serving from cache
+            return key
+
+        # Unknown kid: keys may have rotated. Refresh now (single-flight, rate limited),
+        # or wait for a refresh that is already in flight.
+        if self._refresh_lock.locked() or now - attempt >= self.min_refresh_seconds:
+            self._refresh_quietly(generation, attempt)
+        if not self.keys:
+            raise JWKSUnavailable(f"No JWKS keys loaded (next fetch in at most {self.min_refresh_seconds:.0f}s)")
+        return self.keys.get(kid)
@@ -0,0 +1,300 @@
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+
+# File layout (little-endian), sections 8-byte aligned:
+#   header          magic, format version, reserved, counts and byte lengths below
+#   chunk_ids       int64[chunks]         sorted ids of the indexed chunks
+#   token_offsets   int64[tokens + 1]     byte offsets into token_bytes (tokens sorted by UTF-8 bytes)
+#   posting_offsets int64[tokens + 1]     offsets into postings
+#   postings        int64[postings]       chunk ids per token, ascending
+#   gram_offsets    int64[grams + 1]      byte offsets into gram_bytes (trigrams sorted by UTF-8 bytes)
+#   gram_ref_offsets int64[grams + 1]     offsets into gram_refs
+#   gram_refs       uint32[refs]          token numbers containing each trigram, ascending
+#   token_bytes, gram_bytes               UTF-8, concatenated
+MAGIC = b"RNDKWIDX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQQQQ")
+
+_EMPTY_IDS = np.zeros(0, dtype=np.int64)
+
+
+def _pad8(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+def _find(blob, offsets: np.ndarray, count: int, key: bytes) -> int:
+    """Binary search for `key` among `count` sorted byte strings in `blob`; -1 if absent."""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        value = bytes(blob[int(offsets[mid]):int(offsets[mid + 1])])
+        if value < key:
+            lo = mid + 1
+        elif value > key:
+            hi = mid
+        else:
+            return mid
+    return -1
+
+
+class KeywordIndex:
+    """
+    Inverted index (token -> posting list of chunk ids) for the keyword fallback.
+
+    Query terms are matched as substrings of indexed tokens. Chunk text is
+    whitespace-normalized before indexing, so this returns exactly the chunks
+    the old `term in text.lower()` scan did. A trigram index over the vocabulary
+    narrows each term to the few tokens that can contain it, so a lookup touches
+    those tokens' posting lists instead of the whole vocabulary.
+
+    Like ChunkStore, the snapshot is a memory-mapped file of offset-indexed arrays, so
+    opening it costs no per-token Python objects. Chunks added since the file was written
+    live in a small in-memory overlay, and deleted snapshot chunks are masked; `write`
+    folds both into a new file (done at compaction).
+    """
+
+    def __init__(self):
+        # Mapped snapshot
+        self.chunk_ids = _EMPTY_IDS
+        self.token_offsets = np.zeros(1, dtype=np.int64)
+        self.posting_offsets = np.zeros(1, dtype=np.int64)
+        self.base_postings = _EMPTY_IDS
+        self.gram_offsets = np.zeros(1, dtype=np.int64)
+        self.gram_ref_offsets = np.zeros(1, dtype=np.int64)
+        self.gram_refs = np.zeros(0, dtype=np.uint32)
+        self.token_bytes = memoryview(b"")
+        self.gram_bytes = memoryview(b"")
+        self.removed: Set[int] = set()
+        self._mmap = None
+
+        # Overlay
+        self.postings: Dict[str, Set[int]] = {}
+        self.trigrams: Dict[str, Set[str]] = {}  # trigram -> overlay tokens containing it
+        self.overlay_chunks: Set[int] = set()
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.chunk_ids) - len(self.removed) + len(self.overlay_chunks)
+
+    @property
+    def num_tokens(self) -> int:
+        return len(self.token_offsets) - 1
+
+    @staticmethod
+    def _tokens(text: str) -> Set[str]:
+        return set(text.lower().split())
+
+    @staticmethod
+    def _trigrams(token: str) -> Set[str]:
+        return {token[i:i + 3] for i in range(len(token) - 2)}
+
+    # --- Overlay updates ---
+
+    def _add_token(self, token: str):
+        self.postings[token] = set()
+        for gram in self._trigrams(token):
+            self.trigrams.setdefault(gram, set()).add(token)
+
+    def _remove_token(self, token: str):
+        del self.postings[token]
+        for gram in self._trigrams(token):
+            tokens = self.trigrams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self.trigrams[gram]
+
+    def add(self, chunk_id: int, text: str):
+        for token in self._tokens(text):
+            if token not in self.postings:
+                self._add_token(token)
+            self.postings[token].add(chunk_id)
+        self.overlay_chunks.add(chunk_id)
+
+    def _in_base(self, chunk_id: int) -> bool:
+        i = int(np.searchsorted(self.chunk_ids, chunk_id))
+        return i < len(self.chunk_ids) and self.chunk_ids[i] == chunk_id
+
+    def remove(self, chunk_id: int, text: str):
+        if chunk_id not in self.overlay_chunks:
+            # Snapshot postings are read-only: mask the chunk until the next write
+            if self._in_base(chunk_id):
+                self.removed.add(int(chunk_id))
+            return
+        for token in self._tokens(text):
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(chunk_id)
+            if not ids:
+                self._remove_token(token)
+        self.overlay_chunks.discard(chunk_id)
+
+    # --- Lookup ---
+
+    def _token(self, n: int) -> str:
+        return str(self.token_bytes[int(self.token_offsets[n]):int(self.token_offsets[n + 1])], "utf-8")
+
+    def _base_candidates(self, term: str) -> Iterable[int]:
+        """Snapshot token numbers containing every trigram of `term`."""
+        if len(term) < 3:
+            # No trigram to narrow by; search() only sends terms of 3+ characters
+            return range(self.num_tokens)
+        refs = []
+        for gram in self._trigrams(term):
+            g = _find(self.gram_bytes, self.gram_offsets, len(self.gram_offsets) - 1, gram.encode("utf-8"))
+            if g < 0:
+                return []
+            refs.append(self.gram_refs[int(self.gram_ref_offsets[g]):int(self.gram_ref_offsets[g + 1])])
+        refs.sort(key=len)
+        candidates = refs[0]
+        for other in refs[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+        return candidates.tolist()
+
+    def _overlay_candidates(self, term: str) -> Iterable[str]:
+        if len(term) < 3:
+            return self.postings.keys()
+        grams = sorted(self._trigrams(term), key=lambda g: len(self.trigrams.get(g, ())))
+        candidates = set(self.trigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self.trigrams.get(gram, set())
+        return candidates
+
+    def _ids_for_term(self, term: str) -> np.ndarray:
+        # Substring semantics: "cremation" must also hit "cremations,".
+        parts = []
+        for n in self._base_candidates(term):
+            if term in self._token(n):
+                parts.append(self.base_postings[int(self.posting_offsets[n]):int(self.posting_offsets[n + 1])])
+        overlay_ids = set()
+        for token in self._overlay_candidates(term):
+            if term in token:
+                overlay_ids |= self.postings[token]
+        if overlay_ids:
+            parts.append(np.fromiter(overlay_ids, dtype=np.int64, count=len(overlay_ids)))
+        return np.unique(np.concatenate(parts)) if parts else _EMPTY_IDS
+
+    def search(self, terms: Iterable[str]) -> List[int]:
+        """Returns ids of chunks containing ALL terms, in ascending id order."""
+        result = None
+        # Intersect the most selective terms first
+        for term in sorted(set(terms), key=len, reverse=True):
+            ids = self._ids_for_term(term)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                return []
+        if result is None:
+            return []
+        if self.removed:
+            result = result[~np.isin(result, np.fromiter(self.removed, dtype=np.int64, count=len(self.removed)))]
+        return result.tolist()
+
+    # --- Building / persistence ---
+
+    @classmethod
+    def build(cls, metadata: Dict[int, dict]) -> "KeywordIndex":
+        index = cls()
+        for chunk_id, meta in metadata.items():
+            index.add(chunk_id, meta.get('text', ''))
+        return index
+
+    def write(self, path: str):
+        """Writes all live postings to `path` atomically; readers mapping the old file are unaffected."""
+        removed = np.fromiter(self.removed, dtype=np.int64, count=len(self.removed))
+        postings: Dict[bytes, List[int]] = {}
+        for n in range(self.num_tokens):
+            ids = self.base_postings[int(self.posting_offsets[n]):int(self.posting_offsets[n + 1])]
+            if len(removed):
+                ids = ids[~np.isin(ids, removed)]
+            if len(ids):
+                postings[bytes(self.token_bytes[int(self.token_offsets[n]):int(self.token_offsets[n + 1])])] = ids.tolist()
+        for token, ids in self.postings.items():
+            postings.setdefault(token.encode("utf-8"), []).extend(ids)
+
+        # UTF-8 byte order is code point order, so lookups can binary search the raw bytes
+        tokens = sorted(postings)
+        token_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        posting_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        posting_arrays = []
+        grams: Dict[bytes, List[int]] = {}
+        for n, token in enumerate(tokens):
+            token_offsets[n + 1] = token_offsets[n] + len(token)
+            ids = np.array(sorted(postings[token]), dtype=np.int64)
+            posting_arrays.append(ids)
+            posting_offsets[n + 1] = posting_offsets[n] + len(ids)
+            for gram in self._trigrams(token.decode("utf-8")):
+                grams.setdefault(gram.encode("utf-8"), []).append(n)
+
+        gram_keys = sorted(grams)
+        gram_offsets = np.zeros(len(gram_keys) + 1, dtype=np.int64)
+        gram_ref_offsets = np.zeros(len(gram_keys) + 1, dtype=np.int64)
+        for g, gram in enumerate(gram_keys):
+            gram_offsets[g + 1] = gram_offsets[g] + len(gram)
+            gram_ref_offsets[g + 1] = gram_ref_offsets[g] + len(grams[gram])
+        gram_refs = np.array([n for gram in gram_keys for n in grams[gram]], dtype=np.uint32)
+
+        live = self.chunk_ids[~np.isin(self.chunk_ids, removed)] if len(removed) else self.chunk_ids
+        chunk_ids = np.union1d(live, np.fromiter(self.overlay_chunks, dtype=np.int64, count=len(self.overlay_chunks)))
+        token_bytes = b"".join(tokens)
+        gram_bytes = b"".join(gram_keys)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, 0, len(chunk_ids), len(tokens), int(posting_offsets[-1]),
+                len(gram_keys), len(gram_refs), len(token_bytes), len(gram_bytes)
+            ))
+            f.write(chunk_ids.astype(np.int64).tobytes())
+            f.write(token_offsets.tobytes())
+            f.write(posting_offsets.tobytes())
+            for ids in posting_arrays:
+                f.write(ids.tobytes())
+            f.write(gram_offsets.tobytes())
+            f.write(gram_ref_offsets.tobytes())
+            f.write(_pad8(gram_refs.tobytes()))
+            f.write(_pad8(token_bytes))
+            f.write(gram_bytes)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path: str) -> "KeywordIndex":
+        """Maps a file written by `write` (an empty index if it does not exist)."""
+        index = cls()
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return index
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, chunks, tokens, postings, grams, refs, token_len, gram_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a keyword index file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported keyword index format version {version}")
+
+        def array(dtype, count):
+            nonlocal pos
+            values = np.frombuffer(mm, dtype=dtype, count=count, offset=pos)
+            pos += values.nbytes + (-values.nbytes % 8)
+            return values
+
+        pos = HEADER.size
+        index.chunk_ids = array(np.int64, chunks)
+        index.token_offsets = array(np.int64, tokens + 1)
+        index.posting_offsets = array(np.int64, tokens + 1)
+        index.base_postings = array(np.int64, postings)
+        index.gram_offsets = array(np.int64, grams + 1)
+        index.gram_ref_offsets = array(np.int64, grams + 1)
+        index.gram_refs = array(np.uint32, refs)
+        index.token_bytes = memoryview(mm)[pos:pos + token_len]
+        pos += token_len + (-token_len % 8)
+        index.gram_bytes = memoryview(mm)[pos:pos + gram_len]
+        index._mmap = mm
+        return index
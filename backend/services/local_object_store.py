@@ -0,0 +1,84 @@
+import io
+import os
+import shutil
+from botocore.exceptions import ClientError
+
+
+class LocalObjectStore:
+    """
+    Filesystem stand-in for the subset of the boto3 S3 client the vector store uses.
+    Enabled with VECTOR_STORE_LOCAL_DIR for offline development and tests.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    @staticmethod
+    def _error(code: str, operation: str):
+        return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+    def upload_file(self, filename, bucket, key):
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(filename, path)
+
+    def download_file(self, bucket, key, filename):
+        path = self._path(bucket, key)
+        if not os.path.exists(path):
+            raise self._error("404", "HeadObject")
+        # Copy-then-rename like boto3, so a file another reader has mapped is never truncated
+        shutil.copyfile(path, f"{filename}.tmp")
+        os.replace(f"{filename}.tmp", filename)
+
+    def put_object(self, Bucket, Key, Body, IfNoneMatch=None, **kwargs):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = Body if isinstance(Body, bytes) else Body.read()
+        # 'x' mode gives the same create-only semantics as S3 conditional writes
+        mode = "xb" if IfNoneMatch == "*" else "wb"
+        try:
+            with open(path, mode) as f:
+                f.write(data)
+        except FileExistsError:
+            raise self._error("PreconditionFailed", "PutObject")
+        return {}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            raise self._error("NoSuchKey", "GetObject")
+        with open(path, "rb") as f:
+            return {"Body": io.BytesIO(f.read()), "ContentLength": os.path.getsize(path)}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        path = self._path(Bucket, Key)
+        if os.path.exists(path):
+            os.remove(path)
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix="", **kwargs):
+        base = os.path.join(self.root, Bucket)
+        contents = []
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, base).replace(os.sep, "/")
+                if key.startswith(Prefix):
+                    contents.append({"Key": key, "Size": os.path.getsize(path)})
+        contents.sort(key=lambda c: c["Key"])
+        response = {"KeyCount": len(contents), "IsTruncated": False}
+        if contents:
+            response["Contents"] = contents
+        return response
+
+    def get_paginator(self, operation: str):
+        store = self
+
+        class _Paginator:
+            def paginate(self, **kwargs):
+                yield getattr(store, operation)(**kwargs)
+
+        return _Paginator()
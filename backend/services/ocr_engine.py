@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Optional, Tuple
+
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+from backend.config import settings
+
+
+def _ocr_page(pdf_path: str, page_number: int, dpi: int, grayscale: bool) -> Tuple[int, str, float]:
+    """Worker: rasterizes ONE page (1-based) and OCRs it. Only this page's image is ever in memory."""
+    started = time.time()
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=grayscale)
+    text = pytesseract.image_to_string(images[0]) if images else ""
+    return page_number, text, time.time() - started
+
+
+def _ocr_image(image_path: str, grayscale: bool) -> str:
+    from PIL import Image
+    image = Image.open(image_path)
+    if grayscale:
+        image = image.convert("L")
+    return pytesseract.image_to_string(image)
+
+
+class OCREngine:
+    """
+    Tesseract OCR across a process pool.
+
+    PDF pages are rasterized inside the workers one page at a time (pdf2image first_page/last_page),
+    so peak memory is bounded by the pool size rather than the page count, and throughput scales
+    with cores. Results are reassembled in page order.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, dpi: int = 200, grayscale: bool = True):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created on first use and shared by all documents. 'spawn' because the API process is multi-threaded.
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def page_count(self, pdf_path: str) -> int:
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+    def ocr_pages(self, pdf_path: str, pages: Optional[List[int]] = None) -> List[Tuple[int, str, float]]:
+        """OCRs `pages` (1-based; default all) of a PDF on disk. Returns (page, text, seconds) in page order."""
+        if pages is None:
+            pages = list(range(1, self.page_count(pdf_path) + 1))
+        pool = self._get_pool()
+        results = {}
+        pending = set()
+        queue = iter(pages)
+        while True:
+            # Bounded window: at most 2 pages per worker rasterized or waiting at once
+            for page_number in queue:
+                pending.add(pool.submit(_ocr_page, pdf_path, page_number, self.dpi, self.grayscale))
+                if len(pending) >= self.max_workers * 2:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_number, text, seconds = future.result()
+                results[page_number] = (page_number, text, seconds)
+                print(f"OCR Processed Page {page_number} in {seconds:.2f}s")
+        return [results[p] for p in pages]
+
+    @contextmanager
+    def _on_disk(self, file_obj, suffix: str):
+        """Path for a file object: workers open files by path, so in-memory/unnamed spools are copied to disk in blocks."""
+        name = getattr(file_obj, "name", None)
+        if isinstance(name, str) and os.path.exists(name):
+            yield name
+            return
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            file_obj.seek(0)
+            shutil.copyfileobj(file_obj, f)
+            path = f.name
+        try:
+            yield path
+        finally:
+            os.remove(path)
+
+    def ocr_pdf_pages(self, file_obj, pages: Optional[List[int]] = None) -> List[Tuple[int, str, float]]:
+        """OCRs `pages` (1-based; default all) of a PDF file object. Returns (page, text, seconds) in page order."""
+        with self._on_disk(file_obj, ".pdf") as pdf_path:
+            return self.ocr_pages(pdf_path, pages)
+
+    def ocr_pdf(self, file_obj) -> str:
+        """OCRs every page of a PDF file object."""
+        return "".join(text + "\n" for _, text, _ in self.ocr_pdf_pages(file_obj))
+
+    def ocr_image(self, file_obj) -> str:
+        with self._on_disk(file_obj, ".img") as image_path:
+            return self._get_pool().submit(_ocr_image, image_path, self.grayscale).result()
+
+ocr_engine = OCREngine(
+    max_workers=settings.OCR_MAX_WORKERS,
+    dpi=settings.OCR_DPI,
+    grayscale=settings.OCR_GRAYSCALE
+)
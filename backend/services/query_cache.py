@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key for a search query."""
+    return " ".join(query.casefold().split())
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with a per-entry TTL.
+
+    `clear()` bumps a generation counter; a `put` that was computed against an
+    older generation is dropped, so a search that raced with an index update
+    cannot re-populate the cache with stale results.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.entries = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        """`ttl_seconds` can only shorten the cache-wide TTL (e.g. to a token's remaining lifetime)."""
+        ttl = self.ttl if ttl_seconds is None else min(self.ttl, ttl_seconds)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def discard(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Removes entries for which predicate(key, value) is true. Returns how many were removed."""
+        with self.lock:
+            keys = [k for k, (_, v) in self.entries.items() if predicate(k, v)]
+            for k in keys:
+                del self.entries[k]
+            return len(keys)
@@ -0,0 +1,152 @@
+import io
+import json
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+# Error codes S3 returns when a conditional (IfNoneMatch) write loses the race
+CONFLICT_CODES = {"PreconditionFailed", "ConditionalRequestConflict", "412", "409"}
+
+
+class ManifestConflict(Exception):
+    """Another writer committed the same manifest version first."""
+
+
+class HistoryCompacted(Exception):
+    """The segments committed since a manifest were compacted away (more than one compaction ago)."""
+
+
+class SegmentLog:
+    """
+    Append-only persistence for the vector store.
+
+    Layout under s3://bucket/<prefix>/:
+      base/<version>/{faiss_index.bin, chunks.bin, keyword_index.bin}     full snapshot (compaction)
+      segments/<version>-<uuid>.npz                                       one immutable delta per change
+      manifests/manifest-<version>.json                                   base + segments after it
+
+    Manifests are created with IfNoneMatch='*', so exactly one writer wins each
+    version; losers catch up and retry. An ingest therefore uploads one small
+    segment plus a manifest instead of the whole index.
+    """
+
+    def __init__(self, client, bucket: str, prefix: str):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, *parts) -> str:
+        return "/".join((self.prefix,) + parts)
+
+    # --- Manifests ---
+
+    def latest_manifest(self) -> Optional[Dict]:
+        keys = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key("manifests", "")):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        if not keys:
+            return None
+        # Zero-padded versions sort lexicographically
+        response = self.client.get_object(Bucket=self.bucket, Key=max(keys))
+        return json.loads(response['Body'].read())
+
+    def segments_since(self, start: Optional[Dict], latest: Optional[Dict]) -> List[str]:
+        """
+        Segment keys committed after manifest `start` up to `latest`, in commit order.
+        One compaction in between is fine (the segments it folded stay as garbage until the
+        next one); after more, they may be gone and this raises.
+        """
+        if latest is None or (start and start["version"] == latest["version"]):
+            return []
+        start_base = start["base"] if start else {"version": 0, "files": {}}
+        seen = set(start["segments"]) if start else set()
+        folded = seen | (set(start_base["files"].values()) if start_base["version"] > 0 else set())
+        if latest["base"]["version"] == start_base["version"]:
+            committed = latest["segments"]
+        elif folded and folded <= set(latest.get("garbage", [])):
+            # Exactly one compaction since start: everything start listed is now its garbage
+            segment_prefix = self._key("segments", "")
+            committed = [k for k in latest["garbage"] if k.startswith(segment_prefix)] + latest["segments"]
+        else:
+            raise HistoryCompacted(f"Manifest v{latest['version']} no longer lists every change since v{start['version'] if start else 0}")
+        return [key for key in committed if key not in seen]
+
+    def commit(self, manifest: Dict):
+        key = self._key("manifests", f"manifest-{manifest['version']:012d}.json")
+        try:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=json.dumps(manifest).encode("utf-8"),
+                ContentType="application/json",
+                IfNoneMatch="*"
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in CONFLICT_CODES:
+                raise ManifestConflict(key)
+            raise
+
+    # --- Segments ---
+
+    def write_segment(self, version: int, ids: np.ndarray, vectors: np.ndarray,
+                      texts: List[str], source: Optional[str], removed_sources: List[str]) -> str:
+        payload = json.dumps({"texts": texts, "source": source, "removed_sources": removed_sources})
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            ids=np.asarray(ids, dtype='int64'),
+            vectors=np.asarray(vectors, dtype='float32'),
+            payload=np.frombuffer(payload.encode("utf-8"), dtype=np.uint8)
+        )
+        key = self._key("segments", f"{version:012d}-{uuid.uuid4().hex}.npz")
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=buffer.getvalue())
+        return key
+
+    def read_segment(self, key: str) -> Dict:
+        response = self.client.get_object(Bucket=self.bucket, Key=key)
+        with np.load(io.BytesIO(response['Body'].read()), allow_pickle=False) as data:
+            segment = json.loads(data["payload"].tobytes().decode("utf-8"))
+            segment["ids"] = data["ids"]
+            segment["vectors"] = data["vectors"]
+        return segment
+
+    # --- Base snapshots ---
+
+    def legacy_base(self, files: Dict[str, str]) -> Dict:
+        """Pre-manifest layout: files sat directly under the prefix."""
+        return {"version": 0, "files": {name: self._key(name) for name in files}}
+
+    def write_base(self, version: int, files: Dict[str, str]) -> Dict:
+        """Uploads local snapshot files {name: local path}. Returns the manifest's base entry."""
+        keys = {}
+        for name, path in files.items():
+            keys[name] = self._key("base", f"{version:012d}", name)
+            self.client.upload_file(path, self.bucket, keys[name])
+        return {"version": version, "files": keys}
+
+    def download_base(self, base: Dict, files: Dict[str, str]):
+        for name, path in files.items():
+            key = base["files"].get(name)
+            if key is None:
+                continue
+            try:
+                self.client.download_file(self.bucket, key, path)
+            except Exception as e:
+                print(f"Snapshot file {key} not downloaded: {e}")
+
+    def delete(self, keys: List[str]):
+        for key in keys:
+            try:
+                self.client.delete_object(Bucket=self.bucket, Key=key)
+            except Exception as e:
+                print(f"Failed to delete {key}: {e}")
+
+    def prune_manifests(self, keep_from_version: int):
+        """Deletes manifests older than `keep_from_version` (keeps the listing short)."""
+        keep_from = self._key("manifests", f"manifest-{keep_from_version:012d}.json")
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key("manifests", "")):
+            self.delete([obj['Key'] for obj in page.get('Contents', []) if obj['Key'] < keep_from])
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+from backend.config import settings
+from backend.services.aws_clients import aws
+
+# Running aggregates for the admin dashboard (one small item each, see scripts/rebuild_stats.py)
+STATS_TABLE = "rnd-hub-stats"
+FILES_KEY = "files"     # file_count, total_bytes, status_<status> counters
+ONLINE_KEY = "online"   # users: {username: last seen (epoch seconds)}
+
+IGNORED_USERS = {'unknown', 'anonymous', 'unknown_user'}
+
+stats_table = aws.table(STATS_TABLE)
+
+
+def _add(deltas: Dict[str, int]):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    names = {f'#a{i}': name for i, name in enumerate(deltas)}
+    values = {f':a{i}': value for i, value in enumerate(deltas.values())}
+    stats_table.update_item(
+        Key={'name': FILES_KEY},
+        UpdateExpression="add " + ", ".join(f"#a{i} :a{i}" for i in range(len(deltas))),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values
+    )
+
+
+def record_file_change(old: Optional[Dict], new: Optional[Dict]):
+    """
+    Applies one file write to the totals with atomic ADDs. `old`/`new` are the item before and
+    after the write (None when absent). Best effort: a failure is logged, never raised, and
+    scripts/rebuild_stats.py repairs any drift.
+    """
+    deltas = defaultdict(int)
+    for item, sign in ((old, -1), (new, 1)):
+        if item:
+            deltas['file_count'] += sign
+            deltas['total_bytes'] += sign * int(item.get('size', 0))
+            if item.get('status'):
+                deltas[f"status_{item['status']}"] += sign
+    try:
+        _add(deltas)
+    except Exception as e:
+        print(f"Failed to update file stats: {e}")
+
+
+def record_status_change(old_status: Optional[str], new_status: str):
+    if old_status == new_status:
+        return
+    deltas = {f"status_{new_status}": 1}
+    if old_status:
+        deltas[f"status_{old_status}"] = -1
+    try:
+        _add(deltas)
+    except Exception as e:
+        print(f"Failed to update file stats: {e}")
+
+
+def file_totals() -> Dict:
+    """{file_count, total_bytes, by_status} from the aggregate item (one GetItem)."""
+    item = stats_table.get_item(Key={'name': FILES_KEY}).get('Item', {})
+    return {
+        "file_count": int(item.get('file_count', 0)),
+        "total_bytes": int(item.get('total_bytes', 0)),
+        "by_status": {k[len("status_"):]: int(v) for k, v in item.items() if k.startswith("status_") and v}
+    }
+
+
+class OnlineUsers:
+    """
+    Sliding-window set of users seen in the last `window_seconds`, shared by all API processes
+    through one DynamoDB item (a username -> last seen map).
+
+    Fed from the activity log's background writer. Each process writes a user's timestamp at most
+    once per `write_interval_seconds`, so steady traffic costs one small update per user per interval
+    rather than one per request. Readers drop entries that have left the window.
+    """
+
+    def __init__(self, window_seconds: float = 900, write_interval_seconds: float = 60):
+        self.window_seconds = window_seconds
+        self.write_interval_seconds = write_interval_seconds
+        self._written: Dict[str, float] = {}  # user -> last seen time we wrote
+        self._lock = threading.Lock()
+
+    def record(self, users: Iterable[str]):
+        """Marks users as seen now (called with each batch of activity events)."""
+        now = time.time()
+        with self._lock:
+            due = [u for u in set(users) if u and u not in IGNORED_USERS
+                   and now - self._written.get(u, 0) >= self.write_interval_seconds]
+            for user in due:
+                self._written[user] = now
+        for i in range(0, len(due), 50):
+            self._write(due[i:i + 50], int(now))
+
+    def _write(self, users: List[str], seen_at: int):
+        names = {'#m': 'users', **{f'#u{i}': u for i, u in enumerate(users)}}
+        update = dict(
+            Key={'name': ONLINE_KEY},
+            UpdateExpression="set " + ", ".join(f"#m.#u{i} = :t" for i in range(len(users))),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={':t': seen_at}
+        )
+        try:
+            stats_table.update_item(**update)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ValidationException':
+                raise
+            # First write ever: the users map does not exist yet
+            stats_table.update_item(
+                Key={'name': ONLINE_KEY},
+                UpdateExpression="set #m = if_not_exists(#m, :empty)",
+                ExpressionAttributeNames={'#m': 'users'},
+                ExpressionAttributeValues={':empty': {}}
+            )
+            stats_table.update_item(**update)
+
+    def active(self) -> List[str]:
+        """Users seen within the window (one GetItem; expired entries are pruned as a side effect)."""
+        users = stats_table.get_item(Key={'name': ONLINE_KEY}).get('Item', {}).get('users', {})
+        threshold = time.time() - self.window_seconds
+        active = sorted(u for u, seen in users.items() if seen >= threshold)
+        expired = {u: seen for u, seen in users.items() if seen < threshold}
+        if expired:
+            self._prune(dict(list(expired.items())[:50]))
+        return active
+
+    def _prune(self, expired: Dict):
+        # Conditional: a user who came back since our read keeps their fresh timestamp
+        names = {'#m': 'users', **{f'#u{i}': u for i, u in enumerate(expired)}}
+        values = {f':t{i}': seen for i, seen in enumerate(expired.values())}
+        try:
+            stats_table.update_item(
+                Key={'name': ONLINE_KEY},
+                UpdateExpression="remove " + ", ".join(f"#m.#u{i}" for i in range(len(expired))),
+                ConditionExpression=" and ".join(f"#m.#u{i} = :t{i}" for i in range(len(expired))),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+
+online_users = OnlineUsers(
+    window_seconds=settings.ONLINE_WINDOW_SECONDS,
+    write_interval_seconds=settings.ONLINE_WRITE_INTERVAL_SECONDS
+)
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from backend.config import settings
+from backend.services.aws_clients import aws
+from backend.services.stats import stats_table
+
+# Bumped by anything that changes Cognito users or groups (scripts/manage_users.py, admin refresh),
+# so every API process reloads its directory on the next read instead of after the TTL
+GENERATION_KEY = "user_directory"
+
+
+def bump_generation():
+    """Marks all cached user directories as stale (call after creating/changing users or groups)."""
+    stats_table.update_item(
+        Key={'name': GENERATION_KEY},
+        UpdateExpression="add generation :one",
+        ExpressionAttributeValues={':one': 1}
+    )
+
+
+class UserDirectory:
+    """
+    All Cognito users with their groups, for the admin Users page.
+
+    Loaded with full pagination: list_users pages, then one list_users_in_group walk per group
+    (a handful of calls) instead of admin_list_groups_for_user per user. Cached for `ttl_seconds`;
+    the shared generation marker (one GetItem) or `invalidate` forces a reload sooner. Concurrent
+    readers of a stale directory share one load.
+    """
+
+    def __init__(self, user_pool_id: str, ttl_seconds: float = 300):
+        self.user_pool_id = user_pool_id
+        self.ttl_seconds = ttl_seconds
+        self._users: Optional[List[Dict]] = None
+        self._loaded_at = 0.0
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _paginate(self, method: str, result_key: str, token_key: str, **kwargs):
+        # token_key names the continuation token in both the response and the next request
+        cognito = aws.client('cognito-idp')
+        while True:
+            response = getattr(cognito, method)(UserPoolId=self.user_pool_id, **kwargs)
+            yield from response.get(result_key, [])
+            token = response.get(token_key)
+            if not token:
+                return
+            kwargs[token_key] = token
+
+    def _load(self) -> List[Dict]:
+        # 1. Group -> members, one paginated walk per group (groups in parallel)
+        group_names = [g['GroupName'] for g in self._paginate('list_groups', 'Groups', 'NextToken', Limit=60)]
+
+        def members(group_name):
+            return [m['Username'] for m in self._paginate('list_users_in_group', 'Users', 'NextToken',
+                                                          GroupName=group_name, Limit=60)]
+
+        groups_by_user = defaultdict(list)
+        if group_names:
+            # Own small pool: this already runs on the AWS pool, which must not wait on itself
+            with ThreadPoolExecutor(max_workers=min(8, len(group_names))) as pool:
+                for group_name, usernames in zip(group_names, pool.map(members, group_names)):
+                    for username in usernames:
+                        groups_by_user[username].append(group_name)
+
+        # 2. Every user (list_users returns at most 60 per page)
+        users = []
+        for u in self._paginate('list_users', 'Users', 'PaginationToken', Limit=60):
+            attrs = {a['Name']: a['Value'] for a in u.get('Attributes', [])}
+            users.append({
+                "username": u['Username'],
+                "email": attrs.get('email', ''),
+                "status": u['UserStatus'],
+                "created_at": u['UserCreateDate'],
+                "last_modified": u['UserLastModifiedDate'],
+                "enabled": u['Enabled'],
+                "groups": sorted(groups_by_user.get(u['Username'], []))
+            })
+        print(f"User directory loaded: {len(users)} users, {sum(len(g) for g in groups_by_user.values())} memberships")
+        return users
+
+    def _current_generation(self):
+        try:
+            item = stats_table.get_item(Key={'name': GENERATION_KEY}).get('Item', {})
+            return int(item.get('generation', 0))
+        except Exception as e:
+            print(f"User directory generation check failed (using TTL only): {e}")
+            return self._generation
+
+    def users(self) -> List[Dict]:
+        generation = self._current_generation()
+        with self._lock:
+            fresh = (
+                self._users is not None
+                and time.monotonic() - self._loaded_at < self.ttl_seconds
+                and generation == self._generation
+            )
+            if not fresh:
+                self._users = self._load()
+                self._loaded_at = time.monotonic()
+                self._generation = generation
+            return self._users
+
+    def invalidate(self):
+        with self._lock:
+            self._users = None
+
+
+user_directory = UserDirectory(settings.COGNITO_USER_POOL_ID, ttl_seconds=settings.USER_DIRECTORY_TTL_SECONDS)
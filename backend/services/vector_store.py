@@ -1,106 +1,534 @@
 import faiss
-import pickle
 import os
 import json
 import numpy as np
-import boto3
-from typing import List, Dict
+from typing import List, Dict, Optional
 from backend.config import settings
+from backend.services.aws_clients import aws
+from backend.services.keyword_index import KeywordIndex
+from backend.services.embedding_pipeline import EmbeddingPipeline
+from backend.services.embedding_cache import EmbeddingCache
+from backend.services.query_cache import TTLCache, normalize_query
+from backend.services import index_factory
+from backend.services.segment_store import SegmentLog, ManifestConflict
+from backend.services.local_object_store import LocalObjectStore
+from backend.services.chunk_store import ChunkStore
+from backend.services.rw_lock import ReadWriteLock
+import threading
+import time
+import shutil
+import tempfile
 
-# Paths
+# Paths (file names; local copies live in each store's own data dir, see _private_data_dir)
 INDEX_FILE = "faiss_index.bin"
-METADATA_FILE = "metadata.pkl"
+METADATA_FILE = "metadata.pkl"  # Legacy pickled dict, converted to CHUNK_STORE_FILE on load
+CHUNK_STORE_FILE = "chunks.bin"
+KEYWORD_INDEX_FILE = "keyword_index.bin"
 S3_PREFIX = "vector_store"  # s3://bucket/vector_store/faiss_index.bin
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+SNAPSHOT_FILES = (INDEX_FILE, CHUNK_STORE_FILE, KEYWORD_INDEX_FILE)
+LEGACY_FILES = (INDEX_FILE, METADATA_FILE)
+MAX_COMMIT_ATTEMPTS = 5
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _private_data_dir() -> str:
+    """
+    New <VECTOR_STORE_DATA_DIR>/<pid>-<random> directory for one store's snapshot files.
+    The API and the worker run from the same directory: sharing file names would let one
+    process replace the base the other has mapped (or publish it under its own manifest).
+    Directories left by processes that have exited are removed.
+    """
+    root = os.path.abspath(settings.VECTOR_STORE_DATA_DIR)
+    os.makedirs(root, exist_ok=True)
+    for name in os.listdir(root):
+        pid = name.split("-", 1)[0]
+        if pid.isdigit() and not _process_alive(int(pid)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=root)
+
 
 class VectorStore:
     def __init__(self):
         # AWS Clients
-        self.bedrock = boto3.client('bedrock-runtime', region_name=settings.AWS_REGION)
-        self.s3 = boto3.client('s3', region_name=settings.AWS_REGION)
+        self.bedrock = aws.client('bedrock-runtime')
+        if settings.VECTOR_STORE_LOCAL_DIR:
+            # Offline stand-in for S3 (dev/tests)
+            self.s3 = LocalObjectStore(settings.VECTOR_STORE_LOCAL_DIR)
+        else:
+            self.s3 = aws.client('s3')
+        self.log = SegmentLog(self.s3, settings.S3_BUCKET_NAME, S3_PREFIX)
+        self.data_dir = _private_data_dir()
+        self.write_lock = threading.RLock()  # One change (commit/refresh/compaction) at a time
+        # Searches read the index, chunks and postings under state_lock.read(); anything that
+        # swaps or modifies them in place does so under state_lock.write() (never around S3 calls)
+        self.state_lock = ReadWriteLock()
         
         # Titian Embeddings v1 = 1536 dimensions
         self.dimension = 1536
         self.index = None
-        self.metadata = {}
+        self.metadata = ChunkStore()  # chunk id -> {"text", "source"}
+        self.sources = {}   # file key -> [chunk ids] (reverse index for deletes)
+        self.next_id = 0
+        self.keyword_index = KeywordIndex()
+
+        # With VECTOR_INDEX_MMAP the base index is mapped read-only: new vectors go to a small
+        # in-RAM delta index and deleted base vectors are masked until the next compaction.
+        self.read_only_base = False
+        self.delta_index = None
+        self.delta_ids = set()
+        self.tombstones = set()
+        self._exclude_params = None
+
+        # Persistence state (see SegmentLog)
+        self.base = None
+        self.manifest_version = 0
+        self.segments = []
+        self.garbage = []
+        self._last_refresh = time.time()
+
+        # Concurrent, rate-limited embedding calls
+        self.embedder = EmbeddingPipeline(
+            self._invoke_embedding,
+            max_workers=settings.EMBEDDING_MAX_WORKERS,
+            rate_per_sec=settings.EMBEDDING_REQUESTS_PER_SECOND,
+            max_retries=settings.EMBEDDING_MAX_RETRIES
+        )
+        self.embedding_cache = EmbeddingCache(
+            settings.EMBEDDING_CACHE_PATH,
+            EMBEDDING_MODEL_ID,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+        )
+
+        # Repeat searches should never wait on Bedrock
+        self.query_vector_cache = TTLCache(settings.QUERY_CACHE_MAX_ENTRIES, settings.QUERY_CACHE_TTL_SECONDS)
+        self.result_cache = TTLCache(settings.QUERY_CACHE_MAX_ENTRIES, settings.QUERY_CACHE_TTL_SECONDS)
         
         # Load from S3 on startup (Persistence Layer)
         self.load_from_s3()
 
+    def _path(self, name: str) -> str:
+        return os.path.join(self.data_dir, name)
+
+    def _local_files(self, names) -> Dict[str, str]:
+        """{S3 file name: local path} for SegmentLog uploads/downloads."""
+        return {name: self._path(name) for name in names}
+
     def load_from_s3(self):
-        """Downloads the managed index from S3 on startup."""
+        """Downloads the latest base snapshot from S3 and replays the segments committed after it."""
+        manifest = None
         try:
             print("Downloading Vector Index from S3...")
-            self.s3.download_file(settings.S3_BUCKET_NAME, f"{S3_PREFIX}/{INDEX_FILE}", INDEX_FILE)
-            self.s3.download_file(settings.S3_BUCKET_NAME, f"{S3_PREFIX}/{METADATA_FILE}", METADATA_FILE)
+            manifest = self.log.latest_manifest()
+            base = manifest["base"] if manifest else self.log.legacy_base(LEGACY_FILES)
+            self.log.download_base(base, self._local_files(LEGACY_FILES + SNAPSHOT_FILES))
             print("Download Complete.")
         except Exception as e:
             print(f"No existing index found in S3 (New Deployment?): {e}")
+            base = self.log.legacy_base(LEGACY_FILES)
+            # Pre-S3 deployments kept the legacy files in the working directory
+            for name in LEGACY_FILES:
+                if os.path.exists(name) and not os.path.exists(self._path(name)):
+                    shutil.copyfile(name, self._path(name))
 
-        # Load into memory
-        if os.path.exists(INDEX_FILE):
-             self.index = faiss.read_index(INDEX_FILE)
+        self._load_local_snapshot(base)
+
+        self.base = base
+        self.manifest_version = manifest["version"] if manifest else 0
+        self.segments = []
+        self.garbage = manifest.get("garbage", []) if manifest else []
+        if manifest:
+            for key in manifest["segments"]:
+                self._replay(key)
+            self.next_id = max(self.next_id, manifest.get("next_id", 0))
+            print(f"Loaded manifest v{self.manifest_version}: base v{base['version']} + {len(self.segments)} segments.")
+
+    def _load_local_snapshot(self, base: Dict):
+        with self.state_lock.write():
+            # Vectors (memory-mapped when possible)
+            self._open_index()
+
+            # Chunk texts: mapped chunk store; older snapshots only have the pickled dict
+            if CHUNK_STORE_FILE in base["files"] and os.path.exists(self._path(CHUNK_STORE_FILE)):
+                self.metadata = ChunkStore.open(self._path(CHUNK_STORE_FILE))
+            elif os.path.exists(self._path(METADATA_FILE)):
+                print("Converting metadata.pkl to chunk store...")
+                self.metadata = ChunkStore.convert_pickle(self._path(METADATA_FILE), self._path(CHUNK_STORE_FILE))
+            else:
+                self.metadata = ChunkStore()
+
+            self.sources = self.metadata.ids_by_source()
+            # Never reuse an id, including ones still physically present (HNSW deletes)
+            known_ids = self.metadata.ids.tolist() + list(self.metadata.overlay.keys()) + index_factory.mapped_ids(self.index).tolist()
+            self.next_id = max(known_ids, default=-1) + 1
+
+            # Keyword index (mapped) must cover exactly the chunks in metadata
+            if KEYWORD_INDEX_FILE in base["files"] and os.path.exists(self._path(KEYWORD_INDEX_FILE)):
+                self.keyword_index = KeywordIndex.open(self._path(KEYWORD_INDEX_FILE))
+            else:
+                self.keyword_index = KeywordIndex()
+            if self.keyword_index.num_chunks != len(self.metadata):
+                print("Keyword index missing or stale. Rebuilding from metadata...")
+                KeywordIndex.build(self.metadata).write(self._path(KEYWORD_INDEX_FILE))
+                self.keyword_index = KeywordIndex.open(self._path(KEYWORD_INDEX_FILE))
+            self.result_cache.clear()
+
+    def _open_index(self):
+        """Loads INDEX_FILE (mapped read-only if enabled) and resets the delta/tombstones."""
+        self.read_only_base = False
+        index_path = self._path(INDEX_FILE)
+        if not os.path.exists(index_path):
+            self.index = self._new_index()
+        elif settings.VECTOR_INDEX_MMAP:
+            try:
+                self.index = index_factory.read_index_mmap(index_path)
+                self.read_only_base = True
+            except RuntimeError as e:
+                print(f"Index type cannot be memory-mapped, loading into RAM: {e}")
+                self.index = faiss.read_index(index_path)
         else:
-             self.index = faiss.IndexFlatL2(self.dimension)
-        
-        if os.path.exists(METADATA_FILE):
-            with open(METADATA_FILE, "rb") as f:
-                self.metadata = pickle.load(f)
+            self.index = faiss.read_index(index_path)
+
+        if not index_factory.is_id_mapped(self.index):
+            # Legacy indexes used positional ids (== metadata keys); keep them as chunk ids.
+            # Conversion needs a writable copy; it is mapped from the next snapshot on.
+            self.index = index_factory.to_id_mapped(faiss.read_index(index_path))
+            self.read_only_base = False
+        index_factory.apply_search_params(self.index, settings.VECTOR_INDEX_NPROBE, settings.VECTOR_INDEX_EF_SEARCH)
+
+        self.delta_index = faiss.IndexIDMap2(faiss.IndexFlatL2(self.dimension))
+        self.delta_ids = set()
+        self.tombstones = set()
+        self._exclude_params = None
+
+    def _writable_index(self):
+        """Full in-RAM index with the delta merged and tombstones removed (copy of the mapped base)."""
+        if not self.read_only_base:
+            return self.index
+        # Only this store writes its data dir, so the file is still the base we mapped
+        index = index_factory.to_id_mapped(faiss.read_index(self._path(INDEX_FILE)))
+        if self.tombstones:
+            index_factory.remove_ids(index, np.array(sorted(self.tombstones), dtype='int64'))
+        if self.delta_index.ntotal:
+            ids = faiss.vector_to_array(self.delta_index.id_map)
+            index.add_with_ids(self.delta_index.index.reconstruct_n(0, self.delta_index.ntotal), ids)
+        return index
 
-    def sync_to_s3(self):
-        """Uploads the current index to S3 for durability."""
+    def _save_local_snapshot(self):
+        # Write-then-rename: searches still using the old mapped files keep a valid view
+        index_path = self._path(INDEX_FILE)
+        faiss.write_index(self._writable_index(), f"{index_path}.tmp")
+        os.replace(f"{index_path}.tmp", index_path)
+        self.metadata.write(self._path(CHUNK_STORE_FILE))
+        self.keyword_index.write(self._path(KEYWORD_INDEX_FILE))
+
+        # Re-open so the snapshot (not the in-RAM overlay/delta) backs reads
+        with self.state_lock.write():
+            self.metadata = ChunkStore.open(self._path(CHUNK_STORE_FILE))
+            self.keyword_index = KeywordIndex.open(self._path(KEYWORD_INDEX_FILE))
+            if settings.VECTOR_INDEX_MMAP or self.read_only_base:
+                self._open_index()
+
+    def _add_vectors(self, ids: np.ndarray, vectors: np.ndarray):
+        if self.read_only_base:
+            self.delta_index.add_with_ids(vectors, ids)
+            self.delta_ids.update(ids.tolist())
+        else:
+            self.index.add_with_ids(vectors, ids)
+
+    def _remove_vectors(self, ids: List[int]):
+        if not self.read_only_base:
+            index_factory.remove_ids(self.index, np.array(ids, dtype='int64'))
+            return
+        in_delta = [i for i in ids if i in self.delta_ids]
+        if in_delta:
+            index_factory.remove_ids(self.delta_index, np.array(in_delta, dtype='int64'))
+            self.delta_ids.difference_update(in_delta)
+        self.tombstones.update(i for i in ids if i not in in_delta)
+        self._exclude_params = None
+
+    def _search_vectors(self, query_vector: List[float], n: int):
+        """Top-n (distances, ids) across the base index and the delta, skipping tombstoned ids."""
+        q = np.array([query_vector]).astype('float32')
+        if self.tombstones and self._exclude_params is None:
+            self._exclude_params = index_factory.excluding_params(
+                self.index, np.array(sorted(self.tombstones), dtype='int64'),
+                settings.VECTOR_INDEX_NPROBE, settings.VECTOR_INDEX_EF_SEARCH
+            )
+        distances, indices = self.index.search(q, n, params=self._exclude_params if self.tombstones else None)
+        if not self.delta_index.ntotal:
+            return distances[0], indices[0]
+
+        d_distances, d_indices = self.delta_index.search(q, min(n, self.delta_index.ntotal))
+        distances = np.concatenate([distances[0], d_distances[0]])
+        indices = np.concatenate([indices[0], d_indices[0]])
+        distances[indices == -1] = np.inf
+        order = np.argsort(distances, kind='stable')[:n]
+        return distances[order], indices[order]
+
+    def refresh(self):
+        """Catches up with changes other processes committed after our manifest version."""
+        manifest = self.log.latest_manifest()
+        if manifest is None or manifest["version"] == self.manifest_version:
+            return
+        if manifest["base"]["version"] != self.base["version"]:
+            print("Newer base snapshot found. Reloading Vector Index...")
+            self.load_from_s3()
+            return
+
+        applied = set(self.segments)
+        for key in manifest["segments"]:
+            if key not in applied:
+                self._replay(key)
+        self.manifest_version = manifest["version"]
+        self.garbage = manifest.get("garbage", [])
+        self.next_id = max(self.next_id, manifest.get("next_id", 0))
+
+    def maybe_refresh(self):
+        """refresh() at most every VECTOR_STORE_REFRESH_SECONDS, so read-only processes see the worker's commits."""
+        now = time.time()
+        if now - self._last_refresh < settings.VECTOR_STORE_REFRESH_SECONDS:
+            return
+        # Called from concurrent searches: if a commit, compaction or another refresh holds the
+        # lock, serve the current state now and refresh on a later search
+        if not self.write_lock.acquire(blocking=False):
+            return
         try:
-            # Save locally first
-            faiss.write_index(self.index, INDEX_FILE)
-            with open(METADATA_FILE, "wb") as f:
-                pickle.dump(self.metadata, f)
-            
-            # Upload
-            print("Syncing Vector Index to S3...")
-            self.s3.upload_file(INDEX_FILE, settings.S3_BUCKET_NAME, f"{S3_PREFIX}/{INDEX_FILE}")
-            self.s3.upload_file(METADATA_FILE, settings.S3_BUCKET_NAME, f"{S3_PREFIX}/{METADATA_FILE}")
-            print("Sync Complete.")
+            self._last_refresh = now
+            self.refresh()
         except Exception as e:
-            print(f"Failed to sync to S3: {e}")
+            print(f"Vector Index refresh failed: {e}")
+        finally:
+            self.write_lock.release()
 
-    def embed_text(self, text: str) -> List[float]:
-        """Generates embeddings using AWS Bedrock (Titan) with retry logic."""
-        import time
-        retries = 0
-        max_retries = 5
-        
-        while retries < max_retries:
+    def _replay(self, segment_key: str):
+        segment = self.log.read_segment(segment_key)
+        self._apply_segment(segment["ids"], segment["vectors"], segment["texts"], segment["source"], segment["removed_sources"])
+        self.segments.append(segment_key)
+
+    def _apply_segment(self, ids, vectors, texts: List[str], source: Optional[str], removed_sources: List[str]):
+        """Applies one delta to the in-memory index: drop replaced/deleted files, then add new chunks."""
+        with self.state_lock.write():
+            for removed in removed_sources:
+                self._remove_chunks(removed)
+
+            if len(ids):
+                ids = np.asarray(ids, dtype='int64')
+                self._add_vectors(ids, np.asarray(vectors, dtype='float32'))
+                for chunk_id, chunk in zip(ids.tolist(), texts):
+                    self.metadata[chunk_id] = {"text": chunk, "source": source}
+                    self.keyword_index.add(chunk_id, chunk)
+                self.sources.setdefault(source, []).extend(ids.tolist())
+                self.next_id = max(self.next_id, int(ids.max()) + 1)
+
+            # Index changed -> cached rankings are stale (query vectors are still valid)
+            self.result_cache.clear()
+
+    def _new_index(self):
+        """Empty index of the configured type. IVF types need training data, so start Flat until migrated."""
+        index = index_factory.create_index(
+            settings.VECTOR_INDEX_TYPE, self.dimension,
+            nlist=settings.VECTOR_INDEX_NLIST,
+            pq_m=settings.VECTOR_INDEX_PQ_M,
+            hnsw_m=settings.VECTOR_INDEX_HNSW_M
+        )
+        if not index.is_trained:
+            print(f"Index type '{settings.VECTOR_INDEX_TYPE}' needs training. Starting with flat; run scripts/migrate_index.py once data exists.")
+            index = faiss.IndexFlatL2(self.dimension)
+        return index_factory.to_id_mapped(index)
+
+    def rebuild_index(self, index_type: str):
+        """Rebuilds the live vectors into `index_type` (trains on existing vectors). Ids are preserved."""
+        ids = np.array(sorted(self.metadata.keys()), dtype='int64')
+        vectors = index_factory.extract_vectors(self._writable_index(), ids)
+        index = index_factory.build_index(
+            vectors, ids, index_type, self.dimension,
+            nlist=settings.VECTOR_INDEX_NLIST,
+            pq_m=settings.VECTOR_INDEX_PQ_M,
+            hnsw_m=settings.VECTOR_INDEX_HNSW_M
+        )
+        index_factory.apply_search_params(index, settings.VECTOR_INDEX_NPROBE, settings.VECTOR_INDEX_EF_SEARCH)
+        # New index is in RAM and already contains the delta; compact() persists (and re-maps) it
+        with self.state_lock.write():
+            self.index = index
+            self.read_only_base = False
+            self.delta_index.reset()
+            self.delta_ids = set()
+            self.tombstones = set()
+            self._exclude_params = None
+            self.result_cache.clear()
+
+    def install_snapshot(self, index, metadata: ChunkStore, keyword_index: KeywordIndex, start: Optional[Dict] = None):
+        """
+        Replaces the whole store with an index built offline (bulk reindex) and publishes it as a new base.
+        `start` is the latest manifest from when the build began: changes committed since then
+        (uploads, deletes) are replayed onto the new snapshot before it is published, so none are lost.
+        Readers keep serving the previous base until they pick up the new manifest.
+        """
+        index_factory.apply_search_params(index, settings.VECTOR_INDEX_NPROBE, settings.VECTOR_INDEX_EF_SEARCH)
+        with self.write_lock:
+            with self.state_lock.write():
+                self.index = index
+                self.metadata = metadata
+                self.keyword_index = keyword_index
+                self.sources = metadata.ids_by_source()
+                self.next_id = max(self.next_id, max(metadata.keys(), default=-1) + 1)
+                self.read_only_base = False
+                self.delta_index.reset()
+                self.delta_ids = set()
+                self.tombstones = set()
+                self._exclude_params = None
+                self.result_cache.clear()
+
+            replayed = set()
+            for attempt in range(MAX_COMMIT_ATTEMPTS):
+                latest = self.log.latest_manifest()
+                for key in self.log.segments_since(start, latest):
+                    if key in replayed:
+                        continue
+                    # Staged chunk ids may overlap the live ones: give replayed chunks fresh ids
+                    segment = self.log.read_segment(key)
+                    ids = np.arange(self.next_id, self.next_id + len(segment["ids"]), dtype='int64')
+                    self._apply_segment(ids, segment["vectors"], segment["texts"], segment["source"], segment["removed_sources"])
+                    replayed.add(key)
+                if latest:
+                    # The new base supersedes the latest manifest's base and segments
+                    self.base, self.segments, self.garbage = latest["base"], latest["segments"], latest.get("garbage", [])
+                    self.manifest_version = latest["version"]
+                    self.next_id = max(self.next_id, latest.get("next_id", 0))
+                if self.compact(catch_up=False):
+                    print(f"Installed new snapshot ({len(replayed)} changes committed during the build replayed).")
+                    return
+                print(f"Manifest moved while publishing. Catching up ({attempt + 1}/{MAX_COMMIT_ATTEMPTS})...")
+
+        raise Exception("Failed to publish Vector Index snapshot: too many concurrent writers")
+
+    def _commit(self, texts: List[str], vectors, source: Optional[str], removed_sources: List[str]):
+        """
+        Persists one change as an immutable segment + new manifest version, then applies it locally.
+        Upload size is proportional to the change, not the corpus. If another process wins the
+        manifest version, we catch up and retry with fresh chunk ids.
+        """
+        with self.write_lock:
+            for attempt in range(MAX_COMMIT_ATTEMPTS):
+                self.refresh()
+                version = self.manifest_version + 1
+                ids = np.arange(self.next_id, self.next_id + len(texts), dtype='int64')
+                segment_key = self.log.write_segment(version, ids, vectors, texts, source, removed_sources)
+                manifest = {
+                    "version": version,
+                    "base": self.base,
+                    "segments": self.segments + [segment_key],
+                    "next_id": self.next_id + len(texts),
+                    "garbage": self.garbage
+                }
+                try:
+                    self.log.commit(manifest)
+                except ManifestConflict:
+                    print(f"Manifest v{version} taken by another writer. Retrying ({attempt + 1}/{MAX_COMMIT_ATTEMPTS})...")
+                    self.log.delete([segment_key])
+                    continue
+
+                self._apply_segment(ids, vectors, texts, source, removed_sources)
+                self.segments.append(segment_key)
+                self.manifest_version = version
+                print(f"Committed segment v{version} ({len(texts)} chunks).")
+
+                if len(self.segments) >= settings.VECTOR_STORE_COMPACT_EVERY:
+                    self.compact()
+                return
+
+        raise Exception("Failed to commit Vector Index change: too many concurrent writers")
+
+    def compact(self, catch_up: bool = True) -> bool:
+        """
+        Uploads a full base snapshot and starts a fresh manifest with no segments.
+        Objects made obsolete are deleted one compaction later, so slow readers can still finish loading.
+        With catch_up=False the local state is published as is (install_snapshot catches up itself).
+        Returns False if another writer committed first; nothing is published then.
+        """
+        with self.write_lock:
+            # Save locally first
+            if catch_up:
+                self.refresh()
+            self._save_local_snapshot()
+
+            version = self.manifest_version + 1
+            print("Compacting Vector Index to S3...")
+            base = self.log.write_base(version, self._local_files(SNAPSHOT_FILES))
+            obsolete = list(self.segments)
+            if self.base["version"] > 0:
+                obsolete += list(self.base["files"].values())
+            manifest = {"version": version, "base": base, "segments": [], "next_id": self.next_id, "garbage": obsolete}
             try:
-                body = json.dumps({"inputText": text})
-                response = self.bedrock.invoke_model(
-                    body=body,
-                    modelId="amazon.titan-embed-text-v1",
-                    accept="application/json",
-                    contentType="application/json"
-                )
-                response_body = json.loads(response.get("body").read())
-                embedding = np.array(response_body.get("embedding"))
-                
-                # Normalize vector to L2 unit length
-                # This ensures L2 Distance correlates to Cosine Similarity
-                norm = np.linalg.norm(embedding)
-                if norm > 0:
-                     embedding = embedding / norm
-                     
-                return embedding.tolist()
-
-            except Exception as e:
-                # Handle Throttling specifically
-                if "ThrottlingException" in str(e):
-                    wait_time = (2 ** retries) # Exponential Backoff: 1, 2, 4, 8, 16 sec
-                    print(f"Bedrock Throttled. Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
-                    retries += 1
-                else:
-                    # Other errors (e.g. Validation) -> Fail immediately
-                    print(f"Embedding Error: {e}")
-                    raise e
+                self.log.commit(manifest)
+            except ManifestConflict:
+                self.log.delete(list(base["files"].values()))
+                if catch_up:
+                    print("Another writer committed during compaction. Skipping; the next commit will retry.")
+                return False
+
+            previous_garbage, previous_base_version = self.garbage, self.base["version"]
+            self.base, self.segments, self.manifest_version, self.garbage = base, [], version, obsolete
+            self.log.delete(previous_garbage)
+            # Keep the manifests since the previous base: a writer that is a few versions behind must
+            # still hit a conflict on an existing version, not "win" a pruned one nobody reads
+            self.log.prune_manifests(previous_base_version)
+            print("Compaction Complete.")
+            return True
+
+    def _invoke_embedding(self, text: str) -> List[float]:
+        """Single raw Bedrock (Titan) call. Retries/throttling are handled by the pipeline."""
+        body = json.dumps({"inputText": text})
+        response = self.bedrock.invoke_model(
+            body=body,
+            modelId=EMBEDDING_MODEL_ID,
+            accept="application/json",
+            contentType="application/json"
+        )
+        response_body = json.loads(response.get("body").read())
+        embedding = np.array(response_body.get("embedding"))
         
-        raise Exception("Max Retries Exceeded for Bedrock Embedding")
+        # Normalize vector to L2 unit length
+        # This ensures L2 Distance correlates to Cosine Similarity
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+             embedding = embedding / norm
+             
+        return embedding.tolist()
+
+    def embed_text(self, text: str) -> List[float]:
+        """Generates embeddings using AWS Bedrock (Titan) with retry logic. Checks the local cache first."""
+        cached = self.embedding_cache.get(text)
+        if cached is not None:
+            return cached
+        embedding = self.embedder.embed_one(text)
+        self.embedding_cache.put(text, embedding)
+        return embedding
+
+    def embed_chunks(self, chunks: List[str]) -> List[Optional[List[float]]]:
+        """Embeds many chunks; only cache misses go to Bedrock (concurrently). Failed chunks are None."""
+        results = [self.embedding_cache.get(c) for c in chunks]
+        missing = [i for i, r in enumerate(results) if r is None]
+
+        if missing:
+            fresh = self.embedder.embed_many([chunks[i] for i in missing])
+            for i, emb in zip(missing, fresh):
+                results[i] = emb
+            self.embedding_cache.put_many([(chunks[i], emb) for i, emb in zip(missing, fresh) if emb is not None])
+
+        # Per-call counts only: stats() would flush the batched hit writes on every document
+        print(f"Embedded {len(chunks)} chunks ({len(chunks) - len(missing)} from cache, {len(missing)} from Bedrock).")
+        return results
 
     def _smart_chunk(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
         """
@@ -140,103 +568,152 @@ class VectorStore:
             
         return chunks
 
-    def add_document(self, text: str, file_key: str):
+    def prepare_chunks(self, text: str) -> List[str]:
+        """Cleans and chunks a document's text exactly as add_document does."""
         # Clean text
         text = " ".join(text.split()) # Remove excessive whitespace
         
         # Smart Chunking
         # Use larger overlap to prevent splitting phrases like "cremation grounds"
-        chunks = self._smart_chunk(text, chunk_size=400, overlap=200) 
+        return self._smart_chunk(text, chunk_size=400, overlap=200) 
+
+    def add_document(self, text: str, file_key: str):
+        """Indexes a document. Re-adding an existing file key replaces its previous chunks."""
+        chunks = self.prepare_chunks(text)
         
         if not chunks:
             return
 
-        # Generate Embeddings via Bedrock
+        # Generate Embeddings via Bedrock (cache first, then concurrent with shared rate limit)
         embeddings = []
         valid_chunks = []
         
-        for chunk in chunks:
-            try:
-                emb = self.embed_text(chunk)
+        for chunk, emb in zip(chunks, self.embed_chunks(chunks)):
+            if emb is not None:
                 embeddings.append(emb)
                 valid_chunks.append(chunk)
-            except Exception as e:
-                print(f"Error embedding chunk: {e}")
-                continue
 
         if not embeddings:
             return
 
-        # Add to FAISS
-        start_id = self.index.ntotal
-        self.index.add(np.array(embeddings).astype('float32'))
-        
-        # Update metadata
-        for i, chunk in enumerate(valid_chunks):
-            self.metadata[start_id + i] = {"text": chunk, "source": file_key}
-            
-        # Trigger S3 Sync
-        self.sync_to_s3()
+        # Persist as a delta segment (replaces any previous version of this file), then add to FAISS
+        self._commit(valid_chunks, np.array(embeddings).astype('float32'), file_key, [file_key])
+
+    def _query_vector(self, query: str) -> List[float]:
+        key = normalize_query(query)
+        query_vector = self.query_vector_cache.get(key)
+        if query_vector is None:
+            query_vector = self.embed_text(query)
+            self.query_vector_cache.put(key, query_vector)
+        return query_vector
+
+    def _remove_chunks(self, file_key: str) -> int:
+        """Removes a file's vectors, metadata and keyword postings. Cost is proportional to the file's chunk count."""
+        ids = self.sources.pop(file_key, [])
+        if not ids:
+            return 0
+
+        self._remove_vectors(ids)
+        for chunk_id in ids:
+            meta = self.metadata.pop(chunk_id, None)
+            if meta is not None:
+                self.keyword_index.remove(chunk_id, meta.get('text', ''))
+        return len(ids)
+
+    def delete_document(self, file_key: str) -> int:
+        """Deletes all chunks of `file_key` from the index. Returns the number of chunks removed."""
+        try:
+            with self.write_lock:
+                self.refresh()
+                removed = len(self.sources.get(file_key, []))
+                if removed:
+                    self._commit([], np.zeros((0, self.dimension), dtype='float32'), None, [file_key])
+                return removed
+        except Exception as e:
+            print(f"Failed to delete {file_key} from Vector Index: {e}")
+            return 0
 
     def search(self, query: str, k: int = 5) -> List[Dict]:
+        # Pick up documents the ingestion worker committed (clears stale cached results)
+        self.maybe_refresh()
+        result_key = (normalize_query(query), k)
+        if settings.RESULT_CACHE_ENABLED:
+            cached = self.result_cache.get(result_key)
+            if cached is not None:
+                return list(cached)
+
         try:
-            # 1. Vector Search
-            query_vector = self.embed_text(query)
-            # Fetch more candidates
-            distances, indices = self.index.search(np.array([query_vector]).astype('float32'), k * 3) 
+            # 1. Vector Search (query embedding may call Bedrock: outside the lock)
+            query_vector = self._query_vector(query)
+            # Refreshes on other request threads modify the index and chunks in place: read them under
+            # the shared lock, and only cache what was computed against the current generation
+            with self.state_lock.read():
+                generation = self.result_cache.generation
+                # Fetch more candidates
+                distances, indices = self._search_vectors(query_vector, k * 3)
             
-            results = []
-            seen_texts = set()
-
-            # 2. Collect Vector Results
-            if indices.size > 0:
-                for i, idx in enumerate(indices[0]):
-                    if idx != -1 and idx in self.metadata:
-                        meta = self.metadata[idx]
-                        # Score conversion: L2 Dist -> Similarity
-                        # L2 can be large. We use 1/(1+dist) for simple ranking.
-                        dist = float(distances[0][i])
-                        score = 1 / (1 + dist)
+                results = []
+                seen_texts = set()
+
+                # 2. Collect Vector Results
+                if indices.size > 0:
+                    for i, idx in enumerate(indices):
+                        meta = self.metadata.get(idx) if idx != -1 else None
+                        if meta is not None:
+                            # Score conversion: L2 Dist -> Similarity
+                            # L2 can be large. We use 1/(1+dist) for simple ranking.
+                            dist = float(distances[i])
+                            score = 1 / (1 + dist)
                         
-                        res = {
-                            "score": score,
-                            "source": meta.get('source'),
-                            "content": meta.get('text'),
-                            "metadata": meta,
-                            "tags": ["Semantic"]
-                        }
-                        results.append(res)
-                        seen_texts.add(meta.get('text'))
-
-            # 3. Smart Keyword Fallback (Match ALL terms)
-            # This catches cases where "cremation" and "grounds" are in the chunk,
-            # but the vector model missed the semantic connection.
-            q_lower = query.lower()
-            terms = q_lower.split()
-            
-            # Only run if we have meaningful terms (avoid matching "the")
-            meaningful_terms = [t for t in terms if len(t) > 2]
-            
-            if meaningful_terms:
-                for idx, meta in self.metadata.items():
-                    text = meta.get('text', '').lower()
-                    # Check if ALL terms are present in this chunk
-                    if all(term in text for term in meaningful_terms):
-                        original_text = meta.get('text', '')
-                        if original_text not in seen_texts:
                             res = {
-                                "score": 1.5, # Boost (High Priority)
+                                "score": score,
                                 "source": meta.get('source'),
-                                "content": original_text,
-                                "metadata": meta,
-                                "tags": ["Keyword Match"]
+                                "content": meta.get('text'),
+                                "metadata": {"chunk_id": int(idx), "source": meta.get('source')},
+                                "tags": ["Semantic"]
                             }
                             results.append(res)
-                            seen_texts.add(original_text)
+                            seen_texts.add(meta.get('text'))
+
+                # 3. Smart Keyword Fallback (Match ALL terms)
+                # This catches cases where "cremation" and "grounds" are in the chunk,
+                # but the vector model missed the semantic connection.
+                q_lower = query.lower()
+                terms = q_lower.split()
+            
+                # Only run if we have meaningful terms (avoid matching "the")
+                meaningful_terms = [t for t in terms if len(t) > 2]
+            
+                if meaningful_terms:
+                    # Posting-list intersection instead of scanning every chunk.
+                    # Keyword hits (1.5) always outrank semantic ones (<= 1), so only the first k can be returned.
+                    keyword_hits = 0
+                    for idx in self.keyword_index.search(meaningful_terms):
+                        if keyword_hits >= k:
+                            break
+                        meta = self.metadata.get(idx)
+                        if meta is not None:
+                            original_text = meta.get('text', '')
+                            if original_text not in seen_texts:
+                                res = {
+                                    "score": 1.5, # Boost (High Priority)
+                                    "source": meta.get('source'),
+                                    "content": original_text,
+                                    "metadata": {"chunk_id": int(idx), "source": meta.get('source')},
+                                    "tags": ["Keyword Match"]
+                                }
+                                results.append(res)
+                                seen_texts.add(original_text)
+                                keyword_hits += 1
+
+                # 4. Sort & Limit
+                results.sort(key=lambda x: x['score'], reverse=True)
+                results = results[:k]
 
-            # 4. Sort & Limit
-            results.sort(key=lambda x: x['score'], reverse=True)
-            return results[:k]
+            if settings.RESULT_CACHE_ENABLED:
+                # Dropped if the index changed since we read it
+                self.result_cache.put(result_key, results, generation=generation)
+            return list(results)
 
         except Exception as e:
             print(f"Search error: {e}")
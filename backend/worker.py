@@ -0,0 +1,93 @@
+"""
+Ingestion worker: pulls jobs from the durable queue and runs them outside the API process.
+
+    python -m backend.worker [--concurrency N]
+"""
+from dotenv import load_dotenv
+load_dotenv() # Load Environment Variables FIRST
+
+import argparse
+import signal
+import threading
+from backend.config import settings
+
+# Services are imported inside the functions below: OCR child processes are spawned and re-import
+# this module as their __main__, and must not build a job queue and vector store each.
+
+stop = threading.Event()
+
+
+def run_job(job):
+    from backend.services.job_queue import job_queue, DEAD
+    from backend.services.ingestion import HANDLERS, update_status
+
+    handler = HANDLERS.get(job["kind"])
+    payload = job["payload"]
+    try:
+        if handler is None:
+            raise Exception(f"Unknown job kind '{job['kind']}'")
+        handler(payload)
+        job_queue.complete(job["id"])
+    except Exception as e:
+        status = job_queue.fail(job, str(e))
+        print(f"Job {job['id']} failed (attempt {job['attempt']}/{job['max_attempts']}): {e}")
+        filename = payload.get("filename")
+        if filename:
+            try:
+                # Retries keep the file 'queued'; only dead-lettered jobs are shown as failed
+                update_status(filename, 'failed' if status == DEAD else 'queued', str(e))
+            except Exception as status_error:
+                print(f"Failed to update status for {filename}: {status_error}")
+
+
+def mark_dead(job, error):
+    from backend.services.ingestion import update_status
+
+    print(f"Job {job['id']} dead-lettered: {error}")
+    filename = job["payload"].get("filename")
+    if filename:
+        try:
+            update_status(filename, 'failed', error)
+        except Exception as status_error:
+            print(f"Failed to update status for {filename}: {status_error}")
+
+
+def worker_loop(name):
+    from backend.services.job_queue import job_queue
+
+    print(f"{name} started.")
+    while not stop.is_set():
+        try:
+            job = job_queue.claim(on_dead=mark_dead)
+        except Exception as e:
+            print(f"{name}: failed to claim a job: {e}")
+            job = None
+        if job is None:
+            stop.wait(settings.INGEST_POLL_SECONDS)
+            continue
+        print(f"{name}: running job {job['id']} ({job['kind']}, attempt {job['attempt']})")
+        run_job(job)
+    print(f"{name} stopped.")
+
+
+def main(concurrency):
+    from backend.services.job_queue import job_queue
+    import backend.services.ingestion  # Load the vector store once, before the threads start
+
+    # Finish in-flight jobs on SIGTERM/SIGINT; unfinished leases are re-run by the next worker anyway
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    print(f"Ingestion worker starting with concurrency {concurrency}. Queue: {job_queue.stats()}")
+    threads = [threading.Thread(target=worker_loop, args=(f"worker-{i + 1}",)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run ingestion jobs from the queue.")
+    parser.add_argument("--concurrency", type=int, default=settings.INGEST_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    main(args.concurrency)
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { UploadCloud, Search, FileText, LogOut, Loader2, History, RotateCcw, ShieldCheck } from 'lucide-react';
 import { Authenticator } from '@aws-amplify/ui-react';
 import { fetchAuthSession } from 'aws-amplify/auth';
@@ -17,8 +17,12 @@ const API_URL = import.meta.env.PROD ? "" : "http://localhost:8000";
 function Dashboard({ user, signOut }) {
   const [activeTab, setActiveTab] = useState('browser');
   const [files, setFiles] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
+  const [filenamePrefix, setFilenamePrefix] = useState(''); // searchQuery, debounced (metadata mode)
+  const listRequest = useRef(0);
   const [searchResults, setSearchResults] = useState(null);
   const [searchMode, setSearchMode] = useState('metadata');
 
@@ -158,17 +162,32 @@ function Dashboard({ user, signOut }) {
   const isAdmin = userGroups.includes('Admins');
   const isContributor = userGroups.includes('Contributors') || isAdmin;
 
-  const fetchFiles = async () => {
+  const fetchFiles = async (cursor = null) => {
+    // Only the latest listing may update state (filters can change while a page is in flight)
+    const request = ++listRequest.current;
     try {
-      setLoading(true);
-      const { data } = await axios.get(`${API_URL}/files`);
-      // Sort by file_id 
-      setFiles(data);
+      (cursor ? setLoadingMore : setLoading)(true);
+      if (!cursor) {
+        setFiles([]);
+        setNextCursor(null);
+      }
+      // Paginated listing, filtered server-side by filename prefix and tag; pages continue via next_cursor
+      const params = { limit: 50 };
+      if (cursor) params.cursor = cursor;
+      if (filenamePrefix) params.prefix = filenamePrefix;
+      if (selectedTags.length > 0) params.tag = selectedTags[0];
+      const { data } = await axios.get(`${API_URL}/files`, { params });
+      if (request !== listRequest.current) return;
+      setFiles(prev => cursor ? [...prev, ...data.items] : data.items);
+      setNextCursor(data.next_cursor);
       setSearchResults(null);
     } catch (error) {
       console.error("Error fetching files", error);
     } finally {
-      setLoading(false);
+      if (request === listRequest.current) {
+        setLoading(false);
+        setLoadingMore(false);
+      }
     }
   };
 
@@ -207,11 +226,23 @@ function Dashboard({ user, signOut }) {
 
   useEffect(() => {
     if (activeTab === 'browser') {
-      fetchFiles();
       fetchTags();
     }
   }, [activeTab]);
 
+  // Filename filter: ask the server once typing pauses, not on every keystroke
+  useEffect(() => {
+    if (searchMode !== 'metadata') return;
+    const timer = setTimeout(() => setFilenamePrefix(searchQuery.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery, searchMode]);
+
+  useEffect(() => {
+    if (activeTab === 'browser') {
+      fetchFiles();
+    }
+  }, [activeTab, selectedTags, filenamePrefix]);
+
   return (
     <div className="min-h-screen font-sans text-gray-900 selection:bg-indigo-100 selection:text-indigo-900">
 
@@ -321,7 +352,7 @@ function Dashboard({ user, signOut }) {
                         setSearchQuery(e.target.value);
                       }}
                       onKeyDown={searchMode === 'semantic' ? executeSearch : undefined}
-                      placeholder={searchMode === 'semantic' ? "Ask a question about content... (Press Enter)" : "Filter by filename..."}
+                      placeholder={searchMode === 'semantic' ? "Ask a question about content... (Press Enter)" : "Filter by filename (starts with)..."}
                       className={`pl-12 pr-6 py-3 border-none rounded-2xl shadow-sm focus:ring-2 focus:ring-indigo-500/20 w-full transition-all text-gray-900 font-medium ${searchMode === 'semantic' ? "bg-indigo-50/50 focus:bg-white" : "bg-white/80"
                         }`}
                     />
@@ -365,36 +396,37 @@ function Dashboard({ user, signOut }) {
                           availableTags={availableTags}
                           selectedTags={selectedTags}
                           onToggleTag={(tagName) => {
-                            setSelectedTags(prev =>
-                              prev.includes(tagName) ? prev.filter(t => t !== tagName) : [...prev, tagName]
-                            );
+                            // One tag at a time: /files filters by a single tag server-side
+                            setSelectedTags(prev => prev.includes(tagName) ? [] : [tagName]);
                           }}
                         />
 
                         <div className="grid gap-4">
-                          {files
-                            .filter(f => {
-                              // Filename Search
-                              const nameMatch = f.filename.toLowerCase().includes(searchQuery.toLowerCase());
-                              // Tag Filter
-                              const tagMatch = selectedTags.length === 0 || selectedTags.some(t => f.tags?.includes(t));
-                              return nameMatch && tagMatch;
-                            })
-                            .map((file) => (
-                              <FileCard
-                                key={file.file_id}
-                                file={file}
-                                viewingVersions={viewingVersions}
-                                versions={versions}
-                                onPreview={handlePreview}
-                                onFetchVersions={fetchVersions}
-                                availableTags={availableTags}
-                                onUpdateFileTags={handleUpdateFileTags}
-                                isContributor={isContributor}
-                                onDelete={handleDeleteFile}
-                                onDownload={handleDownloadFile}
-                              />
-                            ))}
+                          {files.map((file) => (
+                            <FileCard
+                              key={file.file_id}
+                              file={file}
+                              viewingVersions={viewingVersions}
+                              versions={versions}
+                              onPreview={handlePreview}
+                              onFetchVersions={fetchVersions}
+                              availableTags={availableTags}
+                              onUpdateFileTags={handleUpdateFileTags}
+                              isContributor={isContributor}
+                              onDelete={handleDeleteFile}
+                              onDownload={handleDownloadFile}
+                            />
+                          ))}
+
+                          {nextCursor && (
+                            <button
+                              onClick={() => fetchFiles(nextCursor)}
+                              disabled={loadingMore}
+                              className="mx-auto px-6 py-2 rounded-xl text-sm font-bold text-indigo-600 bg-white/80 hover:bg-white shadow-sm transition-all disabled:opacity-50"
+                            >
+                              {loadingMore ? "Loading..." : "Load more"}
+                            </button>
+                          )}
 
                           {files.length === 0 && !loading && (
                             <div className="text-center py-20 glass rounded-3xl border-dashed border-2 border-gray-200">
@@ -0,0 +1,142 @@
+"""
+Measures API throughput against local stand-ins for DynamoDB (no AWS account or network needed).
+
+Each stand-in call blocks for --latency ms like a real boto3 round trip. With the async endpoints
+and the shared AWS thread pool, throughput should grow with concurrency until the pool
+(AWS_MAX_POOL_CONNECTIONS) is saturated.
+
+    python scripts/benchmark_api.py --requests 500 --latency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Keep everything offline and out of the working directory
+WORK_DIR = tempfile.mkdtemp(prefix="rnd-bench-")
+os.environ.setdefault("VECTOR_STORE_LOCAL_DIR", os.path.join(WORK_DIR, "s3"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(WORK_DIR, "embedding_cache.db"))
+os.environ.setdefault("CONTENT_CACHE_PATH", os.path.join(WORK_DIR, "content_cache.db"))
+os.environ.setdefault("INGEST_QUEUE_PATH", os.path.join(WORK_DIR, "ingest_queue.db"))
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.chdir(WORK_DIR)  # Vector store snapshot files are written relative to the cwd
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from backend.config import settings
+from backend.services.aws_clients import aws
+
+
+class StandInTable:
+    """DynamoDB Table stand-in: fixed items, every call blocks like a network round trip."""
+
+    def __init__(self, items, latency):
+        self.items = items
+        self.latency = latency
+
+    def _call(self, response=None):
+        time.sleep(self.latency)
+        return response or {}
+
+    def scan(self, **kwargs):
+        if kwargs.get('Select') == 'COUNT':
+            return self._call({'Count': len(self.items)})
+        return self._call({'Items': list(self.items)})
+
+    def query(self, **kwargs):
+        # First page only: enough to measure a paginated listing
+        return self._call({'Items': list(self.items[:kwargs.get('Limit', len(self.items))])})
+
+    def put_item(self, **kwargs):
+        return self._call()
+
+    def update_item(self, **kwargs):
+        return self._call()
+
+    def delete_item(self, **kwargs):
+        return self._call()
+
+    def batch_writer(self):
+        return StandInBatchWriter(self)
+
+
+class StandInBatchWriter:
+    """One simulated round trip per 25 puts, like BatchWriteItem."""
+
+    def __init__(self, table):
+        self.table = table
+        self.pending = 0
+
+    def __enter__(self):
+        return self
+
+    def put_item(self, Item):
+        self.pending += 1
+        if self.pending == 25:
+            self.table._call()
+            self.pending = 0
+
+    def __exit__(self, *exc):
+        if self.pending:
+            self.table._call()
+
+
+def install_stand_ins(latency):
+    files = [{'file_id': f'doc{i}.pdf', 'filename': f'doc{i}.pdf', 'size': 1024, 'status': 'indexed',
+              'tags': ['research'] if i % 2 else [], 'list_pk': 'file', 'filename_lower': f'doc{i}.pdf'}
+             for i in range(200)]
+    tags = [{'name': 'research', 'color': '#3b82f6'}, {'name': 'finance', 'color': '#10b981'}]
+    aws._tables[settings.DYNAMODB_TABLE] = StandInTable(files, latency)
+    aws._tables['rnd-hub-tags'] = StandInTable(tags, latency)
+    aws._tables[settings.ACTIVITY_TABLE] = StandInTable([], latency)
+    aws._tables['rnd-hub-file-tags'] = StandInTable([], latency)
+
+
+async def run_level(client, path, total, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return total / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+async def benchmark(total, levels, latency_ms):
+    install_stand_ins(latency_ms / 1000)
+    # Imported after the stand-ins are in place: modules grab their tables at import time
+    from backend.main import app
+
+    print(f"📊 {total} requests per level, {latency_ms} ms per DynamoDB call, "
+          f"AWS pool {settings.AWS_MAX_POOL_CONNECTIONS} connections")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/files", "/tags/"):
+            for concurrency in levels:
+                rps, p50, p95 = await run_level(client, path, total, concurrency)
+                print(f"  GET {path:<8} concurrency {concurrency:>4}: {rps:8.1f} req/s  p50 {p50:7.1f} ms  p95 {p95:7.1f} ms")
+
+    # Activity events are written in the background; flush them like app shutdown does
+    from backend.services.activity_log import activity_logger
+    await activity_logger.stop()
+    print(f"📝 Activity log: {activity_logger.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API throughput against local AWS stand-ins.")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=50.0, help="Simulated DynamoDB latency (ms)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.requests, args.concurrency, args.latency))
@@ -0,0 +1,134 @@
+"""
+Creates the indexes behind the paginated /files listing and backfills existing items.
+
+    1. GSIs on rnd-hub-metadata: filename-index (list_pk + filename_lower)
+       and status-filename-index (status + filename_lower)
+    2. The rnd-hub-file-tags table (tag -> file) with its tag-filename-index LSI
+    3. Backfill: list_pk/filename_lower on every file item, and a tag index entry per file tag
+
+Safe to re-run: existing indexes/tables are skipped and the backfill only writes what is missing.
+
+    python scripts/create_file_indexes.py
+"""
+import os
+import sys
+import time
+
+import boto3
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import settings
+from backend.services import file_catalog
+
+dynamodb = boto3.client('dynamodb', region_name=settings.AWS_REGION)
+THROUGHPUT = {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+
+
+def wait_for_index(table_name, index_name):
+    while True:
+        indexes = dynamodb.describe_table(TableName=table_name)['Table'].get('GlobalSecondaryIndexes', [])
+        status = next((i['IndexStatus'] for i in indexes if i['IndexName'] == index_name), None)
+        if status == 'ACTIVE':
+            return
+        print(f"  ⏳ {index_name}: {status}")
+        time.sleep(15)
+
+
+def create_metadata_indexes():
+    table_name = settings.DYNAMODB_TABLE
+    existing = {i['IndexName'] for i in dynamodb.describe_table(TableName=table_name)['Table'].get('GlobalSecondaryIndexes', [])}
+    wanted = [
+        (file_catalog.FILENAME_INDEX, 'list_pk'),
+        (file_catalog.STATUS_INDEX, 'status'),
+    ]
+    # DynamoDB accepts one GSI creation per UpdateTable call
+    for index_name, partition_key in wanted:
+        if index_name in existing:
+            print(f"✅ {table_name}.{index_name} already exists.")
+            continue
+        print(f"🔨 Creating {table_name}.{index_name}...")
+        dynamodb.update_table(
+            TableName=table_name,
+            AttributeDefinitions=[
+                {'AttributeName': partition_key, 'AttributeType': 'S'},
+                {'AttributeName': 'filename_lower', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexUpdates=[{
+                'Create': {
+                    'IndexName': index_name,
+                    'KeySchema': [
+                        {'AttributeName': partition_key, 'KeyType': 'HASH'},
+                        {'AttributeName': 'filename_lower', 'KeyType': 'RANGE'}
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'},  # Pages are served from the index alone
+                    'ProvisionedThroughput': THROUGHPUT
+                }
+            }]
+        )
+        wait_for_index(table_name, index_name)
+        print(f"✅ {table_name}.{index_name} is active.")
+
+
+def create_file_tags_table():
+    table_name = file_catalog.FILE_TAGS_TABLE
+    try:
+        dynamodb.create_table(
+            TableName=table_name,
+            KeySchema=[
+                {'AttributeName': 'tag', 'KeyType': 'HASH'},
+                {'AttributeName': 'file_id', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'tag', 'AttributeType': 'S'},
+                {'AttributeName': 'file_id', 'AttributeType': 'S'},
+                {'AttributeName': 'filename_lower', 'AttributeType': 'S'}
+            ],
+            LocalSecondaryIndexes=[{
+                'IndexName': file_catalog.TAG_FILENAME_INDEX,
+                'KeySchema': [
+                    {'AttributeName': 'tag', 'KeyType': 'HASH'},
+                    {'AttributeName': 'filename_lower', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'KEYS_ONLY'}
+            }],
+            ProvisionedThroughput=THROUGHPUT
+        )
+        print(f"🔨 Creating table {table_name}...")
+        dynamodb.get_waiter('table_exists').wait(TableName=table_name)
+        print(f"✅ Table {table_name} created.")
+    except dynamodb.exceptions.ResourceInUseException:
+        print(f"✅ Table {table_name} already exists.")
+
+
+def backfill():
+    table = boto3.resource('dynamodb', region_name=settings.AWS_REGION).Table(settings.DYNAMODB_TABLE)
+    updated = tagged = 0
+    scan_kwargs = {}
+    while True:
+        page = table.scan(**scan_kwargs)
+        for item in page.get('Items', []):
+            filename = item.get('filename', item['file_id'])
+            attributes = file_catalog.index_attributes(filename)
+            if any(item.get(k) != v for k, v in attributes.items()):
+                table.update_item(
+                    Key={'file_id': item['file_id']},
+                    UpdateExpression="set list_pk = :p, filename_lower = :f",
+                    ExpressionAttributeValues={':p': attributes['list_pk'], ':f': attributes['filename_lower']}
+                )
+                updated += 1
+            if item.get('tags'):
+                # Puts are idempotent: re-running rewrites the same entries.
+                # Counts are left to scripts/reconcile_tags.py (re-runs would double count).
+                file_catalog.set_file_tags(item['file_id'], item['tags'], update_counts=False)
+                tagged += 1
+        if 'LastEvaluatedKey' not in page:
+            break
+        scan_kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+    print(f"🎉 Backfill complete: {updated} items given index keys, {tagged} tagged files indexed.")
+    print("👉 Now run scripts/reconcile_tags.py to set the tag usage counts.")
+
+
+if __name__ == "__main__":
+    create_metadata_indexes()
+    create_file_tags_table()
+    backfill()
@@ -1,20 +1,25 @@
 import pickle
 import faiss
 import os
+from backend.services.chunk_store import ChunkStore
 
 INDEX_FILE = "backend/faiss_index.bin"
 METADATA_FILE = "backend/metadata.pkl"
+CHUNK_STORE_FILE = "backend/chunks.bin"
 
 def analyze_index():
     print("🔍 Analyzing Vector Index...")
     
-    if not os.path.exists(INDEX_FILE) or not os.path.exists(METADATA_FILE):
+    if not os.path.exists(INDEX_FILE) or not (os.path.exists(CHUNK_STORE_FILE) or os.path.exists(METADATA_FILE)):
         print("❌ Index or Metadata file not found.")
         return
 
     index = faiss.read_index(INDEX_FILE)
-    with open(METADATA_FILE, "rb") as f:
-        metadata = pickle.load(f)
+    if os.path.exists(CHUNK_STORE_FILE):
+        metadata = ChunkStore.open(CHUNK_STORE_FILE)
+    else:
+        with open(METADATA_FILE, "rb") as f:
+            metadata = pickle.load(f)
 
     print(f"📊 Total Vectors in Index: {index.ntotal}")
     print(f"📚 Total Metadata Entries: {len(metadata)}")
@@ -1,12 +1,23 @@
 import boto3
+import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Constants
 USER_POOL_ID = 'us-east-1_VT82bTVEX'
 REGION = 'us-east-1'
 
 client = boto3.client('cognito-idp', region_name=REGION)
 
+def refresh_user_directory():
+    # Tell running API processes to reload /admin/users now instead of after the cache TTL
+    try:
+        from backend.services.user_directory import bump_generation
+        bump_generation()
+    except Exception as e:
+        print(f"⚠️  Could not refresh the admin user directory ({e}). Use POST /admin/users/refresh.")
+
 def create_user(username, email, group):
     try:
         # 1. Create User
@@ -39,6 +50,7 @@ def create_user(username, email, group):
         )
         
         print(f"✅ User {username} created successfully with role {group}.")
+        refresh_user_directory()
         print(f"👉 Login with: {username} / PermanentPassword123!")
         
     except client.exceptions.UsernameExistsException:
@@ -0,0 +1,62 @@
+"""
+Copies activity events from the old rnd-hub-activity table (keyed on a random event_id) into the
+hour-bucketed ACTIVITY_TABLE read by the audit endpoints.
+
+Creates the new table if needed, then scans the old one in parallel segments and batch-writes
+every event with its bucket/sort keys. Keys are derived from the event itself, so re-running
+(e.g. after deploying, to pick up events written to the old table in between) just overwrites.
+
+    python scripts/migrate_activity.py [--source rnd-hub-activity] [--segments 4]
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import settings
+from backend.create_activity_table import create_activity_table
+from backend.services.activity_store import with_keys
+
+
+def copy_segment(source_name, segment, total_segments):
+    dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
+    source = dynamodb.Table(source_name)
+    target = dynamodb.Table(settings.ACTIVITY_TABLE)
+    copied = skipped = 0
+    scan_kwargs = {'Segment': segment, 'TotalSegments': total_segments}
+    with target.batch_writer() as writer:
+        while True:
+            page = source.scan(**scan_kwargs)
+            for item in page.get('Items', []):
+                if not item.get('event_id') or not item.get('timestamp'):
+                    skipped += 1
+                    continue
+                writer.put_item(Item=with_keys(item))
+                copied += 1
+            if 'LastEvaluatedKey' not in page:
+                break
+            scan_kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+    return copied, skipped
+
+
+def migrate(source_name, segments):
+    if source_name == settings.ACTIVITY_TABLE:
+        sys.exit("❌ Source and target are the same table.")
+    create_activity_table()
+    print(f"🚚 Copying {source_name} -> {settings.ACTIVITY_TABLE} ({segments} segments)...")
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        results = list(pool.map(lambda s: copy_segment(source_name, s, segments), range(segments)))
+    copied = sum(c for c, _ in results)
+    skipped = sum(s for _, s in results)
+    print(f"🎉 Migrated {copied} events ({skipped} without event_id/timestamp skipped).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy activity events into the hour-bucketed activity table.")
+    parser.add_argument("--source", default="rnd-hub-activity", help="Old activity table")
+    parser.add_argument("--segments", type=int, default=4, help="Parallel scan segments")
+    args = parser.parse_args()
+    migrate(args.source, args.segments)
@@ -0,0 +1,53 @@
+import sys
+from dotenv import load_dotenv
+
+# Load env vars
+load_dotenv()
+
+from backend.config import settings
+from backend.services.index_factory import INDEX_TYPES
+from backend.services.vector_store import vector_store, MAX_COMMIT_ATTEMPTS
+
+def migrate_index(index_type) -> bool:
+    print(f"🔄 Rebuilding vector index as '{index_type}'...")
+
+    if index_type not in INDEX_TYPES:
+        print(f"❌ Unknown index type. Choose one of: {', '.join(INDEX_TYPES)}")
+        return False
+
+    try:
+        # vector_store has already downloaded faiss_index.bin + metadata from S3
+        before = type(vector_store.index).__name__
+        print(f"📊 Current index: {before} with {vector_store.index.ntotal} vectors ({len(vector_store.metadata)} live chunks)")
+
+        with vector_store.write_lock:
+            for attempt in range(MAX_COMMIT_ATTEMPTS):
+                # Rebuild from the latest committed state, so the new base includes every upload so far
+                vector_store.refresh()
+                total = len(vector_store.metadata)
+
+                # Reconstruct live vectors, train the new index on them, re-add under the same chunk ids
+                vector_store.rebuild_index(index_type)
+                after = type(vector_store.index).__name__
+
+                if vector_store.index.ntotal != total:
+                    print(f"❌ Vector count mismatch ({vector_store.index.ntotal} != {total}). Not uploading.")
+                    return False
+
+                # Upload to S3 as a new base snapshot (publishes exactly the rebuilt index, or nothing)
+                if vector_store.compact(catch_up=False):
+                    print(f"🎉 Migrated {before} -> {after} ({total} vectors)")
+                    print(f"👉 Set VECTOR_INDEX_TYPE={index_type} so new deployments use it too.")
+                    return True
+                print(f"⚠️ Another writer committed during the upload. Rebuilding ({attempt + 1}/{MAX_COMMIT_ATTEMPTS})...")
+
+        print("❌ Migration not published: the index kept changing. Try again when ingestion is quiet.")
+        return False
+
+    except Exception as e:
+        print(f"❌ Error during migration: {e}")
+        return False
+
+if __name__ == "__main__":
+    if not migrate_index(sys.argv[1] if len(sys.argv) > 1 else settings.VECTOR_INDEX_TYPE):
+        sys.exit(1)
@@ -0,0 +1,76 @@
+"""
+Creates the rnd-hub-stats table (if missing) and recomputes the dashboard file totals from
+rnd-hub-metadata. The API keeps the totals current on every write; run this once to seed them,
+and again whenever they drift (e.g. after scripts/sync_s3_db.py or a failed write).
+
+    python scripts/rebuild_stats.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+import boto3
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import settings
+from backend.services import stats
+
+
+def create_stats_table():
+    dynamodb = boto3.client('dynamodb', region_name=settings.AWS_REGION)
+    try:
+        dynamodb.create_table(
+            TableName=stats.STATS_TABLE,
+            KeySchema=[
+                {'AttributeName': 'name', 'KeyType': 'HASH'}  # Partition key
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'name', 'AttributeType': 'S'}
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print(f"Creating table {stats.STATS_TABLE}...")
+        dynamodb.get_waiter('table_exists').wait(TableName=stats.STATS_TABLE)
+        print(f"Table {stats.STATS_TABLE} created successfully!")
+    except dynamodb.exceptions.ResourceInUseException:
+        print(f"Table {stats.STATS_TABLE} already exists.")
+
+
+def rebuild_stats(dry_run=False):
+    print("🔄 Recomputing file totals...")
+    table = boto3.resource('dynamodb', region_name=settings.AWS_REGION).Table(settings.DYNAMODB_TABLE)
+    totals = defaultdict(int)
+    scan_kwargs = {'ProjectionExpression': '#s, #z', 'ExpressionAttributeNames': {'#s': 'status', '#z': 'size'}}
+    while True:
+        page = table.scan(**scan_kwargs)
+        for item in page.get('Items', []):
+            totals['file_count'] += 1
+            totals['total_bytes'] += int(item.get('size', 0))
+            if item.get('status'):
+                totals[f"status_{item['status']}"] += 1
+        if 'LastEvaluatedKey' not in page:
+            break
+        scan_kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    try:
+        print(f"📊 Was: {stats.file_totals()}")
+    except Exception as e:
+        print(f"📊 Was: unavailable ({e})")
+    print(f"📊 Now: {dict(totals)}")
+    if not dry_run:
+        # Replaces the whole item, so counters for statuses that no longer occur disappear too
+        stats.stats_table.put_item(Item={'name': stats.FILES_KEY, **totals})
+        print("🎉 File totals rebuilt.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the stats table and rebuild the dashboard file totals.")
+    parser.add_argument("--dry-run", action="store_true", help="Print the totals without writing")
+    args = parser.parse_args()
+    if not args.dry_run:
+        create_stats_table()
+    rebuild_stats(args.dry_run)
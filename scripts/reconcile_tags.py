@@ -0,0 +1,77 @@
+"""
+Repairs drift between file tag lists, the tag -> file index and the tag usage counters.
+
+The files table is the source of truth: tag index entries are added/removed to match each file's
+`tags`, then every tag's `file_count` is set to the number of files carrying it. Run it after
+scripts/create_file_indexes.py, and whenever counts look off (e.g. after a partial failure).
+Writes racing with the run can leave a counter off by the in-flight changes; run it again
+(or in a quiet period) to settle them.
+
+    python scripts/reconcile_tags.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import file_catalog
+
+
+def scan_all(table, **kwargs):
+    while True:
+        page = table.scan(**kwargs)
+        yield from page.get('Items', [])
+        if 'LastEvaluatedKey' not in page:
+            return
+        kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+
+def reconcile(dry_run=False):
+    print("🔄 Reconciling tag index and counters...")
+
+    # 1. Expected: tag -> files, from the files table
+    expected = defaultdict(set)
+    for item in scan_all(file_catalog.table, ProjectionExpression='file_id, tags'):
+        for tag in item.get('tags') or []:
+            expected[tag].add(item['file_id'])
+
+    # 2. Actual: the tag index
+    indexed = defaultdict(set)
+    for entry in scan_all(file_catalog.tags_index, ProjectionExpression='tag, file_id'):
+        indexed[entry['tag']].add(entry['file_id'])
+
+    # 3. Fix index entries
+    missing = [(t, f) for t, files in expected.items() for f in files - indexed.get(t, set())]
+    stale = [(t, f) for t, files in indexed.items() for f in files - expected.get(t, set())]
+    print(f"Tag index: {len(missing)} missing entries, {len(stale)} stale entries.")
+    if not dry_run:
+        with file_catalog.tags_index.batch_writer() as writer:
+            for tag, file_id in missing:
+                writer.put_item(Item={'tag': tag, 'file_id': file_id, 'filename_lower': file_id.lower()})
+            for tag, file_id in stale:
+                writer.delete_item(Key={'tag': tag, 'file_id': file_id})
+
+    # 4. Fix counters on the defined tags
+    fixed = 0
+    for tag in scan_all(file_catalog.tags_table):
+        actual = len(expected.get(tag['name'], ()))
+        if tag.get('file_count') != actual:
+            print(f"  🏷️  {tag['name']}: {tag.get('file_count', '-')} -> {actual}")
+            fixed += 1
+            if not dry_run:
+                file_catalog.tags_table.update_item(
+                    Key={'name': tag['name']},
+                    UpdateExpression="set file_count = :c",
+                    ExpressionAttributeValues={':c': actual}
+                )
+
+    print(f"🎉 {'Would fix' if dry_run else 'Fixed'} {fixed} counters.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile the tag index and tag usage counters.")
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without writing")
+    args = parser.parse_args()
+    reconcile(args.dry_run)
@@ -1,56 +1,219 @@
-import boto3
+import argparse
+import json
+import multiprocessing
 import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
 from dotenv import load_dotenv
-from backend.services.vector_store import vector_store
-from backend.services.pdf_processor import extract_text_from_s3
 
 # Load env vars
 load_dotenv()
+# Files are already extracted in parallel; keep each extraction process to one OCR worker
+os.environ.setdefault("OCR_MAX_WORKERS", "1")
+
+from backend.config import settings
+from backend.services import index_factory
+from backend.services.chunk_store import ChunkStore
+from backend.services.file_processor import extract_text_from_s3, SUPPORTED_EXTENSIONS
+from backend.services.keyword_index import KeywordIndex
+from backend.services.local_object_store import LocalObjectStore
+from backend.services.segment_store import SegmentLog, HistoryCompacted
 
 # Config
-REGION = 'us-east-1'
-BUCKET_NAME = "rnd-hub-files-0202"
+STAGING_DIR = "reindex_staging"  # Extracted + embedded files wait here until the swap
+CHECKPOINT_FILE = os.path.join(STAGING_DIR, "checkpoint.jsonl")
+START_FILE = os.path.join(STAGING_DIR, "start_manifest.json")  # Live manifest when the first run began
+SKIP_PREFIXES = ("vector_store/",)  # Our own index files live in the same bucket
+REPORT_EVERY = 25
+
+
+def list_bucket_keys():
+    """All indexable keys in the bucket (every page, not just the first 1000)."""
+    import boto3
+    s3 = boto3.client('s3', region_name=settings.AWS_REGION)
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=settings.S3_BUCKET_NAME):
+        for obj in page.get('Contents', []):
+            key = obj['Key']
+            if key.startswith(SKIP_PREFIXES) or key.endswith('/'):
+                continue
+            if os.path.splitext(key)[1].lower() in SUPPORTED_EXTENSIONS:
+                yield key
+
+
+def load_checkpoint():
+    """Files already staged by a previous (possibly crashed) run. A torn last line is ignored."""
+    records = {}
+    if os.path.exists(CHECKPOINT_FILE):
+        with open(CHECKPOINT_FILE) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["key"]] = record
+    return records
+
+
+def load_start_manifest(vector_store):
+    """
+    The live manifest from when staging began (kept across resumed runs). Changes committed
+    after it are replayed onto the new snapshot at the swap.
+    """
+    if os.path.exists(START_FILE):
+        with open(START_FILE) as f:
+            return json.load(f)
+    manifest = vector_store.log.latest_manifest()
+    with open(START_FILE, "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def append_checkpoint(record):
+    with open(CHECKPOINT_FILE, "a") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def report(label, files, chunks, started):
+    elapsed = max(time.time() - started, 1e-9)
+    print(f"⏱️ {label}: {files} files, {chunks} chunks in {elapsed:.1f}s "
+          f"({files / elapsed:.2f} files/sec, {chunks / elapsed:.1f} chunks/sec)")
+
+
+def stage_files(vector_store, staging, keys, records, workers):
+    """Extracts text in a process pool and embeds each file's chunks as they arrive. Returns the failed keys."""
+    next_id = max([r["first_id"] + r["chunks"] for r in records.values() if "first_id" in r], default=vector_store.next_id)
+    failed = []
+    files = chunks = 0
+    started = time.time()
+
+    # Spawned, not forked: the parent's boto3 clients and embedding threads must not leak into the workers
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = {}
+        queue = iter(keys)
+        while True:
+            # Keep a bounded window in flight so extracted texts do not pile up in memory
+            for key in queue:
+                pending[pool.submit(extract_text_from_s3, key)] = key
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
 
-# Clients
-s3 = boto3.client('s3', region_name=REGION)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    text = future.result()
+                    file_chunks = vector_store.prepare_chunks(text) if text else []
+                    if not file_chunks:
+                        print(f"⚠️ Warning: No text extracted from {key}")
+                        append_checkpoint({"key": key, "chunks": 0})
+                        continue
 
-def reindex_all():
+                    # Batch embedding (cache first, then concurrent Bedrock calls)
+                    embeddings = vector_store.embed_chunks(file_chunks)
+                    valid = [(c, e) for c, e in zip(file_chunks, embeddings) if e is not None]
+                    if not valid:
+                        raise Exception("no chunk could be embedded")
+
+                    ids = np.arange(next_id, next_id + len(valid), dtype='int64')
+                    vectors = np.array([e for _, e in valid]).astype('float32')
+                    segment = staging.write_segment(0, ids, vectors, [c for c, _ in valid], key, [])
+                    append_checkpoint({"key": key, "chunks": len(valid), "first_id": int(next_id), "segment": segment})
+                    next_id += len(valid)
+                    files += 1
+                    chunks += len(valid)
+                    print(f"✅ Staged {key} ({len(valid)} chunks)")
+                except Exception as e:
+                    print(f"❌ Failed to process {key}: {e}")
+                    failed.append(key)
+
+                if files and files % REPORT_EVERY == 0:
+                    report("Progress", files, chunks, started)
+
+    report("Staging", files, chunks, started)
+    return failed
+
+
+def build_snapshot(vector_store, staging, records):
+    """Builds the new index, chunk store and keyword index from the staged files (offline, nothing live changes)."""
+    started = time.time()
+    all_ids, all_vectors = [], []
+    metadata = ChunkStore()
+    for record in records.values():
+        if not record.get("segment"):
+            continue
+        segment = staging.read_segment(record["segment"])
+        all_ids.append(segment["ids"])
+        all_vectors.append(segment["vectors"])
+        for chunk_id, chunk in zip(segment["ids"].tolist(), segment["texts"]):
+            metadata[chunk_id] = {"text": chunk, "source": segment["source"]}
+
+    ids = np.concatenate(all_ids) if all_ids else np.zeros(0, dtype='int64')
+    vectors = np.concatenate(all_vectors) if all_vectors else np.zeros((0, vector_store.dimension), dtype='float32')
+    index = index_factory.build_index(
+        vectors, ids, settings.VECTOR_INDEX_TYPE, vector_store.dimension,
+        nlist=settings.VECTOR_INDEX_NLIST,
+        pq_m=settings.VECTOR_INDEX_PQ_M,
+        hnsw_m=settings.VECTOR_INDEX_HNSW_M
+    )
+    keyword_index = KeywordIndex.build(metadata)
+    report("Build", len(records), len(ids), started)
+    return index, metadata, keyword_index
+
+
+def reindex_all(workers, restart=False, allow_failures=False):
     print("🔄 Re-indexing ALL files from S3...")
-    
+
     try:
-        # 1. Get all files from S3
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME)
-        if 'Contents' not in response:
-            print("❌ No files found in S3 bucket.")
+        if restart and os.path.exists(STAGING_DIR):
+            print("🧹 Discarding previous checkpoint...")
+            shutil.rmtree(STAGING_DIR)
+        os.makedirs(STAGING_DIR, exist_ok=True)
+        staging = SegmentLog(LocalObjectStore(STAGING_DIR), "reindex", "staged")
+
+        # Imported here so pool workers (which re-import this module) don't each load the index
+        from backend.services.vector_store import vector_store
+
+        # 1. List the bucket and skip files a previous run already staged
+        start = load_start_manifest(vector_store)
+        records = load_checkpoint()
+        keys = [key for key in list_bucket_keys() if key not in records]
+        print(f"Found {len(keys) + len(records)} files in S3 ({len(records)} already staged, {len(keys)} to go).")
+
+        # 2. Extract + embed
+        failed = stage_files(vector_store, staging, keys, records, workers)
+        if failed and not allow_failures:
+            print(f"❌ {len(failed)} files failed. Re-run to retry them (or pass --allow-failures). Live index unchanged.")
             return
 
-        s3_files = response['Contents']
-        print(f"Found {len(s3_files)} files in S3.")
+        # 3. Build offline
+        records = load_checkpoint()
+        index, metadata, keyword_index = build_snapshot(vector_store, staging, records)
+        if index.ntotal != len(metadata):
+            print(f"❌ Vector count mismatch ({index.ntotal} != {len(metadata)}). Live index unchanged.")
+            return
 
-        # 2. Process each file
-        for obj in s3_files:
-            key = obj['Key']
-            print(f"📄 Processing {key}...")
-            
-            try:
-                # Extract Text
-                text = extract_text_from_s3(key)
-                
-                if not text.strip():
-                     print(f"⚠️ Warning: No text extracted from {key}")
-                     continue
-
-                # Add to Vector Store
-                vector_store.add_document(text, key)
-                print(f"✅ Indexed {key}")
-                
-            except Exception as e:
-                print(f"❌ Failed to process {key}: {e}")
-
-        print("🎉 Re-indexing Complete!")
+        # 4. Swap: replay changes committed since the start, then one manifest commit publishes the new base
+        vector_store.install_snapshot(index, metadata, keyword_index, start)
+        shutil.rmtree(STAGING_DIR)
+        print(f"🎉 Re-indexing Complete! {len(metadata)} chunks from {len(records)} files.")
+
+    except HistoryCompacted as e:
+        print(f"❌ Live index was compacted more than once since staging began ({e}). Re-run with --restart. Live index unchanged.")
 
     except Exception as e:
-        print(f"❌ Error during re-indexing: {e}")
+        print(f"❌ Error during re-indexing (progress is checkpointed, re-run to resume): {e}")
 
 if __name__ == "__main__":
-    reindex_all()
+    parser = argparse.ArgumentParser(description="Rebuild the vector index from every file in the S3 bucket.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Text extraction processes")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--allow-failures", action="store_true", help="Swap in the new index even if some files failed")
+    args = parser.parse_args()
+    reindex_all(args.workers, restart=args.restart, allow_failures=args.allow_failures)
@@ -44,7 +44,10 @@ def sync_s3_to_db():
                         'filename': key,
                         'content_type': 'application/pdf', # Defaulting for sync
                         'size': size,
-                        'status': 'indexed' # Assume indexed if it's there
+                        'status': 'indexed', # Assume indexed if it's there
+                        # Keys for the listing indexes (see backend/services/file_catalog.py)
+                        'list_pk': 'file',
+                        'filename_lower': key.lower()
                     }
                 )
             else:
@@ -3,6 +3,7 @@
 echo "Stopping old servers..."
 lsof -t -i :8000 | xargs kill -9 2>/dev/null
 lsof -t -i :5173 | xargs kill -9 2>/dev/null
+pkill -f "backend.worker" 2>/dev/null
 
 # Start Backend (IPV4 Localhost specific to avoid confusion)
 echo "Starting Backend on 127.0.0.1:8000..."
@@ -11,6 +12,11 @@ source venv/bin/activate
 nohup uvicorn backend.main:app --host 127.0.0.1 --port 8000 > backend.log 2>&1 &
 BACKEND_PID=$!
 
+# Start Ingestion Worker (OCR + embeddings run here, not in the API process)
+echo "Starting Ingestion Worker..."
+nohup python -m backend.worker > worker.log 2>&1 &
+WORKER_PID=$!
+
 # Start Frontend
 echo "Starting Frontend..."
 cd frontend
@@ -20,6 +26,7 @@ FRONTEND_PID=$!
 
 echo "Servers Started!"
 echo "Backend PID: $BACKEND_PID"
+echo "Worker PID: $WORKER_PID"
 echo "Frontend PID: $FRONTEND_PID"
 echo "--------------------------------"
 echo "Please open: http://127.0.0.1:5173"
@@ -0,0 +1,95 @@
+"""
+Offline test setup: everything the backend would reach over the network is replaced by local files.
+
+    python -m pytest tests
+
+The vector store uses LocalObjectStore (VECTOR_STORE_LOCAL_DIR) instead of S3 and a stub embedder
+instead of Bedrock, the job queue and caches are SQLite files in a temp dir, and any AWS call that
+slips through fails fast against an unreachable endpoint.
+"""
+import contextlib
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Before any backend import: settings and module-level services read these once
+SESSION_DIR = tempfile.mkdtemp(prefix="rnd-hub-tests-")
+os.environ.update({
+    "AWS_ACCESS_KEY_ID": "test",
+    "AWS_SECRET_ACCESS_KEY": "test",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    "AWS_ENDPOINT_URL": "http://127.0.0.1:9",
+    "AWS_MAX_ATTEMPTS": "1",
+    "VECTOR_STORE_LOCAL_DIR": os.path.join(SESSION_DIR, "s3"),
+    "EMBEDDING_CACHE_PATH": os.path.join(SESSION_DIR, "embedding_cache.db"),
+    "CONTENT_CACHE_PATH": os.path.join(SESSION_DIR, "content_cache.db"),
+    "INGEST_QUEUE_PATH": os.path.join(SESSION_DIR, "ingest_queue.db"),
+})
+# The vector store keeps its local snapshot files in the working directory
+os.chdir(SESSION_DIR)
+
+
+def stub_embedding(text: str):
+    """Deterministic unit vector per text (1536 dims, like Titan v1)."""
+    seed = np.frombuffer(hashlib.sha256(text.encode("utf-8")).digest() * 48, dtype=np.uint8)[:1536]
+    vector = seed.astype("float32")
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@contextlib.contextmanager
+def working_dir(path):
+    previous = os.getcwd()
+    os.makedirs(path, exist_ok=True)
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class StoreProcess:
+    """
+    One VectorStore opened in its own working directory, standing in for a separate API/worker process.
+    Every call runs inside that directory, like a process started there. Two of them may share one.
+    """
+
+    def __init__(self, path):
+        from backend.services.vector_store import VectorStore
+        self.path = path
+        with working_dir(path):
+            self.store = VectorStore()
+            self.store.embedder.embed_fn = stub_embedding
+
+    def __getattr__(self, name):
+        attr = getattr(self.store, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with working_dir(self.path):
+                return attr(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def object_store_dir(tmp_path, monkeypatch):
+    """Fresh LocalObjectStore root (the 'bucket') and embedding cache per test."""
+    from backend.config import settings
+    monkeypatch.setattr(settings, "VECTOR_STORE_LOCAL_DIR", str(tmp_path / "s3"))
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache.db"))
+    return tmp_path / "s3"
+
+
+@pytest.fixture
+def open_store(object_store_dir, tmp_path):
+    """Factory: open_store("api") loads a VectorStore from the shared bucket in its own directory."""
+    def factory(name):
+        return StoreProcess(str(tmp_path / name))
+    return factory
@@ -0,0 +1,69 @@
+"""Hour-bucketed activity reads (activity_store) against a moto DynamoDB table."""
+import datetime
+import uuid
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from backend.config import settings
+from backend.services import activity_store
+
+
+@pytest.fixture
+def activity_table(monkeypatch):
+    monkeypatch.delenv("AWS_ENDPOINT_URL")  # moto intercepts the real AWS endpoints only
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name=settings.AWS_REGION)
+        table = dynamodb.create_table(
+            TableName=settings.ACTIVITY_TABLE,
+            KeySchema=[{"AttributeName": "bucket", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+            AttributeDefinitions=[{"AttributeName": "bucket", "AttributeType": "S"}, {"AttributeName": "sk", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        queried = []
+        query = table.query
+
+        def counted_query(**kwargs):
+            queried.append(kwargs)
+            return query(**kwargs)
+
+        table.query = counted_query
+        monkeypatch.setattr(activity_store, "table", table)
+        yield table, queried
+
+
+def put_event(table, hours_ago: float, path: str):
+    timestamp = (datetime.datetime.utcnow() - datetime.timedelta(hours=hours_ago)).isoformat() + "Z"
+    table.put_item(Item=activity_store.with_keys({"event_id": str(uuid.uuid4()), "timestamp": timestamp, "path": path}))
+
+
+def test_latest_busy_hour_is_one_query(activity_table):
+    table, queried = activity_table
+    for i in range(5):
+        put_event(table, 0, f"/now/{i}")
+
+    events = activity_store.latest(limit=3)
+    assert len(events) == 3
+    assert [e["timestamp"] for e in events] == sorted((e["timestamp"] for e in events), reverse=True)
+    assert len(queried) == 1 or datetime.datetime.utcnow().minute == 0  # 1 + 2 if the hour turned over meanwhile
+
+
+def test_latest_quiet_week_is_newest_first_and_capped(activity_table, monkeypatch):
+    monkeypatch.setattr(settings, "ACTIVITY_LATEST_PARALLEL_QUERIES", 8)
+    table, queried = activity_table
+    put_event(table, 0, "/recent")
+    put_event(table, 30, "/yesterday")
+    put_event(table, 100, "/days-ago")
+    put_event(table, 200, "/beyond-lookback")
+
+    events = activity_store.latest(limit=10, lookback_hours=168)
+    assert [e["path"] for e in events] == ["/recent", "/yesterday", "/days-ago"]
+    # Never more than the lookback, however quiet
+    assert len(queried) == 168
+    assert "bucket" not in events[0] and "sk" not in events[0]
+
+    # Stops at the batch that fills the limit
+    queried.clear()
+    assert [e["path"] for e in activity_store.latest(limit=2)] == ["/recent", "/yesterday"]
+    assert len(queried) < 168
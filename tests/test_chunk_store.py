@@ -0,0 +1,134 @@
+"""ChunkStore: mapped file round-trips, overlay and deletes, and the legacy formats it loads."""
+import json
+import pickle
+
+import numpy as np
+import pytest
+
+from backend.services import chunk_store
+from backend.services.chunk_store import ChunkStore
+
+CHUNKS = {
+    7: {"text": "Varanasi – the eternal city", "source": "varanasi.pdf"},
+    2: {"text": "Kāshī, also known as Banaras", "source": "varanasi.pdf"},
+    40: {"text": "", "source": "empty.pdf"},
+    11: {"text": "Amazon Bedrock is a fully managed service", "source": "bedrock_test.txt"},
+}
+
+
+def written(tmp_path, chunks, name="chunks.bin"):
+    store = ChunkStore()
+    for chunk_id, entry in chunks.items():
+        store[chunk_id] = entry
+    path = str(tmp_path / name)
+    store.write(path)
+    return ChunkStore.open(path), path
+
+
+def test_round_trip(tmp_path):
+    store, _ = written(tmp_path, CHUNKS)
+    assert store._mmap is not None and not store.overlay
+    assert store.ids.tolist() == sorted(CHUNKS)
+    assert dict(store.items()) == CHUNKS
+    assert list(store.keys()) == sorted(CHUNKS)
+    assert len(store) == len(CHUNKS)
+    for chunk_id, entry in CHUNKS.items():
+        assert store[chunk_id] == entry
+        assert str(store.text_view(chunk_id), "utf-8") == entry["text"]
+        assert store.source_of(chunk_id) == entry["source"]
+    assert store.source_table == ["varanasi.pdf", "bedrock_test.txt", "empty.pdf"]
+    assert store.ids_by_source() == {"varanasi.pdf": [2, 7], "bedrock_test.txt": [11], "empty.pdf": [40]}
+
+    assert 3 not in store and store.get(3) is None and store.text_view(3) is None
+    with pytest.raises(KeyError):
+        store[3]
+
+
+def test_deletes_and_overlay_until_the_next_write(tmp_path):
+    store, path = written(tmp_path, CHUNKS)
+    store[50] = {"text": "new chunk", "source": "new.pdf"}
+    store[51] = {"text": "another", "source": "varanasi.pdf"}
+
+    assert store.pop(7) == CHUNKS[7]   # Snapshot chunk: masked
+    assert store.pop(51)["text"] == "another"  # Overlay chunk: dropped
+    assert store.pop(7) is None and store.pop(99, "absent") == "absent"
+    assert 7 not in store and store.get(7) is None and store.source_of(7) is None
+    assert len(store) == 4
+    assert store.ids_by_source() == {"varanasi.pdf": [2], "bedrock_test.txt": [11], "empty.pdf": [40], "new.pdf": [50]}
+    expected = {2: CHUNKS[2], 11: CHUNKS[11], 40: CHUNKS[40], 50: {"text": "new chunk", "source": "new.pdf"}}
+    assert dict(store.items()) == expected
+
+    # Folded on write; sources left without chunks are dropped from the table
+    store.pop(11)
+    del expected[11]
+    store.write(path + ".next")
+    folded = ChunkStore.open(path + ".next")
+    assert dict(folded.items()) == expected
+    assert sorted(folded.source_table) == ["empty.pdf", "new.pdf", "varanasi.pdf"]
+    # The reader of the previous file is unaffected
+    assert store[2] == CHUNKS[2] and ChunkStore.open(path)[7] == CHUNKS[7]
+
+
+def test_empty_store(tmp_path):
+    store, path = written(tmp_path, {})
+    assert len(store) == 0 and list(store.items()) == [] and store.ids_by_source() == {}
+    open(path, "wb").close()
+    assert len(ChunkStore.open(path)) == 0
+
+
+def write_v1(path, chunks):
+    """A chunk store file in format v1: one source per chunk in the trailing JSON list."""
+    ids = sorted(chunks)
+    encoded = [chunks[i]["text"].encode("utf-8") for i in ids]
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    text = b"".join(encoded)
+    text += b"\0" * (-len(text) % 8)
+    with open(path, "wb") as f:
+        f.write(chunk_store.HEADER.pack(chunk_store.MAGIC, 1, 0, len(ids), len(text)))
+        f.write(np.array(ids, dtype=np.int64).tobytes())
+        f.write(offsets.tobytes())
+        f.write(text)
+        f.write(json.dumps([chunks[i]["source"] for i in ids]).encode("utf-8"))
+
+
+def test_v1_file_is_loaded_and_rewritten_as_v2(tmp_path):
+    path = str(tmp_path / "chunks.bin")
+    write_v1(path, CHUNKS)
+    store = ChunkStore.open(path)
+    assert dict(store.items()) == CHUNKS
+    assert len(store.source_table) == 3  # Interned on load
+    assert store.ids_by_source()["varanasi.pdf"] == [2, 7]
+
+    store.write(path)
+    with open(path, "rb") as f:
+        assert chunk_store.HEADER.unpack(f.read(chunk_store.HEADER.size))[1] == chunk_store.FORMAT_VERSION
+    assert dict(ChunkStore.open(path).items()) == CHUNKS
+
+
+def test_foreign_and_future_files_are_rejected(tmp_path):
+    (tmp_path / "foreign.bin").write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        ChunkStore.open(str(tmp_path / "foreign.bin"))
+    (tmp_path / "future.bin").write_bytes(chunk_store.HEADER.pack(chunk_store.MAGIC, 99, 0, 0, 0) + b"[]")
+    with pytest.raises(ValueError):
+        ChunkStore.open(str(tmp_path / "future.bin"))
+
+
+def test_convert_pickle(tmp_path):
+    legacy = {
+        0: {"text": "Amazon Bedrock is a fully managed service", "source": "bedrock_test.txt"},
+        152: {"text": "Varanasi – The Eternal City", "source": {"filename": "Varanasi_City_Detailed_Guide.pdf"}},
+        153: {"text": "Historical Background", "source": {"filename": "Varanasi_City_Detailed_Guide.pdf"}},
+        np.int64(9): {"text": "numpy id", "source": "bedrock_test.txt"},
+    }
+    with open(tmp_path / "metadata.pkl", "wb") as f:
+        pickle.dump(legacy, f)
+
+    store = ChunkStore.convert_pickle(str(tmp_path / "metadata.pkl"), str(tmp_path / "chunks.bin"))
+    assert store._mmap is not None
+    assert store.ids.tolist() == [0, 9, 152, 153]
+    assert store[9] == {"text": "numpy id", "source": "bedrock_test.txt"}
+    # Dict sources from early uploads become the file key, so the file's chunks can be deleted by name
+    assert store.ids_by_source() == {"bedrock_test.txt": [0, 9], "Varanasi_City_Detailed_Guide.pdf": [152, 153]}
+    assert dict(ChunkStore.open(str(tmp_path / "chunks.bin")).items()) == dict(store.items())
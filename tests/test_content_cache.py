@@ -0,0 +1,29 @@
+"""ContentCache bookkeeping for files uploaded under several names with the same bytes."""
+from backend.services.content_cache import ContentCache
+
+
+def test_aliases_are_handed_back_when_the_last_indexed_copy_is_deleted(tmp_path):
+    cache = ContentCache(str(tmp_path / "content_cache.db"))
+    cache.mark_indexed("report.pdf", "sha256:aa")
+    cache.mark_alias("report-final.pdf", "sha256:aa")
+    cache.mark_alias("report (1).pdf", "sha256:aa")
+    assert cache.indexed_files("sha256:aa") == ["report.pdf"]
+    assert cache.indexed_hash("report-final.pdf") is None
+
+    # Deleting an alias orphans nothing
+    assert cache.forget("report (1).pdf") == []
+    assert cache.forget("report.pdf") == ["report-final.pdf"]
+    assert cache.indexed_files("sha256:aa") == []
+    assert cache.forget("report-final.pdf") == []
+
+
+def test_indexing_an_alias_promotes_it(tmp_path):
+    cache = ContentCache(str(tmp_path / "content_cache.db"))
+    cache.mark_indexed("a.pdf", "sha256:aa")
+    assert cache.mark_indexed("a.pdf", "sha256:aa") is False
+    cache.mark_alias("b.pdf", "sha256:aa")
+    assert cache.mark_indexed("b.pdf", "sha256:aa") is True
+
+    # Another indexed copy remains: nothing to re-index
+    assert cache.forget("a.pdf") == []
+    assert cache.indexed_files("sha256:aa") == ["b.pdf"]
@@ -0,0 +1,110 @@
+"""EmbeddingPipeline / RateLimiter with a stub embedder (no Bedrock)."""
+import threading
+import time
+
+import pytest
+
+from backend.services.embedding_pipeline import EmbeddingPipeline, RateLimiter
+from conftest import stub_embedding
+
+
+def test_embed_many_keeps_input_order():
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        time.sleep(0.01 if text == "slow" else 0)
+        return stub_embedding(text)
+
+    pipeline = EmbeddingPipeline(embed, max_workers=4, rate_per_sec=1000)
+    texts = ["slow", "a", "b", "c", "d"]
+    assert pipeline.embed_many(texts) == [stub_embedding(t) for t in texts]
+    assert sorted(calls) == sorted(texts)
+
+
+def test_failed_texts_are_none_and_fail_fast():
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        if text == "bad":
+            raise ValueError("ValidationException: input too long")
+        return stub_embedding(text)
+
+    pipeline = EmbeddingPipeline(embed, max_workers=2, rate_per_sec=1000, max_retries=5)
+    assert pipeline.embed_many(["ok", "bad"]) == [stub_embedding("ok"), None]
+    # Non-throttling errors are not retried
+    assert calls.count("bad") == 1
+
+
+def test_throttling_is_retried_after_a_shared_pause():
+    attempts = []
+
+    def embed(text):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise Exception("An error occurred (ThrottlingException): Too many requests")
+        return stub_embedding(text)
+
+    pipeline = EmbeddingPipeline(embed, max_workers=1, rate_per_sec=1000, max_retries=3)
+    assert pipeline.embed_one("x") == stub_embedding("x")
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.9  # First backoff is 1s, applied to every caller via the limiter
+
+
+def test_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "backoff", lambda self, seconds: None)
+
+    def embed(text):
+        raise Exception("ThrottlingException")
+
+    pipeline = EmbeddingPipeline(embed, max_workers=1, rate_per_sec=1000, max_retries=3)
+    with pytest.raises(Exception, match="Max Retries"):
+        pipeline.embed_one("x")
+    assert pipeline.embed_many(["x"]) == [None]
+
+
+def test_rate_limiter_caps_throughput_across_threads():
+    limiter = RateLimiter(rate_per_sec=50, burst=5)
+    acquired = []
+    lock = threading.Lock()
+
+    def take(n):
+        for _ in range(n):
+            limiter.acquire()
+            with lock:
+                acquired.append(time.monotonic())
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=take, args=(5,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # 20 calls, 5 from the initial burst, the other 15 at 50/sec
+    assert len(acquired) == 20
+    assert time.monotonic() - started >= 15 / 50 * 0.9
+
+
+def test_backoff_pauses_every_caller():
+    limiter = RateLimiter(rate_per_sec=1000)
+    limiter.backoff(0.2)
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.18
+
+
+def test_vector_store_only_embeds_cache_misses(open_store):
+    api = open_store("api")
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return stub_embedding(text)
+
+    api.embedder.embed_fn = embed
+    assert api.embed_chunks(["one", "two"]) == [stub_embedding("one"), stub_embedding("two")]
+    assert api.embed_chunks(["two", "three"]) == [stub_embedding("two"), stub_embedding("three")]
+    assert sorted(calls) == ["one", "three", "two"]
+    assert api.embedding_cache.stats()["hits"] == 1
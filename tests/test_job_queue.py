@@ -0,0 +1,109 @@
+"""Durable ingestion queue (SQLite) and the worker's job handling, offline."""
+import time
+
+import pytest
+
+from backend.services.job_queue import JobQueue, QUEUED, RUNNING, DONE, DEAD
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.db"), max_attempts=3, retry_base_seconds=0.05, lease_seconds=0.05)
+
+
+def test_claims_in_order_and_completes(queue):
+    first = queue.enqueue("ingest", {"filename": "a.pdf"})
+    second = queue.enqueue("ingest", {"filename": "b.pdf"})
+
+    job = queue.claim()
+    assert (job["id"], job["payload"], job["attempt"]) == (first, {"filename": "a.pdf"}, 1)
+    assert queue.claim()["id"] == second
+    assert queue.claim() is None  # Both leased
+
+    queue.complete(first)
+    assert queue.stats() == {QUEUED: 0, RUNNING: 1, DONE: 1, DEAD: 0}
+
+
+def test_queue_survives_reopen(tmp_path):
+    path = str(tmp_path / "queue.db")
+    JobQueue(path).enqueue("ingest", {"filename": "a.pdf"})
+    reopened = JobQueue(path)
+    assert reopened.claim()["payload"] == {"filename": "a.pdf"}
+
+
+def test_failures_back_off_then_dead_letter(queue):
+    job_id = queue.enqueue("ingest", {"filename": "a.pdf"})
+
+    job = queue.claim()
+    assert queue.fail(job, "boom 1") == QUEUED
+    assert queue.claim() is None  # Backing off
+    time.sleep(0.06)
+
+    job = queue.claim()
+    assert job["attempt"] == 2
+    assert queue.fail(job, "boom 2") == QUEUED
+    time.sleep(0.11)  # Exponential: 0.05 then 0.1
+
+    job = queue.claim()
+    assert job["attempt"] == 3
+    assert queue.fail(job, "boom 3") == DEAD
+    assert queue.claim() is None
+    [dead] = queue.dead_letters()
+    assert (dead["id"], dead["attempts"], dead["last_error"]) == (job_id, 3, "boom 3")
+
+    assert queue.requeue(job_id)
+    assert queue.claim()["attempt"] == 1
+    # Only dead-lettered jobs can be requeued
+    assert not queue.requeue(job_id)
+    assert not queue.requeue(job_id + 100)
+
+
+def test_expired_lease_is_reclaimed(queue):
+    queue.enqueue("ingest", {"filename": "a.pdf"})
+    job = queue.claim()
+    time.sleep(0.06)  # Worker died without completing
+    again = queue.claim()
+    assert (again["id"], again["attempt"]) == (job["id"], 2)
+
+
+def test_expired_last_lease_is_dead_lettered(queue):
+    job_id = queue.enqueue("ingest", {"filename": "a.pdf"})
+    for attempt in range(3):
+        job = queue.claim()
+        assert (job["id"], job["attempt"]) == (job_id, attempt + 1)
+        time.sleep(0.06)  # Job crashes its worker every time
+
+    other = queue.enqueue("ingest", {"filename": "b.pdf"})
+    dead = []
+    job = queue.claim(on_dead=lambda job, error: dead.append((job["id"], error)))
+    assert job["id"] == other
+    assert dead == [(job_id, "Lease expired on attempt 3/3")]
+    assert queue.stats()[DEAD] == 1
+
+
+def test_worker_runs_and_retries_jobs(queue, monkeypatch):
+    import backend.worker as worker
+    from backend.services import ingestion, job_queue
+
+    monkeypatch.setattr(job_queue, "job_queue", queue)
+    statuses = []
+    monkeypatch.setattr(ingestion, "update_status", lambda filename, status, error=None: statuses.append((filename, status)))
+    processed = []
+
+    def handler(payload):
+        processed.append(payload["filename"])
+        if payload["filename"] == "bad.pdf":
+            raise ValueError("corrupt file")
+
+    monkeypatch.setitem(ingestion.HANDLERS, "test", handler)
+
+    queue.enqueue("test", {"filename": "good.pdf"})
+    queue.enqueue("test", {"filename": "bad.pdf"}, max_attempts=1)
+    queue.enqueue("nope", {"filename": "odd.pdf"})
+    while (job := queue.claim()) is not None:
+        worker.run_job(job)
+
+    assert processed == ["good.pdf", "bad.pdf"]
+    assert queue.stats() == {QUEUED: 1, RUNNING: 0, DONE: 1, DEAD: 1}
+    # Only dead-lettered jobs mark their file as failed; retries keep it queued
+    assert statuses == [("bad.pdf", "failed"), ("odd.pdf", "queued")]
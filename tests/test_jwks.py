@@ -0,0 +1,187 @@
+"""JWKSManager and token verification against a local JWKS file (COGNITO_JWKS_PATH), no Cognito."""
+import json
+import threading
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import JWTError, jwk, jwt
+
+from backend import auth
+from backend.services.jwks import JWKSManager, JWKSUnavailable
+
+
+def make_key(kid):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    public = jwk.construct(public_pem, "RS256").to_dict()
+    public.update(kid=kid, use="sig")
+    return private_pem, public
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {kid: make_key(kid) for kid in ("k1", "k2")}
+
+
+@pytest.fixture
+def jwks_file(tmp_path, keys):
+    path = tmp_path / "jwks.json"
+
+    def publish(*kids):
+        path.write_text(json.dumps({"keys": [keys[kid][1] for kid in kids]}))
+    publish("k1")
+    return path, publish
+
+
+def counting(manager):
+    fetches = []
+    fetch = manager._fetch
+
+    def counted():
+        fetches.append(time.monotonic())
+        return fetch()
+    manager._fetch = counted
+    return fetches
+
+
+def test_keys_are_loaded_once_and_indexed_by_kid(jwks_file):
+    path, _ = jwks_file
+    manager = JWKSManager("http://unused", local_path=str(path))
+    fetches = counting(manager)
+    manager.refresh()
+
+    key = manager.get_key("k1")
+    assert key is not None
+    assert manager.get_key("k1") is key  # Constructed once, not per lookup
+    assert len(fetches) == 1
+
+
+def test_unknown_kid_refreshes_once_then_is_rate_limited(jwks_file):
+    path, publish = jwks_file
+    manager = JWKSManager("http://unused", local_path=str(path), min_refresh_seconds=60)
+    fetches = counting(manager)
+    manager.refresh()
+
+    # Key rotation: a token signed with the new key arrives before our next scheduled refresh
+    publish("k1", "k2")
+    manager.attempted_at -= 61
+    assert manager.get_key("k2") is not None
+    assert len(fetches) == 2
+
+    # Bogus kids cannot force a fetch per request
+    for _ in range(5):
+        assert manager.get_key("bogus") is None
+    assert len(fetches) == 2
+
+
+def test_stale_keys_are_served_while_refreshing_in_background(jwks_file):
+    path, _ = jwks_file
+    manager = JWKSManager("http://unused", local_path=str(path), ttl_seconds=0)
+    manager.refresh()
+    old = manager.get_key("k1")  # Stale immediately: triggers a background refresh
+    assert old is not None
+    manager._background.join(timeout=5)
+    assert manager.generation == 2
+
+    # A failed refresh keeps the cached keys
+    path.write_text("not json")
+    manager._refresh_quietly()
+    assert manager.get_key("k1") is not None
+
+
+def test_concurrent_refreshes_are_single_flight(jwks_file):
+    path, _ = jwks_file
+    manager = JWKSManager("http://unused", local_path=str(path))
+    fetch = manager._fetch
+    fetches = []
+
+    def slow_fetch():
+        fetches.append(1)
+        time.sleep(0.1)
+        return fetch()
+    manager._fetch = slow_fetch
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_key("k1"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fetches) == 1
+    assert len(results) == 8 and all(r is not None for r in results)
+
+
+def test_outage_at_startup_fails_fast_and_stays_rate_limited(tmp_path, keys):
+    path = tmp_path / "jwks.json"  # Not there yet: JWKS endpoint unreachable
+    manager = JWKSManager("http://unused", local_path=str(path), min_refresh_seconds=60)
+    fetches = counting(manager)
+
+    for _ in range(5):
+        with pytest.raises(JWKSUnavailable):
+            manager.get_key("k1")
+    assert len(fetches) == 1
+
+    # Requests waiting on the failing fetch do not each fetch again
+    threads = [threading.Thread(target=lambda: pytest.raises(JWKSUnavailable, manager.get_key, "k1")) for _ in range(8)]
+    manager.attempted_at -= 61
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fetches) == 2
+
+    # Endpoint back: the next request after the limit loads the keys
+    path.write_text(json.dumps({"keys": [keys["k1"][1]]}))
+    manager.attempted_at -= 61
+    assert manager.get_key("k1") is not None
+    assert len(fetches) == 3
+
+
+def token(private_pem, kid, **claims):
+    now = int(time.time())
+    body = {
+        "sub": "user-1", "username": "alice", "token_use": "access", "iat": now, "exp": now + 600,
+        "iss": f"https://cognito-idp.{auth.REGION}.amazonaws.com/{auth.USER_POOL_ID}",
+    }
+    body.update(claims)
+    return jwt.encode(body, private_pem, algorithm="RS256", headers={"kid": kid})
+
+
+def test_verify_token_with_local_jwks(jwks_file, keys, monkeypatch):
+    path, _ = jwks_file
+    monkeypatch.setattr(auth, "jwks_manager", JWKSManager("http://unused", local_path=str(path)))
+    auth.token_cache.clear()
+
+    claims = auth.verify_token(token(keys["k1"][0], "k1"))
+    assert claims["username"] == "alice"
+
+    # Signed with a key that is not (yet) published
+    with pytest.raises(HTTPException) as error:
+        auth.verify_token(token(keys["k2"][0], "k2"))
+    assert error.value.status_code == 401
+
+    # Wrong signature for a known kid, and an id token instead of an access token
+    with pytest.raises(JWTError):
+        auth.verify_token(token(keys["k2"][0], "k1"))
+    with pytest.raises(HTTPException):
+        auth.verify_token(token(keys["k1"][0], "k1", token_use="id"))
+
+
+def test_unavailable_keys_are_a_503_not_a_401(tmp_path, keys, monkeypatch):
+    manager = JWKSManager("http://unused", local_path=str(tmp_path / "missing.json"))
+    monkeypatch.setattr(auth, "jwks_manager", manager)
+    auth.token_cache.clear()
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token(keys["k1"][0], "k1"))
+    with pytest.raises(HTTPException) as error:
+        auth.get_current_user(credentials)
+    assert error.value.status_code == 503
@@ -0,0 +1,124 @@
+"""KeywordIndex: lookups against a naive scan, the mapped snapshot file, and the overlay on top of it."""
+import random
+
+import numpy as np
+import pytest
+
+from backend.services.keyword_index import KeywordIndex
+
+WORDS = ["cremation", "cremations,", "ghat", "Ganga", "temple", "temples.", "river", "Varanasi", "kāshī",
+         "ghats", "at", "the", "(1904)", "learning", "earn", "manikarnika", "CREMATION", "naïve", "river-bank"]
+TERMS = ["cremation", "emat", "ghat", "ganga", "temple", "river", "kāsh", "ka", "the", "(19", "earn",
+         "nikarn", "naïve", "-ba", "xyz", "ghats", "learning"]
+
+
+def corpus(n=200, seed=7):
+    rng = random.Random(seed)
+    separators = [" ", "  ", "\n", "\t", " \n "]
+    return {
+        i: {"text": "".join(rng.choice(WORDS) + rng.choice(separators) for _ in range(rng.randint(1, 12)))}
+        for i in range(n)
+    }
+
+
+def naive(metadata, terms):
+    """The old keyword fallback: every term is a substring of the lower-cased chunk text."""
+    return sorted(i for i, meta in metadata.items() if all(t in meta["text"].lower() for t in terms))
+
+
+def queries(seed=3):
+    rng = random.Random(seed)
+    yield from ([t] for t in TERMS)
+    for _ in range(50):
+        yield rng.sample(TERMS, rng.randint(2, 3))
+
+
+def test_search_matches_naive_scan_in_memory_and_mapped(tmp_path):
+    metadata = corpus()
+    built = KeywordIndex.build(metadata)
+    built.write(str(tmp_path / "keyword_index.bin"))
+    mapped = KeywordIndex.open(str(tmp_path / "keyword_index.bin"))
+    assert mapped._mmap is not None and not mapped.postings
+    assert mapped.num_chunks == built.num_chunks == len(metadata)
+
+    for terms in queries():
+        expected = naive(metadata, terms)
+        assert built.search(terms) == expected, terms
+        assert mapped.search(terms) == expected, terms
+    assert mapped.search([]) == []
+
+
+def test_trigrams_narrow_a_term_to_the_tokens_that_can_contain_it(tmp_path):
+    metadata = {i: {"text": f"token{i:04d} filler{i % 7}"} for i in range(2000)}
+    metadata[5000] = {"text": "the cremation grounds"}
+    KeywordIndex.build(metadata).write(str(tmp_path / "keyword_index.bin"))
+    index = KeywordIndex.open(str(tmp_path / "keyword_index.bin"))
+
+    decoded = []
+    token = index._token
+    index._token = lambda n: decoded.append(n) or token(n)
+
+    assert index.search(["emat"]) == [5000]
+    assert [token(n) for n in decoded] == ["cremation"]
+
+    decoded.clear()
+    assert index.search(["token0042"]) == [42]
+    assert len(decoded) == 1
+
+    # A trigram no token has: no candidate at all
+    decoded.clear()
+    assert index.search(["qqq"]) == []
+    assert decoded == []
+
+
+def test_overlay_and_tombstones_until_the_next_write(tmp_path):
+    metadata = corpus(50)
+    KeywordIndex.build(metadata).write(str(tmp_path / "v1.bin"))
+    index = KeywordIndex.open(str(tmp_path / "v1.bin"))
+
+    # Added after the snapshot: overlay only
+    metadata[100] = {"text": "brand new ghat Varanasi"}
+    metadata[101] = {"text": "another river"}
+    index.add(100, metadata[100]["text"])
+    index.add(101, metadata[101]["text"])
+
+    # Deletes: snapshot chunks are masked, overlay chunks are dropped
+    for chunk_id in (3, 17, 101):
+        index.remove(chunk_id, metadata.pop(chunk_id)["text"])
+    index.remove(999, "not indexed anywhere")
+    assert index.removed == {3, 17}
+    assert index.overlay_chunks == {100}
+    assert "another" not in index.postings
+    assert index.num_chunks == len(metadata)
+
+    for terms in queries():
+        assert index.search(terms) == naive(metadata, terms), terms
+
+    # write folds overlay and tombstones into a new file
+    index.write(str(tmp_path / "v2.bin"))
+    folded = KeywordIndex.open(str(tmp_path / "v2.bin"))
+    assert not folded.removed and not folded.overlay_chunks
+    assert folded.chunk_ids.tolist() == sorted(metadata)
+    for terms in queries():
+        assert folded.search(terms) == naive(metadata, terms), terms
+
+
+def test_rewriting_the_file_leaves_open_readers_intact(tmp_path):
+    path = str(tmp_path / "keyword_index.bin")
+    KeywordIndex.build({1: {"text": "old text"}}).write(path)
+    reader = KeywordIndex.open(path)
+
+    KeywordIndex.build({2: {"text": "new text"}}).write(path)
+    assert reader.search(["old"]) == [1]
+    assert KeywordIndex.open(path).search(["new"]) == [2]
+    assert list(tmp_path.iterdir()) == [tmp_path / "keyword_index.bin"]
+
+
+def test_missing_empty_and_foreign_files(tmp_path):
+    assert KeywordIndex.open(str(tmp_path / "missing.bin")).num_chunks == 0
+    (tmp_path / "empty.bin").write_bytes(b"")
+    assert KeywordIndex.open(str(tmp_path / "empty.bin")).search(["ghat"]) == []
+
+    (tmp_path / "foreign.bin").write_bytes(np.arange(16, dtype=np.int64).tobytes())
+    with pytest.raises(ValueError):
+        KeywordIndex.open(str(tmp_path / "foreign.bin"))
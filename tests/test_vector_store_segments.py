@@ -0,0 +1,253 @@
+"""Delta-segment persistence of the vector store (SegmentLog + manifests) against LocalObjectStore."""
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from backend.config import settings
+from backend.services import index_factory
+from backend.services.query_cache import normalize_query
+from backend.services.segment_store import ManifestConflict
+
+ALPHA = "alpha cremation grounds " * 30
+BETA = "beta river temple " * 30
+GAMMA = "gamma mountain shrine " * 30
+
+
+def object_keys(root, kind):
+    """Keys under vector_store/<kind>/ in the local bucket."""
+    keys = []
+    for directory, _, files in os.walk(root):
+        if os.sep + kind in directory:
+            keys.extend(os.path.join(directory, f) for f in files)
+    return sorted(keys)
+
+
+def sources(proc):
+    return {source: len(ids) for source, ids in proc.sources.items()}
+
+
+def test_commit_then_replay_on_reload(open_store):
+    api = open_store("api")
+    api.add_document(ALPHA, "a.pdf")
+    api.add_document(BETA, "b.pdf")
+    assert api.manifest_version == 2
+    assert len(api.segments) == 2
+
+    worker = open_store("worker")
+    assert worker.manifest_version == 2
+    assert sources(worker) == sources(api)
+    assert worker.next_id == api.next_id
+    assert worker.keyword_index.search(["cremation", "grounds"]) == sorted(api.sources["a.pdf"])
+    # Replayed vectors: each chunk is its own nearest neighbour
+    for chunk_id in api.sources["b.pdf"]:
+        text = api.metadata[chunk_id]["text"]
+        distances, ids = worker._search_vectors(worker.embed_text(text), 1)
+        assert distances[0] < 1e-6 and worker.metadata[int(ids[0])]["text"] == text
+
+
+def test_refresh_picks_up_other_writers(open_store):
+    api = open_store("api")
+    worker = open_store("worker")
+    worker.add_document(ALPHA, "a.pdf")
+
+    api.refresh()
+    assert sources(api) == {"a.pdf": len(worker.sources["a.pdf"])}
+    assert api.keyword_index.search(["cremation"]) == sorted(worker.sources["a.pdf"])
+
+
+def test_manifest_conflict_is_retried_with_fresh_ids(open_store):
+    api = open_store("api")
+    worker = open_store("worker")
+    conflicts = []
+    commit = api.log.commit
+
+    def racing_commit(manifest):
+        if not conflicts:
+            # Another process wins this version between our refresh and our commit
+            worker.add_document(BETA, "b.pdf")
+            conflicts.append(manifest["version"])
+        return commit(manifest)
+
+    api.log.commit = racing_commit
+    api.add_document(ALPHA, "a.pdf")
+
+    assert conflicts == [1]
+    assert api.manifest_version == 2
+    assert set(api.sources) == {"a.pdf", "b.pdf"}
+    assert not set(api.sources["a.pdf"]) & set(api.sources["b.pdf"])
+    # The losing attempt's segment was cleaned up
+    assert len(object_keys(settings.VECTOR_STORE_LOCAL_DIR, "segments")) == 2
+
+    reloaded = open_store("reader")
+    assert sources(reloaded) == sources(api)
+
+
+def test_commit_rejects_taken_version(open_store):
+    api = open_store("api")
+    api.add_document(ALPHA, "a.pdf")
+    manifest = {"version": 1, "base": api.base, "segments": [], "next_id": 0, "garbage": []}
+    with pytest.raises(ManifestConflict):
+        api.log.commit(manifest)
+
+
+def test_compaction_and_garbage_deletion(open_store, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_STORE_COMPACT_EVERY", 2)
+    root = settings.VECTOR_STORE_LOCAL_DIR
+    api = open_store("api")
+    api.add_document(ALPHA, "a.pdf")
+    api.add_document(BETA, "b.pdf")
+
+    # Compacted: new base, no segments; the folded segments are kept one more round as garbage
+    assert api.segments == []
+    assert api.base["version"] == 3
+    first_segments = object_keys(root, "segments")
+    assert len(first_segments) == 2
+    assert sorted(os.path.join(root, settings.S3_BUCKET_NAME, *k.split("/")) for k in api.garbage) == first_segments
+
+    api.add_document(GAMMA, "c.pdf")
+    api.delete_document("a.pdf")
+
+    # Second compaction deletes the first one's garbage (old segments), keeps its own
+    assert api.base["version"] == 6
+    remaining = object_keys(root, "segments")
+    assert not set(first_segments) & set(remaining)
+    assert len(remaining) == 2
+    assert len(object_keys(root, os.path.join("base", f"{3:012d}"))) > 0  # previous base: garbage until next round
+
+    reader = open_store("reader")
+    assert reader.manifest_version == 6
+    assert reader.segments == []
+    assert sources(reader) == sources(api) == {"b.pdf": len(api.sources["b.pdf"]), "c.pdf": len(api.sources["c.pdf"])}
+    assert reader.keyword_index.search(["cremation"]) == []
+
+
+def test_delete_and_replace_document(open_store):
+    api = open_store("api")
+    api.add_document(ALPHA, "doc.pdf")
+    old_ids = set(api.sources["doc.pdf"])
+
+    # Re-adding a file key replaces its chunks
+    api.add_document(BETA, "doc.pdf")
+    new_ids = set(api.sources["doc.pdf"])
+    assert not old_ids & new_ids
+    assert all(i not in api.metadata for i in old_ids)
+    assert api.keyword_index.search(["cremation"]) == []
+    assert api.keyword_index.search(["temple"]) == sorted(new_ids)
+
+    reader = open_store("reader")
+    assert set(reader.sources["doc.pdf"]) == new_ids
+    assert reader.keyword_index.search(["river", "temple"]) == sorted(new_ids)
+
+    assert api.delete_document("doc.pdf") == len(new_ids)
+    assert api.delete_document("doc.pdf") == 0
+    assert api.sources == {}
+    assert len(api.metadata) == 0
+
+    reader.refresh()
+    assert reader.sources == {}
+    assert reader.keyword_index.search(["temple"]) == []
+    assert reader.search("river temple", k=3) == []
+
+
+def test_stores_sharing_a_directory_keep_their_own_snapshots(open_store, monkeypatch):
+    # start_app.sh runs the API and the worker from the same directory
+    monkeypatch.setattr(settings, "VECTOR_STORE_COMPACT_EVERY", 2)
+    seed = open_store("seed")
+    seed.add_document(ALPHA, "a.pdf")
+    seed.add_document(BETA, "b.pdf")  # Compacted: a mapped base for both stores below
+
+    api = open_store("shared")
+    worker = open_store("shared")
+    assert api.read_only_base and worker.read_only_base
+    assert api.data_dir != worker.data_dir
+    api_ids = set(api.metadata.keys())
+
+    # The worker compacts next to the API, which has not caught up yet
+    worker.add_document(GAMMA, "c.pdf")
+    worker.delete_document("a.pdf")
+    assert worker.base["version"] == 6
+
+    # The API's base is still its own: a compaction from here must not publish the worker's files
+    assert set(index_factory.mapped_ids(api._writable_index()).tolist()) == api_ids
+    assert api.keyword_index.search(["cremation"]) == sorted(api.sources["a.pdf"])
+
+    api.refresh()
+    assert sources(api) == sources(worker)
+    assert set(index_factory.mapped_ids(api._writable_index()).tolist()) == set(worker.metadata.keys())
+
+
+def test_refresh_waits_for_searches_in_flight(open_store):
+    api = open_store("api")
+    worker = open_store("worker")
+    worker.add_document(ALPHA, "a.pdf")
+    api.refresh()
+    worker.add_document(BETA, "b.pdf")
+
+    events = []
+    searching = threading.Event()
+    search_vectors, add_vectors = api.store._search_vectors, api.store._add_vectors
+
+    def slow_search_vectors(*args):
+        events.append("search started")
+        searching.set()
+        time.sleep(0.2)  # Another request thread refreshes meanwhile
+        events.append("search finished")
+        return search_vectors(*args)
+
+    def recorded_add_vectors(*args):
+        events.append("change applied")
+        return add_vectors(*args)
+
+    api.store._search_vectors = slow_search_vectors
+    api.store._add_vectors = recorded_add_vectors
+    search = threading.Thread(target=api.search, args=("river temple",))
+    search.start()
+    searching.wait()
+    api.refresh()
+    search.join()
+
+    assert events == ["search started", "search finished", "change applied"]
+    # The search read the old state: its ranking must not be served after the change
+    assert api.result_cache.get((normalize_query("river temple"), 5)) is None
+    assert {r["source"] for r in api.search("river temple")} >= {"b.pdf"}
+
+
+def test_concurrent_searches_do_not_wait_on_a_commit(open_store):
+    from backend.services.aws_clients import aws
+    api = open_store("api")
+    worker = open_store("worker")
+    worker.add_document(ALPHA, "a.pdf")
+    api.refresh()
+    worker.add_document(BETA, "b.pdf")
+
+    # A long commit/compaction in this process holds the writer lock
+    held, release = threading.Event(), threading.Event()
+
+    def long_commit():
+        with api.store.write_lock:
+            held.set()
+            release.wait(5)
+
+    committer = threading.Thread(target=long_commit)
+    committer.start()
+    held.wait()
+    api.store._last_refresh = 0  # A refresh is due
+
+    async def burst():
+        # Same path as GET /search
+        return await asyncio.gather(*(aws.run(api.store.search, "cremation grounds", k=3) for _ in range(8)))
+
+    started = time.monotonic()
+    results = asyncio.run(burst())
+    elapsed = time.monotonic() - started
+    release.set()
+    committer.join()
+
+    assert elapsed < 2
+    assert all(results)
+    # The skipped refresh is still due, and the next search picks up the worker's commit
+    api.search("cremation grounds")
+    assert "b.pdf" in api.sources